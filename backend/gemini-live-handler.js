@@ -16,7 +16,7 @@ function logDebug(msg) {
 }
 
 
-const { textToSpeechBase64 } = require('./tts-edge-handler');
+const { textToSpeechStream, textToSpeechBase64, hasFfmpeg } = require('./tts-edge-handler');
 
 /**
  * Gemini Live Session Class
@@ -198,13 +198,26 @@ class GeminiLiveSession {
                         // Generate Audio from Text
                         try {
                             console.log(`🔊 [GEMINI-LIVE] Generating TTS for: "${text.substring(0, 30)}..."`);
-                            // Use standard Arabic voice
-                            const audioBase64 = await textToSpeechBase64(text, "ar-EG-SalmaNeural");
-                            const audioBuffer = Buffer.from(audioBase64, 'base64');
-                            this.onAudioResponse?.(audioBuffer);
-                            console.log(`✅ [GEMINI-LIVE] TTS Audio sent: ${audioBuffer.length} bytes`);
+                            if (hasFfmpeg()) {
+                                // Use standard Arabic voice, streamed as 24 kHz PCM like the Live audio
+                                const { size } = await textToSpeechStream(
+                                    text,
+                                    (pcmChunk) => this.onAudioResponse?.(pcmChunk),
+                                    "ar-EG-SalmaNeural",
+                                    { format: 'pcm', sampleRate: 24000 }
+                                );
+                                console.log(`✅ [GEMINI-LIVE] TTS Audio sent: ${size} bytes`);
+                            } else {
+                                // No ffmpeg to decode to PCM: send the MP3 as before
+                                const audioBase64 = await textToSpeechBase64(text, "ar-EG-SalmaNeural");
+                                const audioBuffer = Buffer.from(audioBase64, 'base64');
+                                this.onAudioResponse?.(audioBuffer);
+                                console.log(`✅ [GEMINI-LIVE] TTS Audio sent (MP3): ${audioBuffer.length} bytes`);
+                            }
                         } catch (ttsError) {
                             console.error(`❌ [GEMINI-LIVE] TTS Error: ${ttsError.message}`);
+                            // Tell the user instead of staying silent
+                            this.onError?.(ttsError);
                         }
                     }
                 }
@@ -13,6 +13,7 @@ const { config, validateConfig, checkWakeWord } = require('./config');
 // const { createGeminiLiveSession } = require('./gemini-live-handler');
 // server.js REVERT: Using GeminiLiveSession for everything
 const { GeminiLiveSession } = require('./gemini-live-handler');
+const { hasFfmpeg } = require('./tts-edge-handler');
 // const GeminiRestClient = require('./gemini-rest-client'); 
 
 // ... inside handleConnection ...
@@ -365,6 +366,12 @@ function startServer(port) {
   return serverInstance;
 }
 
+// ffmpeg turns the Edge-TTS replies into PCM; without it they are sent as MP3
+if (!hasFfmpeg()) {
+  console.warn('⚠️  ffmpeg غير مثبت: الردود الصوتية سترسل بصيغة MP3 | ffmpeg not found: spoken replies fall back to MP3');
+  console.warn('💡 للحصول على PCM: ثبّت ffmpeg وأضفه إلى PATH، أو اضبط TTS_FFMPEG على مساره');
+}
+
 // Start server with port conflict handling
 startServer(DEFAULT_PORT);
 
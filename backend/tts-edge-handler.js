@@ -7,12 +7,24 @@
 
 const fs = require('fs');
 const path = require('path');
-const { spawn } = require('child_process');
+const { spawn, spawnSync } = require('child_process');
 const crypto = require('crypto');
 
 // Configuration
 const PYTHON_SCRIPT = path.join(__dirname, '..', 'scripts', 'tts_edge.py');
 const TEMP_DIR = path.join(__dirname, '..', 'temp');
+const TTS_TIMEOUT_MS = 30000;
+
+// Deadline enforced by the worker itself (it answers with an error frame);
+// TTS_TIMEOUT_MS stays as a backstop in case the worker stops responding
+const TTS_DEADLINE_MS = parseInt(process.env.TTS_DEADLINE_MS || '15000', 10);
+
+// Set TTS_WORKER=0 to fall back to one Python process per utterance
+const USE_WORKER = process.env.TTS_WORKER !== '0';
+
+// ffmpeg decodes the Edge-TTS MP3 into PCM (format 'pcm', used for the
+// Gemini Live replies); without it callers use MP3 (see hasFfmpeg)
+const FFMPEG = process.env.TTS_FFMPEG || 'ffmpeg';
 
 // Arabic voice options
 const ARABIC_VOICES = {
@@ -45,15 +57,223 @@ function generateTempFilename() {
     return path.join(TEMP_DIR, `tts_${hash}.mp3`);
 }
 
+let ffmpegAvailable = null;
+
+/**
+ * Check (once) whether ffmpeg can be run, as needed for PCM output
+ *
+ * @returns {boolean} True if `ffmpeg -version` succeeds
+ */
+function hasFfmpeg() {
+    if (ffmpegAvailable === null) {
+        const result = spawnSync(FFMPEG, ['-version'], { stdio: 'ignore', timeout: 5000 });
+        ffmpegAvailable = !result.error && result.status === 0;
+    }
+    return ffmpegAvailable;
+}
+
+/**
+ * Persistent worker state (python tts_edge.py --serve)
+ */
+let worker = null;
+let nextJobId = 1;
+const pendingJobs = new Map();
+
+/**
+ * Fail every pending job and forget the worker so the next call respawns it
+ */
+function resetWorker(error) {
+    worker = null;
+    for (const job of pendingJobs.values()) {
+        clearTimeout(job.timer);
+        job.reject(error);
+    }
+    pendingJobs.clear();
+}
+
+/**
+ * Parse result frames: >II header length, payload length | JSON header | payload
+ *
+ * @param {Buffer} buffer - Unparsed worker output
+ * @param {Function} onFrame - Called with (header, payload) of each complete frame
+ * @returns {Buffer} The trailing bytes of an incomplete frame
+ */
+function parseFrames(buffer, onFrame) {
+    while (buffer.length >= 8) {
+        const headerLength = buffer.readUInt32BE(0);
+        const payloadLength = buffer.readUInt32BE(4);
+        const frameLength = 8 + headerLength + payloadLength;
+        if (buffer.length < frameLength) {
+            break;
+        }
+
+        const header = JSON.parse(buffer.toString('utf8', 8, 8 + headerLength));
+        onFrame(header, Buffer.from(buffer.subarray(8 + headerLength, frameLength)));
+        buffer = buffer.subarray(frameLength);
+    }
+
+    return buffer;
+}
+
+/**
+ * Dispatch the result frames of the worker to the pending jobs
+ *
+ * @param {Buffer} workerBuffer - Unparsed worker output
+ * @returns {Buffer} The trailing bytes of an incomplete frame
+ */
+function handleWorkerData(workerBuffer) {
+    return parseFrames(workerBuffer, (header, payload) => {
+        const job = pendingJobs.get(header.id);
+        if (!job) {
+            return;
+        }
+        if (header.type === 'chunk') {
+            if (job.onChunk) {
+                job.onChunk(payload);
+            }
+            return;
+        }
+        pendingJobs.delete(header.id);
+        clearTimeout(job.timer);
+
+        if (header.type === 'error') {
+            job.reject(new Error(`TTS worker failed: ${header.error}`));
+        } else {
+            job.resolve({ header, payload });
+        }
+    });
+}
+
+/**
+ * Start the TTS worker once and reuse it for every request
+ */
+function getWorker() {
+    if (worker) {
+        return worker;
+    }
+
+    console.log('🚀 [Edge-TTS] Starting persistent TTS worker...');
+    const proc = spawn('python', [PYTHON_SCRIPT, '--serve']);
+    worker = proc;
+
+    let output = Buffer.alloc(0);
+    proc.stdout.on('data', (data) => {
+        output = handleWorkerData(Buffer.concat([output, data]));
+    });
+    proc.stderr.on('data', (data) => {
+        const message = data.toString().trim();
+        if (message) {
+            console.log(`🐍 [Edge-TTS worker] ${message}`);
+        }
+    });
+    proc.on('error', (error) => {
+        if (worker === proc) {
+            resetWorker(new Error(`Failed to spawn TTS worker: ${error.message}`));
+        }
+    });
+    // Writing to a worker that died (EPIPE) must fail its jobs, not crash Node
+    proc.stdin.on('error', (error) => {
+        console.error(`⚠️ [Edge-TTS] TTS worker stdin error: ${error.message}`);
+        if (worker === proc) {
+            resetWorker(new Error(`TTS worker stdin failed: ${error.message}`));
+            proc.kill();
+        }
+    });
+    proc.on('close', (code) => {
+        if (worker === proc) {
+            console.error(`⚠️ [Edge-TTS] TTS worker exited with code ${code}`);
+            resetWorker(new Error(`TTS worker exited with code ${code}`));
+        }
+    });
+
+    return worker;
+}
+
+/**
+ * Send one job to the worker and wait for its result frame
+ *
+ * @param {Object} job - Job fields (text, voice, output, stream, deadline...)
+ * @param {Function} onChunk - Called with each audio chunk of a streaming job
+ */
+function runWorkerJob(job, onChunk = null) {
+    return new Promise((resolve, reject) => {
+        const proc = getWorker();
+        const id = nextJobId++;
+
+        const timer = setTimeout(() => {
+            pendingJobs.delete(id);
+            reject(new Error(`TTS conversion timed out after ${TTS_TIMEOUT_MS / 1000} seconds`));
+        }, TTS_TIMEOUT_MS);
+
+        pendingJobs.set(id, { resolve, reject, timer, onChunk });
+        proc.stdin.write(JSON.stringify({ id, deadline: TTS_DEADLINE_MS / 1000, ...job }) + '\n');
+    });
+}
+
+/**
+ * Stop the TTS worker (it is restarted on the next request)
+ */
+function stopWorker() {
+    if (worker) {
+        worker.stdin.end();
+        worker = null;
+    }
+}
+
 /**
  * Convert text to speech using edge-tts (Python)
  * 
+ * Jobs go to the persistent worker, which writes the audio to outputFile
+ * or, without one, to a temp file (as in spawn mode).
+ *
  * @param {string} text - The text to convert to speech
  * @param {string} voice - The voice to use (optional, defaults to female Saudi)
- * @param {string} outputFile - Output file path (optional, generates temp file if not provided)
+ * @param {string} outputFile - Output file path (optional)
  * @returns {Promise<{filePath: string, buffer: Buffer}>} Object containing file path and buffer
  */
 async function textToSpeech(text, voice = DEFAULT_VOICE, outputFile = null) {
+    if (!USE_WORKER) {
+        return textToSpeechSpawn(text, voice, outputFile);
+    }
+
+    // Validate input
+    if (!text || typeof text !== 'string') {
+        throw new Error('Text must be a non-empty string');
+    }
+
+    if (text.trim().length === 0) {
+        throw new Error('Text cannot be empty');
+    }
+
+    console.log(`🔊 [Edge-TTS] Converting text to speech (worker)...`);
+    console.log(`📝 Text: "${text.substring(0, 50)}${text.length > 50 ? '...' : ''}"`);
+    console.log(`🎤 Voice: ${voice}`);
+
+    ensureTempDir();
+    const outputPath = outputFile || generateTempFilename();
+
+    const { header } = await runWorkerJob({ text, voice, output: outputPath });
+    const buffer = fs.readFileSync(outputPath);
+
+    console.log(`✅ [Edge-TTS] Audio generated successfully!`);
+    console.log(`📊 File size: ${buffer.length} bytes`);
+
+    return {
+        filePath: outputPath,
+        buffer: buffer,
+        size: header.size
+    };
+}
+
+/**
+ * Convert text to speech by spawning one Python process for this utterance
+ *
+ * @param {string} text - The text to convert to speech
+ * @param {string} voice - The voice to use
+ * @param {string} outputFile - Output file path (optional, generates temp file if not provided)
+ * @returns {Promise<{filePath: string, buffer: Buffer}>} Object containing file path and buffer
+ */
+async function textToSpeechSpawn(text, voice = DEFAULT_VOICE, outputFile = null) {
     return new Promise((resolve, reject) => {
         // Validate input
         if (!text || typeof text !== 'string') {
@@ -139,8 +359,100 @@ async function textToSpeech(text, voice = DEFAULT_VOICE, outputFile = null) {
         // Set timeout (30 seconds)
         setTimeout(() => {
             python.kill();
-            reject(new Error('TTS conversion timed out after 30 seconds'));
-        }, 30000);
+            reject(new Error(`TTS conversion timed out after ${TTS_TIMEOUT_MS / 1000} seconds`));
+        }, TTS_TIMEOUT_MS);
+    });
+}
+
+/**
+ * Convert text to speech, delivering audio chunks as soon as they are synthesized
+ *
+ * Playback can start on the first chunk instead of waiting for the whole file.
+ * With format 'pcm' the chunks are 16-bit mono PCM (24 kHz unless sampleRate
+ * is given), the same format the browser player uses for Gemini Live audio.
+ *
+ * @param {string} text - The text to convert
+ * @param {Function} onChunk - Called with each audio chunk (Buffer), in order
+ * @param {string} voice - The voice to use
+ * @param {Object} options - { format: 'mp3' | 'pcm', sampleRate: number }
+ * @returns {Promise<{size: number}>} Resolves once the last chunk was delivered
+ * @throws {Error} For format 'pcm' when ffmpeg is not installed
+ */
+async function textToSpeechStream(text, onChunk, voice = DEFAULT_VOICE, options = {}) {
+    if (!text || typeof text !== 'string' || text.trim().length === 0) {
+        throw new Error('Text must be a non-empty string');
+    }
+
+    console.log(`🔊 [Edge-TTS] Streaming text to speech...`);
+    console.log(`📝 Text: "${text.substring(0, 50)}${text.length > 50 ? '...' : ''}"`);
+
+    const job = { text, voice, stream: true, format: options.format || 'mp3' };
+    if (job.format === 'pcm' && !hasFfmpeg()) {
+        throw new Error(`ffmpeg not found ('${FFMPEG}'): it is required for PCM speech. ` +
+            'Install ffmpeg or set TTS_FFMPEG to its path');
+    }
+    if (options.sampleRate) {
+        job.sample_rate = options.sampleRate;
+    }
+
+    if (!USE_WORKER) {
+        return textToSpeechStreamSpawn(job, onChunk);
+    }
+    const { header } = await runWorkerJob(job, onChunk);
+    return { size: header.size };
+}
+
+/**
+ * Stream one utterance from its own Python process (tts_edge.py --stream)
+ *
+ * @param {Object} job - text, voice, format and optional sample_rate
+ * @param {Function} onChunk - Called with each audio chunk as it arrives
+ * @returns {Promise<{size: number}>} Resolves once the last chunk was delivered
+ */
+function textToSpeechStreamSpawn(job, onChunk) {
+    return new Promise((resolve, reject) => {
+        const args = [PYTHON_SCRIPT, '--stream', job.text, job.voice, '--format', job.format];
+        if (job.sample_rate) {
+            args.push('--sample-rate', String(job.sample_rate));
+        }
+        const python = spawn('python', args);
+
+        let output = Buffer.alloc(0);
+        let size = null;
+        let stderr = '';
+
+        const timer = setTimeout(() => {
+            python.kill();
+            reject(new Error(`TTS conversion timed out after ${TTS_TIMEOUT_MS / 1000} seconds`));
+        }, TTS_TIMEOUT_MS);
+
+        python.stdout.on('data', (data) => {
+            output = parseFrames(Buffer.concat([output, data]), (header, payload) => {
+                if (header.type === 'chunk') {
+                    onChunk(payload);
+                } else if (header.type === 'done') {
+                    size = header.size;
+                }
+            });
+        });
+
+        python.stderr.on('data', (data) => {
+            stderr += data.toString();
+        });
+
+        python.on('close', (code) => {
+            clearTimeout(timer);
+            if (code !== 0 || size === null) {
+                console.error(`❌ [Edge-TTS] Python script exited with code ${code}`);
+                return reject(new Error(`Python script failed: ${stderr}`));
+            }
+            resolve({ size });
+        });
+
+        python.on('error', (error) => {
+            clearTimeout(timer);
+            reject(new Error(`Failed to spawn Python process: ${error.message}`));
+        });
     });
 }
 
@@ -214,6 +526,10 @@ async function testTTS() {
 
 module.exports = {
     textToSpeech,
+    textToSpeechSpawn,
+    textToSpeechStream,
+    stopWorker,
+    hasFfmpeg,
     textToSpeechBase64,
     getAvailableVoices,
     cleanupTempFiles,
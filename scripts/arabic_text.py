@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Arabic text canonicalization
+Maps the spellings of the same answer that Gemini produces (tatweel,
+diacritics, alef/hamza forms, Arabic-Indic digits, invisible marks,
+whitespace) to one canonical string. Used for cache and dedup keys only:
+the original text is what gets synthesized.
+
+The Arabic rules live in one table built at import time, so canonicalize()
+is a single str.translate() plus a whitespace split/join. The table has an
+entry for every code point up to the end of the Arabic block: a code point
+without one costs str.translate() a raised and cleared KeyError, and is
+then left untouched.
+"""
+
+import unicodedata
+
+TATWEEL = '\u0640'
+
+# Harakat, tanween, shadda, sukun, superscript alef and Quranic annotation marks
+DIACRITICS = (
+    ''.join(chr(c) for c in range(0x064B, 0x0660))
+    + '\u0670'
+    + ''.join(chr(c) for c in range(0x06D6, 0x06EE))
+)
+
+# Zero-width and direction marks that do not change what is spoken
+INVISIBLE = '\u200b\u200c\u200d\u200e\u200f\u061c\ufeff'
+
+# Hamza-carrying and wasla alef forms are folded into the bare alef
+ALEF_FORMS = {'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا'}
+
+# Arabic-Indic (U+0660) and Extended Arabic-Indic (U+06F0) digits
+DIGITS = {chr(base + d): str(d) for base in (0x0660, 0x06F0) for d in range(10)}
+
+# Code points 0 - U+06FF: Basic Latin through the Arabic block
+TABLE_SIZE = 0x0700
+
+
+def build_table():
+    """Return the str.translate() table of the Arabic rules"""
+    table = {c: chr(c) for c in range(TABLE_SIZE)}
+    for c in TATWEEL + DIACRITICS + INVISIBLE:
+        table[ord(c)] = None
+    for source, target in {**ALEF_FORMS, **DIGITS}.items():
+        table[ord(source)] = target
+    return table
+
+
+CANONICAL_TABLE = build_table()
+
+
+def canonicalize(text):
+    """
+    Return the canonical form of text for cache and dedup keys
+
+    Unicode NFC, then tatweel, diacritics and invisible marks removed, alef
+    forms folded, digits made ASCII and whitespace collapsed.
+    """
+    if not text.isascii():
+        text = unicodedata.normalize('NFC', text).translate(CANONICAL_TABLE)
+    return ' '.join(text.split())
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-file audio bundle
+Holds pre-rendered and cached audio (thousands of small MP3 files) in one
+file: an append-only data region followed by an index of (key hash,
+offset, length) records sorted by hash. Readers memory-map the bundle and
+copy an entry out of the mapping after a binary search of the index, so a
+lookup is O(log n) with no open() or read() per clip. Returned entries are
+bytes, never views of the mapping, so a bundle can be closed (or dropped
+for a newer one) while its entries are still in use.
+
+Layout:
+    header   magic, version, entry count, index offset (HEADER)
+    data     entry payloads, appended in write order
+    index    RECORD per live entry, sorted by key hash
+
+Adding entries appends their data and a new index after the old one, then
+rewrites the header last, so a reader that opened the bundle earlier keeps
+a consistent snapshot. Replaced and removed entries and old indexes are
+dead bytes until compact() rewrites the bundle. Writers (add, remove) and
+compact() hold an exclusive lock on <bundle>.lock, so an entry added while
+the bundle is being compacted is not lost.
+
+Usage:
+    python audio_bundle.py add bundle.ttsb file.mp3 [...]
+    python audio_bundle.py add bundle.ttsb --cache DIR
+    python audio_bundle.py add bundle.ttsb --manifest jobs.jsonl
+    python audio_bundle.py remove bundle.ttsb KEY [...]
+    python audio_bundle.py compact bundle.ttsb
+    python audio_bundle.py stats bundle.ttsb
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+from tts_cache import ENTRY_SUFFIX
+
+# Force UTF-8 encoding for stdout/stderr on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Environment configuration (bundle consulted by tts_edge.py before the cache)
+BUNDLE_FILE = os.getenv('TTS_BUNDLE', '')
+# Seconds between checks of TTS_BUNDLE for a compacted or extended bundle
+BUNDLE_CHECK_INTERVAL = float(os.getenv('TTS_BUNDLE_CHECK', '1'))
+
+MAGIC = b'TTSBNDL1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQ')  # magic, version, reserved, entry count, index offset
+RECORD = struct.Struct('<16sQQ')   # key hash, data offset, data length
+HASH_SIZE = 16
+
+
+def lock_bundle(path):
+    """
+    Take the exclusive writer lock of a bundle, waiting for the current holder
+
+    Returns:
+        The open lock file; closing it releases the lock
+    """
+    lock_file = open(f"{path}.lock", 'a+b')
+    try:
+        if sys.platform == 'win32':
+            import msvcrt
+
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+    except BaseException:
+        lock_file.close()
+        raise
+    return lock_file
+
+
+def key_hash(key):
+    """Return the 16-byte index hash of a key (a cache key, file name...)"""
+    return hashlib.sha256(key.encode('utf-8')).digest()[:HASH_SIZE]
+
+
+def read_index(f):
+    """
+    Read the header and index of an open bundle file
+
+    Returns:
+        (entries, index_offset) where entries maps key hash -> (offset, length)
+
+    Raises:
+        ValueError: If the file is not a bundle
+    """
+    f.seek(0)
+    magic, version, _, count, index_offset = HEADER.unpack(f.read(HEADER.size).ljust(HEADER.size, b'\0'))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{f.name} is not an audio bundle")
+    f.seek(index_offset)
+    raw = f.read(count * RECORD.size)
+    if len(raw) != count * RECORD.size:
+        raise ValueError(f"{f.name}: truncated index")
+    entries = {digest: (offset, length) for digest, offset, length in RECORD.iter_unpack(raw)}
+    return entries, index_offset
+
+
+class BundleWriter:
+    """
+    Appends entries to a bundle (created if missing)
+
+    Nothing is visible to readers until commit(); use as a context manager
+    to commit on success. The writer lock (see lock_bundle) is held until
+    close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.added = 0
+        self.removed = 0
+        self._lock = lock_bundle(path)
+        self._file = None
+        try:
+            if os.path.exists(path) and os.path.getsize(path):
+                self._file = open(path, 'r+b')
+                self.entries, _ = read_index(self._file)
+            else:
+                self._file = open(path, 'w+b')
+                self._file.write(HEADER.pack(MAGIC, VERSION, 0, 0, HEADER.size))
+                self.entries = {}
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+            self._lock.close()
+            raise
+        self._end = self._file.seek(0, os.SEEK_END)
+
+    def add(self, key, data):
+        """Append the data of a key; an earlier entry of the key becomes dead"""
+        self._file.seek(self._end)
+        self._file.write(data)
+        self.entries[key_hash(key)] = (self._end, len(data))
+        self._end += len(data)
+        self.added += 1
+
+    def remove(self, key):
+        """Drop a key from the index; returns False if it was not there"""
+        if self.entries.pop(key_hash(key), None) is None:
+            return False
+        self.removed += 1
+        return True
+
+    def commit(self):
+        """Write the sorted index, then point the header at it"""
+        index_offset = self._end
+        self._file.seek(index_offset)
+        self._file.write(b''.join(RECORD.pack(digest, *self.entries[digest])
+                                  for digest in sorted(self.entries)))
+        self._end = self._file.tell()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, len(self.entries), index_offset))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        try:
+            self._file.close()
+        finally:
+            self._lock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+        finally:
+            self.close()
+
+
+class AudioBundle:
+    """Read-only, memory-mapped view of a bundle"""
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} is not an audio bundle")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self.index_offset = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not an audio bundle")
+        if self.index_offset + self.count * RECORD.size > len(self._map):
+            self._map.close()
+            raise ValueError(f"{path}: truncated index")
+        self._view = memoryview(self._map)
+
+    def __len__(self):
+        return self.count
+
+    def get(self, key):
+        """Return the bytes of the entry of key, or None on a miss"""
+        digest = key_hash(key)
+        data = self._map
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            start = self.index_offset + middle * RECORD.size
+            probe = data[start:start + HASH_SIZE]
+            if probe < digest:
+                low = middle + 1
+            elif probe > digest:
+                high = middle
+            else:
+                _, offset, length = RECORD.unpack_from(data, start)
+                self.hits += 1
+                return self._map[offset:offset + length]
+        self.misses += 1
+        return None
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def records(self):
+        """Yield (key hash, offset, length) of every live entry, in hash order"""
+        return RECORD.iter_unpack(self._view[self.index_offset:self.index_offset + self.count * RECORD.size])
+
+    def stats(self):
+        """Return the entry count, live / dead bytes and lookup counters"""
+        live = sum(length for _, _, length in self.records())
+        index_bytes = self.count * RECORD.size
+        return {
+            'entries': self.count,
+            'file_bytes': len(self._map),
+            'live_bytes': live,
+            'dead_bytes': len(self._map) - HEADER.size - index_bytes - live,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def close(self):
+        """Unmap the bundle"""
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_bundle = None
+_bundle_identity = None  # (device, inode, mtime, size) of the mapped file
+_bundle_checked_at = 0.0
+
+
+def file_identity(path):
+    """Return what changes when a bundle is replaced or appended to, or None if missing"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def get_bundle():
+    """
+    Return the process-wide bundle of TTS_BUNDLE, or None when unset or missing
+
+    The file is checked at most every BUNDLE_CHECK_INTERVAL seconds and
+    mapped again when compact() replaced it or entries were added, so a
+    long-running worker serves the current bundle. The old mapping is
+    dropped, not closed, as another thread may still be looking up in it.
+    """
+    global _bundle, _bundle_identity, _bundle_checked_at
+    if not BUNDLE_FILE:
+        return None
+    now = time.monotonic()
+    if _bundle is not None and now - _bundle_checked_at < BUNDLE_CHECK_INTERVAL:
+        return _bundle
+    _bundle_checked_at = now
+
+    identity = file_identity(BUNDLE_FILE)
+    if identity is None:
+        _bundle, _bundle_identity = None, None
+    elif identity != _bundle_identity:
+        try:
+            _bundle = AudioBundle(BUNDLE_FILE)
+            _bundle_identity = identity
+        except ValueError as e:
+            # Being created or rewritten in place: keep the previous snapshot
+            print(f"[TTS] Bundle not reloaded: {e}")
+    return _bundle
+
+
+def compact(path):
+    """
+    Rewrite a bundle with only its live entries (atomically, via rename)
+
+    Readers that have the old bundle mapped keep reading the old file;
+    get_bundle() maps the new one at its next check. Writers wait for the
+    compaction to finish (see lock_bundle).
+
+    Returns:
+        Bytes reclaimed
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with lock_bundle(path), AudioBundle(path) as bundle:
+        before = len(bundle._map)
+        # Copy in data order so the new data region is read sequentially
+        records = sorted(bundle.records(), key=lambda record: record[1])
+        try:
+            with open(temp_path, 'w+b') as out:
+                out.write(HEADER.pack(MAGIC, VERSION, 0, 0, HEADER.size))
+                entries = {}
+                for digest, offset, length in records:
+                    entries[digest] = (out.tell(), length)
+                    out.write(bundle._view[offset:offset + length])
+                index_offset = out.tell()
+                out.write(b''.join(RECORD.pack(digest, *entries[digest]) for digest in sorted(entries)))
+                after = out.tell()
+                out.seek(0)
+                out.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), index_offset))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return before - after
+
+
+def manifest_entries(manifest_path):
+    """
+    Yield (cache key, output path) for the MP3 outputs of a tts_edge.py --batch manifest
+
+    Keys are computed as stream_speech() computes them, so the bundle
+    answers the same requests. Segmented and PCM jobs are skipped: their
+    output is not the audio of one synthesis.
+    """
+    from speakable_text import make_speakable
+    from tts_cache import make_key
+    from tts_edge import DEFAULT_VOICE, OUTPUT_FORMAT
+    from voice_catalog import resolve_voice
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if job.get('segmented') or (job.get('format') or 'mp3') != 'mp3' or not job.get('output'):
+                continue
+            text = make_speakable(job['text'])[0]
+            voice = resolve_voice(job.get('voice') or DEFAULT_VOICE)
+            key = make_key(text, voice, job.get('rate') or '+0%', job.get('pitch') or '+0Hz', OUTPUT_FORMAT)
+            yield key, os.path.join(base_dir, job['output'])
+
+
+def source_entries(args):
+    """Yield (key, path) for the add command: files, --cache DIR, --manifest FILE"""
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg == '--cache':
+            directory = args.pop(0)
+            for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+                if entry.is_file() and entry.name.endswith(ENTRY_SUFFIX):
+                    yield entry.name[:-len(ENTRY_SUFFIX)], entry.path
+        elif arg == '--manifest':
+            yield from manifest_entries(args.pop(0))
+        else:
+            yield os.path.basename(arg), arg
+
+
+def main():
+    """Main function"""
+    commands = ('add', 'remove', 'compact', 'stats')
+    if len(sys.argv) < 3 or sys.argv[1] not in commands:
+        print("Usage:")
+        print("  python audio_bundle.py add bundle.ttsb file.mp3 [...]")
+        print("  python audio_bundle.py add bundle.ttsb --cache DIR")
+        print("  python audio_bundle.py add bundle.ttsb --manifest jobs.jsonl")
+        print("  python audio_bundle.py remove bundle.ttsb KEY [...]")
+        print("  python audio_bundle.py compact bundle.ttsb")
+        print("  python audio_bundle.py stats bundle.ttsb")
+        sys.exit(1)
+
+    command, path, args = sys.argv[1], sys.argv[2], sys.argv[3:]
+    try:
+        if command == 'add':
+            skipped = 0
+            with BundleWriter(path) as writer:
+                for key, source in source_entries(args):
+                    try:
+                        with open(source, 'rb') as f:
+                            writer.add(key, f.read())
+                    except FileNotFoundError:
+                        skipped += 1
+            print(f"✅ Added {writer.added} entries to {path}"
+                  + (f" ({skipped} missing files skipped)" if skipped else ""))
+        elif command == 'remove':
+            with BundleWriter(path) as writer:
+                for key in args:
+                    writer.remove(key)
+            print(f"✅ Removed {writer.removed} of {len(args)} keys from {path}")
+        elif command == 'compact':
+            reclaimed = compact(path)
+            print(f"✅ Compacted {path}: {reclaimed:,} bytes reclaimed")
+        else:
+            with AudioBundle(path) as bundle:
+                stats = bundle.stats()
+            print(f"{path}: {stats['entries']} entries, {stats['live_bytes']:,} live bytes, "
+                  f"{stats['dead_bytes']:,} dead bytes, {stats['file_bytes']:,} bytes on disk")
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+edge-tts stand-in benchmark suite
+Runs text_to_speech(), streaming and the --serve worker at several
+concurrency levels against the local stand-in service of fake_edge_tts.py
+(extra server options in TTS_BENCH_FAKE_ARGS), so the results do not depend
+on the network, and reports TTFB / total percentiles and throughput.
+
+Exits with status 1 when a metric is slower than the 'edge' baseline (see
+bench_tts.py) by more than BASELINE_TOLERANCE.
+
+Usage:
+    python bench_edge.py [runs] [--update-baseline]
+    python bench_tts.py edge [runs] [--update-baseline]
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from bench_tts import SAMPLE_TEXT, SCRIPT_DIR, TTS_SCRIPT, check_baseline, read_frame
+
+# Stand-in edge-tts service and the concurrency levels the suite runs
+FAKE_SERVER = os.path.join(SCRIPT_DIR, 'fake_edge_tts.py')
+FAKE_SERVER_ARGS = shlex.split(os.getenv('TTS_BENCH_FAKE_ARGS', ''))
+EDGE_CONCURRENCY = (1, 4, 16)
+
+
+def start_fake_server(args=()):
+    """Start fake_edge_tts.py on a free port; returns (process, base URL)"""
+    server = subprocess.Popen(
+        [sys.executable, FAKE_SERVER, '--port', '0', *args],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, cwd=SCRIPT_DIR
+    )
+    line = server.stdout.readline()
+    if not line.startswith('URL: '):
+        server.kill()
+        raise RuntimeError(f"fake_edge_tts.py did not start: {line.strip()}")
+    return server, line.split()[1]
+
+
+def bench_edge(runs):
+    """text_to_speech(), streaming and the --serve worker against the local stand-in service"""
+    server, url = start_fake_server(FAKE_SERVER_ARGS)
+    temp_dir = tempfile.mkdtemp(prefix='bench_edge_')
+    # Set before tts_edge is imported: every request goes upstream to the stand-in
+    env = {
+        'TTS_EDGE_URL': url,
+        'TTS_CACHE': '0',
+        'TTS_VOICES_FILE': os.path.join(temp_dir, 'voices.json'),
+        'TTS_PHRASE_BANK': '',
+    }
+    os.environ.update(env)
+    import tts_edge
+    import tts_latency
+
+    print(f"\n=== edge-tts stand-in at {url} ({runs} requests per concurrency slot, "
+          f"concurrency {', '.join(map(str, EDGE_CONCURRENCY))}) ===\n")
+    counter = iter(range(10 ** 9))
+
+    def next_text():
+        return f"{SAMPLE_TEXT} {next(counter)}"  # distinct texts: no coalescing
+
+    async def via_text_to_speech(_):
+        await tts_edge.text_to_speech(next_text(), os.path.join(temp_dir, 'out.mp3'))
+        return None  # first byte measured upstream, see below
+
+    async def via_stream(started):
+        first = None
+        async for _ in tts_edge.stream_audio(next_text()):
+            if first is None:
+                first = time.perf_counter() - started
+        return first
+
+    async def run_in_process(request, concurrency):
+        tts_latency._tracker = tts_latency.LatencyTracker(window=runs * concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        ttfb, total = [], []
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                first = await request(started)
+                total.append(time.perf_counter() - started)
+                if first is not None:
+                    ttfb.append(first)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(runs * concurrency)))
+        wall = time.perf_counter() - started
+        return ttfb or list(tts_latency._tracker.ttfb), total, wall
+
+    def run_worker(concurrency):
+        worker = subprocess.Popen(
+            [sys.executable, TTS_SCRIPT, '--serve', '--concurrency', str(concurrency),
+             '--no-phrase-bank'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            env={**os.environ, **env}
+        )
+        count = runs * concurrency
+        sent = {}
+        ttfb, total = [], []
+
+        def send(job_id):
+            sent[job_id] = time.perf_counter()
+            job = {'id': job_id, 'text': next_text(), 'stream': True}
+            worker.stdin.write((json.dumps(job, ensure_ascii=False) + '\n').encode('utf-8'))
+            worker.stdin.flush()
+
+        try:
+            # Warm-up job: the worker imports edge_tts on its first synthesis
+            send(-1)
+            while read_frame(worker.stdout)[0]['type'] not in ('done', 'error'):
+                pass
+
+            started = time.perf_counter()
+            for job_id in range(min(concurrency, count)):
+                send(job_id)
+            next_id = min(concurrency, count)
+            first_seen = set()
+            finished = 0
+            while finished < count:
+                header, _ = read_frame(worker.stdout)
+                job_id = header.get('id')
+                elapsed = time.perf_counter() - sent[job_id]
+                if header['type'] == 'chunk' and job_id not in first_seen:
+                    first_seen.add(job_id)
+                    ttfb.append(elapsed)
+                elif header['type'] in ('done', 'error'):
+                    if header['type'] == 'error':
+                        raise RuntimeError(header.get('error'))
+                    total.append(elapsed)
+                    finished += 1
+                    if next_id < count:
+                        send(next_id)
+                        next_id += 1
+            return ttfb, total, time.perf_counter() - started
+        finally:
+            worker.stdin.close()
+            worker.wait()
+
+    results = {}
+    try:
+        print(f"{'mode':<16}{'conc':>5}{'n':>6}  {'ttfb p50/p95/p99 (ms)':>26}  "
+              f"{'total p50/p95/p99 (ms)':>26}  {'req/s':>7}")
+        for mode in ('text_to_speech', 'stream', 'worker'):
+            for concurrency in EDGE_CONCURRENCY:
+                if mode == 'worker':
+                    ttfb, total, wall = run_worker(concurrency)
+                else:
+                    request = via_text_to_speech if mode == 'text_to_speech' else via_stream
+                    with contextlib.redirect_stdout(io.StringIO()):  # [TTS] log lines
+                        ttfb, total, wall = asyncio.run(run_in_process(request, concurrency))
+                ttfb_ms = '/'.join(f"{tts_latency.percentile(ttfb, p) * 1000:.0f}" for p in (50, 95, 99))
+                total_ms = '/'.join(f"{tts_latency.percentile(total, p) * 1000:.0f}" for p in (50, 95, 99))
+                print(f"{mode:<16}{concurrency:>5}{len(total):>6}  {ttfb_ms:>26}  {total_ms:>26}  "
+                      f"{len(total) / wall:7.1f}")
+                for name, values in (('ttfb', ttfb), ('total', total)):
+                    for p in (50, 95):
+                        results[f'{mode}_c{concurrency}_{name}_p{p}'] = tts_latency.percentile(values, p)
+                results[f'{mode}_c{concurrency}_wall_per_request'] = wall / len(total)
+        with urllib.request.urlopen(f"{url}/stats") as response:
+            print(f"\nStand-in service: {json.load(response)}")
+    finally:
+        server.kill()
+        server.wait()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return check_baseline('edge', results, update='--update-baseline' in sys.argv)
+
+
+def main():
+    """Main function"""
+    numbers = [arg for arg in sys.argv[1:] if arg.isdigit()]
+    runs = int(numbers[0]) if numbers else 10
+    if bench_edge(runs) is False:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,696 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS Benchmarks
+Measures the latency of the different tts_edge.py code paths
+
+Usage:
+    python bench_tts.py worker [runs]
+    python bench_tts.py cache [runs]
+    python bench_tts.py stream [runs]
+    python bench_tts.py segments [runs]
+    python bench_tts.py startup [runs] [--update-baseline]
+    python bench_tts.py pack [runs]
+    python bench_tts.py hedge [runs]
+    python bench_tts.py canon [runs]
+    python bench_tts.py bundle [runs]
+    python bench_tts.py trim [runs]
+    python bench_tts.py edge [runs] [--update-baseline]
+    python bench_tts.py clients [runs]
+    python bench_tts.py vad [runs]
+
+startup and edge exit with status 1 when a metric is slower than the
+stored baseline by more than BASELINE_TOLERANCE. Baselines are timings of
+one machine: bench_baselines.json (or TTS_BENCH_BASELINES) is recorded on
+the first run and not committed. edge is the stand-in service suite of
+bench_edge.py.
+clients needs the Google Cloud libraries and the service-account key of
+GOOGLE_APPLICATION_CREDENTIALS; vad measures STT latency only when they
+are available (upload sizes are measured either way).
+"""
+
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Force UTF-8 encoding for stdout/stderr on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TTS_SCRIPT = os.path.join(SCRIPT_DIR, 'tts_edge.py')
+sys.path.insert(0, SCRIPT_DIR)
+
+BASELINE_FILE = os.getenv('TTS_BENCH_BASELINES', os.path.join(SCRIPT_DIR, 'bench_baselines.json'))
+BASELINE_TOLERANCE = 0.20  # allowed slowdown before a benchmark fails
+
+# Text corpus for the canonicalization benchmark: one answer per line
+# (default: the Arabic lines of the project documentation)
+CORPUS_FILE = os.getenv('TTS_BENCH_CORPUS')
+DOCS_DIR = os.path.join(SCRIPT_DIR, '..', 'docs')
+
+SAMPLE_TEXT = 'مرحباً، أنا روبوت متخصص في علوم الحاسب. كيف يمكنني مساعدتك اليوم؟'
+LONG_TEXT = (
+    'بايثون لغة برمجة عالية المستوى سهلة التعلم وواسعة الانتشار. '
+    'تستخدم في تطوير الويب وتحليل البيانات والذكاء الاصطناعي وأتمتة المهام. '
+    'تتميز بصياغة واضحة ومكتبات كثيرة تغطي معظم احتياجات المبرمجين. '
+    'لذلك ينصح بها كثيراً كلغة أولى لطلاب علوم الحاسب.'
+)
+
+# Loose-file layout simulated by the bundle benchmark
+BUNDLE_CLIPS = 5000
+BUNDLE_LOOKUPS = 2000
+
+# Short UI prompts and numbers, as pre-rendered by the batch mode
+SHORT_PHRASES = [
+    'واحد', 'اثنان', 'ثلاثة', 'أربعة', 'خمسة', 'ستة', 'سبعة', 'ثمانية', 'تسعة', 'عشرة',
+    'مرحباً', 'شكراً لك', 'من فضلك أعد السؤال', 'لحظة من فضلك', 'هل لديك سؤال آخر؟',
+]
+
+
+def report(label, timings):
+    """Print min / median / mean / max for a list of timings in seconds"""
+    print(f"{label:<28} n={len(timings):<4} "
+          f"min={min(timings) * 1000:8.1f}ms "
+          f"median={statistics.median(timings) * 1000:8.1f}ms "
+          f"mean={statistics.mean(timings) * 1000:8.1f}ms "
+          f"max={max(timings) * 1000:8.1f}ms")
+
+
+def load_baselines():
+    """Return the stored baselines (empty dict if none were recorded yet)"""
+    try:
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def check_baseline(name, results, update=False):
+    """
+    Compare results (metric -> seconds, lower is better) with the stored
+    baseline for benchmark name. The baseline is recorded when missing or
+    when update is set.
+
+    Returns:
+        False if any metric regressed past BASELINE_TOLERANCE
+    """
+    baselines = load_baselines()
+    stored = baselines.get(name)
+
+    if stored is None or update:
+        baselines[name] = results
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2)
+        print(f"\n💾 Baseline for '{name}' saved to {BASELINE_FILE}")
+        return True
+
+    ok = True
+    print(f"\n=== Baseline comparison (tolerance {BASELINE_TOLERANCE:.0%}) ===\n")
+    for metric, value in results.items():
+        if metric not in stored:
+            continue
+        ratio = value / stored[metric]
+        regressed = ratio > 1 + BASELINE_TOLERANCE
+        ok = ok and not regressed
+        print(f"{'❌' if regressed else '✅'} {metric:<32} {value * 1000:8.1f}ms "
+              f"(baseline {stored[metric] * 1000:8.1f}ms, {ratio:.0%})")
+    return ok
+
+
+def read_frame(stream):
+    """Read one worker result frame from a binary stream"""
+    from tts_edge import FRAME_HEADER
+
+    head = stream.read(FRAME_HEADER.size)
+    if len(head) < FRAME_HEADER.size:
+        raise EOFError("TTS worker closed its output")
+    header_length, payload_length = FRAME_HEADER.unpack(head)
+    header = json.loads(stream.read(header_length))
+    payload = stream.read(payload_length)
+    return header, payload
+
+
+def bench_worker(runs):
+    """Spawn-per-request (current Node path) against one persistent --serve worker"""
+    print(f"\n=== Spawn per request vs persistent worker ({runs} runs) ===\n")
+    temp_dir = tempfile.mkdtemp(prefix='bench_tts_')
+
+    spawn_timings = []
+    for i in range(runs):
+        output_file = os.path.join(temp_dir, f'spawn_{i}.mp3')
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, TTS_SCRIPT, SAMPLE_TEXT, output_file],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        spawn_timings.append(time.perf_counter() - start)
+    report('spawn per request', spawn_timings)
+
+    worker = subprocess.Popen(
+        [sys.executable, TTS_SCRIPT, '--serve'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        worker_timings = []
+        for i in range(runs):
+            job = {'id': i, 'text': SAMPLE_TEXT}
+            start = time.perf_counter()
+            worker.stdin.write((json.dumps(job) + '\n').encode('utf-8'))
+            worker.stdin.flush()
+            header, _ = read_frame(worker.stdout)
+            if header['type'] != 'done':
+                raise RuntimeError(header.get('error'))
+            worker_timings.append(time.perf_counter() - start)
+        report('worker, sequential', worker_timings)
+
+        start = time.perf_counter()
+        for i in range(runs):
+            job = {'id': runs + i, 'text': SAMPLE_TEXT}
+            worker.stdin.write((json.dumps(job) + '\n').encode('utf-8'))
+        worker.stdin.flush()
+        for _ in range(runs):
+            read_frame(worker.stdout)
+        total = time.perf_counter() - start
+        print(f"{'worker, concurrent':<28} n={runs:<4} "
+              f"total={total * 1000:8.1f}ms "
+              f"per job={total / runs * 1000:8.1f}ms")
+    finally:
+        worker.stdin.close()
+        worker.wait()
+
+    print(f"\nSpawn total: {sum(spawn_timings):.2f}s  "
+          f"Worker total: {sum(worker_timings):.2f}s")
+
+
+def bench_cache(runs):
+    """Cold synthesis against cache hits for the same utterance"""
+    import tts_cache
+    import tts_edge
+
+    print(f"\n=== Synthesis cache ({runs} runs) ===\n")
+    tts_cache._default_cache = tts_cache.TTSCache(tempfile.mkdtemp(prefix='bench_cache_'))
+
+    async def run():
+        start = time.perf_counter()
+        await tts_edge.synthesize_bytes(SAMPLE_TEXT)
+        report('miss (network)', [time.perf_counter() - start])
+
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await tts_edge.synthesize_bytes(SAMPLE_TEXT)
+            timings.append(time.perf_counter() - start)
+        report('hit', timings)
+
+    asyncio.run(run())
+    print(f"\nCache: {tts_cache._default_cache.stats()}")
+
+
+def bench_stream(runs):
+    """Time to first audio chunk (streaming) against full synthesis of a long answer"""
+    import tts_cache
+    import tts_edge
+
+    print(f"\n=== Streaming vs whole-file synthesis ({runs} runs) ===\n")
+    tts_cache.CACHE_ENABLED = False
+
+    async def run():
+        first_chunk, full = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            first = None
+            async for _ in tts_edge.stream_speech(LONG_TEXT):
+                if first is None:
+                    first = time.perf_counter() - start
+            first_chunk.append(first)
+            full.append(time.perf_counter() - start)
+        report('stream, first chunk', first_chunk)
+        report('stream, last chunk', full)
+
+        saved = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await tts_edge.synthesize_bytes(LONG_TEXT)
+            saved.append(time.perf_counter() - start)
+        report('whole file', saved)
+
+        print(f"\nPerceived latency: {statistics.median(first_chunk) / statistics.median(saved):.0%} "
+              f"of whole-file synthesis")
+
+    asyncio.run(run())
+
+
+def bench_segments(runs):
+    """Sentence-segmented parallel synthesis against one request for the whole answer"""
+    import tts_cache
+    import tts_edge
+    from text_segments import split_sentences
+
+    segments = split_sentences(LONG_TEXT)
+    print(f"\n=== Segmented vs single request ({runs} runs, {len(segments)} segments) ===\n")
+    tts_cache.CACHE_ENABLED = False
+
+    async def measure(source):
+        first, total = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            got_first = None
+            async for _ in source(LONG_TEXT):
+                if got_first is None:
+                    got_first = time.perf_counter() - start
+            first.append(got_first)
+            total.append(time.perf_counter() - start)
+        return first, total
+
+    async def run():
+        single_first, single_total = await measure(tts_edge.stream_speech)
+        seg_first, seg_total = await measure(tts_edge.stream_segmented)
+        report('single, first chunk', single_first)
+        report('single, total', single_total)
+        report('segmented, first chunk', seg_first)
+        report('segmented, total', seg_total)
+        print(f"\nTotal wall time: {statistics.median(seg_total) / statistics.median(single_total):.0%} "
+              f"of the single request")
+
+    asyncio.run(run())
+
+
+def bench_startup(runs):
+    """Cold start of tts_edge.py (usage path) and of the synthesis import path"""
+    print(f"\n=== Cold start ({runs} runs) ===\n")
+
+    commands = {
+        'usage': [sys.executable, TTS_SCRIPT],
+        'import_synthesis_path': [sys.executable, '-c', 'import tts_edge, edge_tts'],
+    }
+    results = {}
+    for metric, command in commands.items():
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=SCRIPT_DIR,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - start)
+        report(metric, timings)
+        results[metric] = statistics.median(timings)
+
+    return check_baseline('startup', results, update='--update-baseline' in sys.argv)
+
+
+def bench_pack(runs):
+    """Short phrases synthesized one request each against packed requests"""
+    import tts_cache
+    import tts_edge
+
+    print(f"\n=== One-by-one vs packed short phrases ({runs} runs, "
+          f"{len(SHORT_PHRASES)} phrases) ===\n")
+    tts_cache.CACHE_ENABLED = False
+
+    async def one_by_one():
+        for phrase in SHORT_PHRASES:
+            await tts_edge.synthesize_bytes(phrase)
+
+    async def packed():
+        await tts_edge.synthesize_packed(SHORT_PHRASES)
+
+    async def run():
+        medians = {}
+        for label, path in (('one by one', one_by_one), ('packed', packed)):
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                await path()
+                timings.append(time.perf_counter() - start)
+            report(label, timings)
+            medians[label] = statistics.median(timings)
+
+        print()
+        for label, median in medians.items():
+            print(f"{label:<28} {len(SHORT_PHRASES) / median:8.1f} phrases/s")
+        print(f"\nPacked throughput: {medians['one by one'] / medians['packed']:.1f}x one by one")
+
+    asyncio.run(run())
+
+
+def bench_hedge(runs):
+    """Tail latency of unique syntheses without and with hedging at the rolling p95 TTFB"""
+    import tts_cache
+    import tts_edge
+    import tts_latency
+
+    print(f"\n=== Hedged requests ({runs} runs) ===\n")
+    tts_cache.CACHE_ENABLED = False
+
+    async def measure(label, hedge, window=()):
+        tts_latency.HEDGE_ENABLED = hedge
+        tracker = tts_latency.LatencyTracker()
+        tracker.ttfb.extend(window)  # p95 learned from the previous run
+        tts_latency._tracker = tracker
+        for i in range(runs):
+            await tts_edge.synthesize_bytes(f'{SAMPLE_TEXT} {label} {i}')
+        stats = tracker.stats()
+        print(f"{label:<28} ttfb p50={stats['ttfb_p50_ms']:8.1f}ms p95={stats['ttfb_p95_ms']:8.1f}ms "
+              f"p99={stats['ttfb_p99_ms']:8.1f}ms  total p99={stats['total_p99_ms']:8.1f}ms  "
+              f"hedges={stats['hedges']} won={stats['hedge_wins']}")
+        return tracker
+
+    async def run():
+        plain = await measure('no hedging', False)
+        await measure('hedging at p95 TTFB', True, plain.ttfb)
+
+    asyncio.run(run())
+
+
+def load_corpus():
+    """Return the benchmark corpus as a list of Arabic answers"""
+    paths = [CORPUS_FILE] if CORPUS_FILE else sorted(glob.glob(os.path.join(DOCS_DIR, '*.md')))
+    answers = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            answers.extend(line.strip() for line in f if re.search('[\u0621-\u064A]', line))
+    return answers
+
+
+def spelling_variant(text, rng):
+    """Respell text the way Gemini output varies: tatweel, diacritics, alef forms, digits"""
+    out = []
+    for c in text:
+        if c == 'ا' and rng.random() < 0.3:
+            c = rng.choice('أإآ')
+        elif c.isdigit() and c.isascii():
+            c = chr(0x0660 + int(c))
+        out.append(c)
+        if '\u0621' <= c <= '\u064A' and rng.random() < 0.15:
+            out.append(rng.choice(['\u0640', '\u064E', '\u064F', '\u0650', '\u0651', '\u0652']))
+    return '  '.join(''.join(out).split(' '))
+
+
+def canonicalize_regex(text):
+    """Reference implementation with per-rule regex passes, for comparison"""
+    import unicodedata
+
+    text = unicodedata.normalize('NFC', text)
+    text = re.sub('[\u0640\u064B-\u065F\u0670\u06D6-\u06ED\u200B-\u200F\u061C\uFEFF]', '', text)
+    text = re.sub('[\u0623\u0625\u0622\u0671]', '\u0627', text)
+    text = re.sub('[\u0660-\u0669\u06F0-\u06F9]', lambda m: str(int(m.group())), text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def bench_canon(runs):
+    """Arabic canonicalization speed on a corpus of answers, and how many cache keys it merges"""
+    from arabic_text import canonicalize
+
+    rng = random.Random(0)
+    answers = load_corpus()
+    corpus = answers + [spelling_variant(text, rng) for text in answers]
+    size = sum(len(text.encode('utf-8')) for text in corpus)
+    print(f"\n=== Arabic canonicalization ({runs} runs, {len(corpus)} answers, "
+          f"{size / 1e6:.2f} MB) ===\n")
+
+    medians = {}
+    for label, function in (('translate table', canonicalize), ('regex passes', canonicalize_regex)):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            for text in corpus:
+                function(text)
+            timings.append(time.perf_counter() - start)
+        report(label, timings)
+        medians[label] = statistics.median(timings)
+
+    print()
+    for label, median in medians.items():
+        print(f"{label:<28} {size / median / 1e6:8.1f} MB/s  "
+              f"{median / len(corpus) * 1e6:6.2f} us/answer")
+
+    plain = {' '.join(text.split()) for text in corpus}
+    canonical = {canonicalize(text) for text in corpus}
+    print(f"\nDistinct cache keys: {len(plain)} whitespace-normalized, "
+          f"{len(canonical)} canonical")
+
+
+def bench_bundle(runs):
+    """Random clip lookups in loose files (open + read) against one memory-mapped bundle"""
+    from audio_bundle import AudioBundle, BundleWriter
+
+    rng = random.Random(0)
+    directory = tempfile.mkdtemp(prefix='bench_bundle_')
+    bundle_path = os.path.join(directory, 'clips.ttsb')
+    clip_dir = os.path.join(directory, 'loose')
+    os.makedirs(clip_dir)
+    print(f"\n=== Audio bundle vs loose files ({runs} runs, {BUNDLE_CLIPS} clips, "
+          f"{BUNDLE_LOOKUPS} lookups per run) ===\n")
+
+    try:
+        # Clips of 0.5-10 s at 48 kbit/s, like cached answers and pre-rendered prompts
+        keys = [f'tts_{index:05d}' for index in range(BUNDLE_CLIPS)]
+        with BundleWriter(bundle_path) as writer:
+            for key in keys:
+                data = os.urandom(rng.randint(3000, 60000))
+                with open(os.path.join(clip_dir, key + '.mp3'), 'wb') as f:
+                    f.write(data)
+                writer.add(key, data)
+
+        loose_timings = []
+        bundle_timings = []
+        for _ in range(runs):
+            lookups = [rng.choice(keys) for _ in range(BUNDLE_LOOKUPS)]
+            start = time.perf_counter()
+            for key in lookups:
+                with open(os.path.join(clip_dir, key + '.mp3'), 'rb') as f:
+                    f.read()
+            loose_timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            with AudioBundle(bundle_path) as bundle:
+                for key in lookups:
+                    bundle.get(key).release()
+            bundle_timings.append(time.perf_counter() - start)
+
+        report('loose files', loose_timings)
+        report('bundle (open + lookups)', bundle_timings)
+        for label, timings in (('loose files', loose_timings), ('bundle', bundle_timings)):
+            print(f"{label:<28} {statistics.median(timings) / BUNDLE_LOOKUPS * 1e6:6.1f} us/lookup")
+
+        start = time.perf_counter()
+        entries = [entry.stat().st_size for entry in os.scandir(clip_dir)]
+        scan = time.perf_counter() - start
+        allocated = sum(os.stat(os.path.join(clip_dir, key + '.mp3')).st_blocks * 512 for key in keys)
+        print(f"\nIndexing the loose files (scandir + stat): {scan * 1000:.1f}ms for {len(entries)} files")
+        print(f"Disk usage: loose files {allocated / 1e6:.1f} MB allocated, "
+              f"bundle {os.path.getsize(bundle_path) / 1e6:.1f} MB")
+
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_trim(runs):
+    """Silence trimming and loudness normalization of decoded voice clips, chunk by chunk"""
+    import numpy as np
+    from mp3_index import FrameIndex
+    from pcm_audio import SOURCE_RATE, LoudnessNormalizer, SilenceTrimmer, block_db, decode_mp3_stream
+
+    async def decode(path):
+        async def chunks():
+            with open(path, 'rb') as f:
+                yield f.read()
+        return np.concatenate([samples async for samples in decode_mp3_stream(chunks())])
+
+    clips = {}
+    for path in sorted(glob.glob(os.path.join(SCRIPT_DIR, '..', 'assets', '*.mp3'))):
+        try:
+            samples = asyncio.run(decode(path))
+        except RuntimeError:
+            continue
+        if FrameIndex.from_file(path).frames and len(samples):
+            clips[os.path.basename(path)] = samples
+    print(f"\n=== PCM silence trimming and loudness normalization ({runs} runs, "
+          f"{len(clips)} clips, 2048-sample chunks) ===\n")
+
+    def speech_start(samples):
+        loud = np.flatnonzero(block_db(samples, SOURCE_RATE // 100) >= -50)
+        return loud[0] * 10 if len(loud) else 0
+
+    def speech_db(samples):
+        levels = block_db(samples, SOURCE_RATE // 100)
+        speech = samples[:len(levels) * (SOURCE_RATE // 100)].astype(np.float32)
+        speech = speech.reshape(len(levels), -1)[levels >= -50]
+        return 10 * np.log10(np.mean(speech * speech) / 32768 ** 2) if speech.size else float('nan')
+
+    for name, samples in clips.items():
+        timings = []
+        for _ in range(runs):
+            trimmer = SilenceTrimmer(SOURCE_RATE)
+            normalizer = LoudnessNormalizer(SOURCE_RATE)
+            start = time.perf_counter()
+            pieces = [normalizer.process(trimmer.process(chunk))
+                      for chunk in np.array_split(samples, max(1, len(samples) // 2048))]
+            pieces.append(normalizer.process(trimmer.flush()))
+            timings.append(time.perf_counter() - start)
+        output = np.concatenate(pieces)
+        print(f"{name:<28} {len(samples) / SOURCE_RATE * 1000:6.0f}ms -> "
+              f"{len(output) / SOURCE_RATE * 1000:6.0f}ms, speech starts at "
+              f"{speech_start(samples)}ms -> {speech_start(output)}ms, level {speech_db(samples):6.1f} -> "
+              f"{speech_db(output):6.1f} dBFS, {statistics.median(timings) * 1000:.2f}ms CPU")
+
+
+def bench_edge(runs):
+    """text_to_speech(), streaming and the --serve worker against the local stand-in service"""
+    import bench_edge
+
+    return bench_edge.bench_edge(runs)
+
+
+def bench_clients(runs):
+    """Google client setup per pipeline request: built every call against the shared GoogleClients"""
+    from google_clients import CREDENTIALS_PATH, GoogleClients
+
+    print(f"\n=== Google client setup per request ({runs} runs) ===\n")
+    if not os.path.exists(CREDENTIALS_PATH):
+        print(f"❌ Credentials file not found: {CREDENTIALS_PATH}")
+        return False
+
+    def setup(clients):
+        clients.speech_client()
+        clients.generative_model()
+
+    # Before: key file, token fetch, gRPC channel, aiplatform.init and model every request
+    per_request = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        clients = GoogleClients()
+        setup(clients)
+        per_request.append(time.perf_counter() - start)
+        clients.close()
+
+    shared = GoogleClients()
+    start = time.perf_counter()
+    setup(shared)
+    first = time.perf_counter() - start
+    reused = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        setup(shared)
+        reused.append(time.perf_counter() - start)
+    shared.close()
+
+    report('new clients per request', per_request)
+    report('shared clients', reused)
+    saved = statistics.median(per_request) - statistics.median(reused)
+    print(f"\nShared context: first request {first * 1000:.1f}ms, then "
+          f"{saved * 1000:.1f}ms saved per request ({shared.token_refreshes} token fetch "
+          f"instead of {runs})")
+
+
+def bench_vad(runs):
+    """Speech-to-Text uploads of the assets clips: as they are against VAD-trimmed segments"""
+    import numpy as np
+    from google_clients import CREDENTIALS_PATH, get_google_clients
+    from speech_stream import SAMPLE_RATE
+    from voice_activity import load_pcm, plan_upload, recognize_file, recognize_uploads
+
+    directory = tempfile.mkdtemp(prefix='bench_vad_')
+    try:
+        clips = []
+        for path in sorted(glob.glob(os.path.join(SCRIPT_DIR, '..', 'assets', '*'))):
+            try:
+                samples = load_pcm(path)
+            except RuntimeError:
+                continue
+            if len(samples):
+                clips.append((path, samples))
+        # A long recording: every clip with 2 s of room noise after it, repeated past
+        # the recognize() limit (as is, it would need the asynchronous API)
+        noise = np.random.default_rng(0).normal(0, 30, 2 * SAMPLE_RATE).astype(np.int16)
+        joined = np.concatenate([part for _, samples in clips for part in (samples, noise)])
+        long_path = os.path.join(directory, 'long_recording.pcm')
+        np.tile(joined, int(np.ceil(150 * SAMPLE_RATE / len(joined)))).tofile(long_path)
+        clips.append((long_path, None))
+
+        client = None
+        try:
+            if os.path.exists(CREDENTIALS_PATH):
+                client = get_google_clients().speech_client()
+        except ImportError:
+            pass
+        print(f"\n=== Speech-to-Text uploads ({runs} runs, {len(clips)} clips"
+              f"{'' if client else ', no credentials: STT latency skipped'}) ===\n")
+
+        total_before = total_after = 0
+        for path, _ in clips:
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                uploads, stats = plan_upload(path)
+                timings.append(time.perf_counter() - start)
+            before = os.path.getsize(path)
+            after = sum(len(content) for content, _ in uploads)
+            total_before += before
+            total_after += after
+            print(f"{os.path.basename(path):<26} {stats['duration']:6.2f}s, speech "
+                  f"{stats['speech_ratio']:4.0%}, {'as is' if stats['as_is'] else 'FLAC'} x"
+                  f"{len(uploads)}, {before:>9,} -> {after:>9,} bytes ({after / before:4.0%}), "
+                  f"decode + VAD + encode {statistics.median(timings) * 1000:.1f}ms")
+
+            if client:
+                as_is, trimmed = [], []
+                for _ in range(runs):
+                    if stats['duration'] <= 60:
+                        start = time.perf_counter()
+                        recognize_file(client, path)
+                        as_is.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    recognize_uploads(client, plan_upload(path)[0])
+                    trimmed.append(time.perf_counter() - start)
+                if as_is:
+                    report('  STT as is', as_is)
+                report('  STT with VAD', trimmed)
+
+        print(f"\nTotal upload: {total_before:,} -> {total_after:,} bytes ({total_after / total_before:.0%})")
+    finally:
+        shutil.rmtree(directory)
+
+
+BENCHMARKS = {
+    'worker': bench_worker,
+    'cache': bench_cache,
+    'stream': bench_stream,
+    'segments': bench_segments,
+    'startup': bench_startup,
+    'pack': bench_pack,
+    'hedge': bench_hedge,
+    'canon': bench_canon,
+    'bundle': bench_bundle,
+    'trim': bench_trim,
+    'edge': bench_edge,
+    'clients': bench_clients,
+    'vad': bench_vad,
+}
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Usage:")
+        print(f"  python bench_tts.py <{'|'.join(BENCHMARKS)}> [runs]")
+        sys.exit(1)
+
+    numbers = [arg for arg in sys.argv[2:] if arg.isdigit()]
+    runs = int(numbers[0]) if numbers else 10
+    if BENCHMARKS[sys.argv[1]](runs) is False:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
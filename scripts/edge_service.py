@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+edge-tts service endpoint
+edge_tts is imported lazily (it pulls in aiohttp, see startup_profile.py).
+TTS_EDGE_URL points it at another service instead of Microsoft's, such as
+the local stand-in of fake_edge_tts.py used by the benchmarks.
+"""
+
+import os
+import sys
+
+# Environment configuration, e.g. TTS_EDGE_URL=http://127.0.0.1:8765
+EDGE_URL = os.getenv('TTS_EDGE_URL', '').rstrip('/')
+
+# Paths of the service, as in edge_tts.constants
+SYNTHESIZE_PATH = '/consumer/speech/synthesize/readaloud/edge/v1'
+VOICE_LIST_PATH = '/consumer/speech/synthesize/readaloud/voices/list'
+
+
+def import_edge_tts():
+    """Import edge_tts, pointed at TTS_EDGE_URL when it is set"""
+    import edge_tts
+
+    if EDGE_URL:
+        from edge_tts.constants import TRUSTED_CLIENT_TOKEN
+
+        # edge_tts 6.x copies the URLs into its modules at import time
+        ws_url = 'ws' + EDGE_URL[len('http'):] if EDGE_URL.startswith('http') else EDGE_URL
+        http_url = 'http' + EDGE_URL[len('ws'):] if EDGE_URL.startswith('ws') else EDGE_URL
+        sys.modules['edge_tts.communicate'].WSS_URL = (
+            f"{ws_url}{SYNTHESIZE_PATH}?TrustedClientToken={TRUSTED_CLIENT_TOKEN}")
+        sys.modules['edge_tts.list_voices'].VOICE_LIST = (
+            f"{http_url}{VOICE_LIST_PATH}?trustedclienttoken={TRUSTED_CLIENT_TOKEN}")
+    return edge_tts
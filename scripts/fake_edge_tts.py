@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local edge-tts stand-in server
+Speaks the websocket protocol of Microsoft's Edge read-aloud service (as
+used by edge_tts 6.x) and answers every synthesis with canned MP3 audio
+from assets/, so TTS performance can be measured without the network.
+Point tts_edge.py at it with TTS_EDGE_URL (see edge_service.py).
+
+Audio is the canned clip repeated to last WORD_MS per word, sent in
+binary messages of --chunk-size bytes after a first-byte delay of
+--latency plus up to --jitter seconds, then at --speed times real time.
+WordBoundary metadata is sent for every word. --error-rate fails that
+share of the requests: 'refuse' closes the socket before any audio,
+'drop' closes it after the first chunk and 'http' rejects the handshake
+with HTTP 503.
+
+Usage:
+    python fake_edge_tts.py [--port 8765] [--chunk-size 4096] [--latency 0.1]
+                            [--jitter 0.05] [--speed 10] [--error-rate 0]
+                            [--error-mode refuse|drop|http] [--audio FILE]
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import uuid
+from xml.sax.saxutils import unescape
+
+from aiohttp import WSMsgType, web
+
+from edge_service import SYNTHESIZE_PATH, VOICE_LIST_PATH
+from mp3_frames import segment_frames
+from voice_catalog import BUILTIN_VOICES
+
+# Force UTF-8 encoding for stdout/stderr on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_AUDIO = os.path.join(SCRIPT_DIR, '..', 'assets', 'hello_eg.mp3')
+
+DEFAULTS = {
+    'port': 8765,
+    'chunk-size': 4096,
+    'latency': 0.1,
+    'jitter': 0.05,
+    'speed': 10.0,
+    'error-rate': 0.0,
+    'error-mode': 'refuse',
+    'audio': DEFAULT_AUDIO,
+}
+ERROR_MODES = ('refuse', 'drop', 'http')
+
+WORD_MS = 350         # audio length per word of the request
+TICKS_PER_MS = 10000  # WordBoundary offsets are in 100 ns units
+FRAME_MS = 24         # edge-tts MP3 frames (24 kHz, 576 samples)
+
+VOICE_NAME = re.compile(r"<voice name='([^']*)'>")
+PROSODY_TEXT = re.compile(r'<prosody[^>]*>(.*)</prosody>', re.S)
+LONG_VOICE_NAME = re.compile(r'^Microsoft Server Speech Text to Speech Voice \((\w+-\w+), (\w+)\)$')
+
+
+def message(request_id, path, body, content_type='application/json; charset=utf-8'):
+    """Encode a text message of the service"""
+    return (f"X-RequestId:{request_id}\r\nContent-Type:{content_type}\r\n"
+            f"Path:{path}\r\n\r\n{body}")
+
+
+def audio_message(request_id, data):
+    """Encode a binary audio message: 2-byte header length, header, MP3 data"""
+    header = f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n".encode()
+    return len(header).to_bytes(2, 'big') + header + data
+
+
+def parse_headers(data):
+    """Return the headers and body of a text message"""
+    head, _, body = data.partition('\r\n\r\n')
+    headers = dict(line.split(':', 1) for line in head.split('\r\n') if ':' in line)
+    return headers, body
+
+
+def short_voice_name(name):
+    """'Microsoft Server Speech Text to Speech Voice (ar-EG, SalmaNeural)' -> 'ar-EG-SalmaNeural'"""
+    match = LONG_VOICE_NAME.match(name)
+    return f"{match.group(1)}-{match.group(2)}" if match else name
+
+
+class FakeEdgeService:
+    """Request handlers and counters of the stand-in service"""
+
+    def __init__(self, options):
+        self.options = options
+        self.voices = {name for name, _ in BUILTIN_VOICES}
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+        self.max_active = 0
+        with open(options['audio'], 'rb') as f:
+            clip = f.read()
+        frames, header = segment_frames(clip)
+        if header is None:
+            raise ValueError(f"{options['audio']} holds no MP3 frames")
+        self.frames = [clip[offset:offset + length] for offset, length in frames]
+
+    def render(self, words):
+        """Return the canned audio for a request of n words"""
+        count = max(1, -(-max(words, 1) * WORD_MS // FRAME_MS))
+        return b''.join(self.frames[i % len(self.frames)] for i in range(count))
+
+    async def voice_list(self, request):
+        return web.json_response([
+            {
+                'Name': f"Microsoft Server Speech Text to Speech Voice "
+                        f"({'-'.join(name.split('-')[:2])}, {name.split('-', 2)[2]})",
+                'ShortName': name,
+                'Gender': gender,
+                'Locale': '-'.join(name.split('-')[:2]),
+                'SuggestedCodec': 'audio-24khz-48kbitrate-mono-mp3',
+                'FriendlyName': name,
+                'Status': 'GA',
+            }
+            for name, gender in BUILTIN_VOICES
+        ])
+
+    async def stats(self, request):
+        return web.json_response({
+            'requests': self.requests,
+            'errors': self.errors,
+            'active': self.active,
+            'max_active': self.max_active,
+        })
+
+    async def synthesize(self, request):
+        self.requests += 1
+        error = random.random() < self.options['error-rate'] and self.options['error-mode']
+        if error:
+            self.errors += 1
+        if error == 'http':
+            raise web.HTTPServiceUnavailable()
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            async for received in ws:
+                if received.type != WSMsgType.TEXT:
+                    break
+                headers, body = parse_headers(received.data)
+                if headers.get('Path') == 'ssml':
+                    await self.answer(ws, headers.get('X-RequestId', uuid.uuid4().hex), body, error)
+                    break
+        finally:
+            self.active -= 1
+            await ws.close()
+        return ws
+
+    async def answer(self, ws, request_id, ssml, error):
+        """Stream the turn of one SSML request"""
+        voice = VOICE_NAME.search(ssml)
+        text = PROSODY_TEXT.search(ssml)
+        if not voice or not text or short_voice_name(voice.group(1)) not in self.voices:
+            return  # the service closes the socket without audio
+        options = self.options
+        await asyncio.sleep(options['latency'] + random.uniform(0, options['jitter']))
+        if error == 'refuse':
+            return
+
+        words = unescape(text.group(1), {'&apos;': "'", '&quot;': '"'}).split()
+        audio = self.render(len(words))
+        await ws.send_str(message(request_id, 'turn.start', '{"context":{"serviceTag":"fake"}}'))
+        await ws.send_str(message(request_id, 'response', '{"context":{"serviceTag":"fake"}}'))
+        metadata = [
+            {'Type': 'WordBoundary', 'Data': {
+                'Offset': index * WORD_MS * TICKS_PER_MS,
+                'Duration': (WORD_MS - 50) * TICKS_PER_MS,
+                'text': {'Text': word, 'Length': len(word), 'BoundaryType': 'WordBoundary'},
+            }}
+            for index, word in enumerate(words)
+        ]
+        await ws.send_str(message(request_id, 'audio.metadata', json.dumps({'Metadata': metadata})))
+
+        chunk_size = options['chunk-size']
+        chunk_seconds = chunk_size / len(self.frames[0]) * FRAME_MS / 1000
+        for offset in range(0, len(audio), chunk_size):
+            if offset:
+                await asyncio.sleep(chunk_seconds / options['speed'])
+            await ws.send_bytes(audio_message(request_id, audio[offset:offset + chunk_size]))
+            if error == 'drop':
+                return
+        await ws.send_str(message(request_id, 'turn.end', '{}'))
+
+
+def make_app(options):
+    """Return the aiohttp application of the stand-in service"""
+    service = FakeEdgeService(options)
+    app = web.Application()
+    app.router.add_get(SYNTHESIZE_PATH, service.synthesize)
+    app.router.add_get(VOICE_LIST_PATH, service.voice_list)
+    app.router.add_get('/stats', service.stats)
+    app['service'] = service
+    return app
+
+
+def parse_options(args):
+    """Parse --name value pairs over DEFAULTS (values take the type of the default)"""
+    options = dict(DEFAULTS)
+    while args:
+        name = args.pop(0)[2:]
+        if name not in options or not args:
+            raise ValueError(f"Unknown option or missing value: --{name}")
+        options[name] = type(DEFAULTS[name])(args.pop(0))
+    if options['error-mode'] not in ERROR_MODES:
+        raise ValueError(f"--error-mode must be one of {', '.join(ERROR_MODES)}")
+    return options
+
+
+async def run_server(options):
+    """Serve until cancelled; prints the URL line the benchmarks wait for"""
+    runner = web.AppRunner(make_app(options), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', options['port'])
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    print(f"URL: http://127.0.0.1:{port}", flush=True)
+    print(f"[FAKE-TTS] Serving {os.path.basename(options['audio'])} "
+          f"(chunk {options['chunk-size']} bytes, latency {options['latency']}s "
+          f"+ {options['jitter']}s jitter, {options['speed']}x real time, "
+          f"error rate {options['error-rate']} {options['error-mode']})", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    """Main function"""
+    try:
+        options = parse_options(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        print("Usage:")
+        print("  python fake_edge_tts.py [--port 8765] [--chunk-size 4096] [--latency 0.1]")
+        print("                          [--jitter 0.05] [--speed 10] [--error-rate 0]")
+        print("                          [--error-mode refuse|drop|http] [--audio FILE]")
+        sys.exit(1)
+
+    try:
+        asyncio.run(run_server(options))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared Google Cloud clients
+Loads the service-account credentials once and keeps one SpeechClient and
+one GenerativeModel per model name for the whole process, so requests
+reuse warm gRPC channels and one OAuth token instead of reading the key
+file, opening channels and fetching a token every time.
+
+The token is refreshed before it expires: by a background thread
+TOKEN_REFRESH_MARGIN seconds ahead, and by ensure_token() when a client
+is handed out, so no request waits for a token fetch. A refresh runs
+outside the client lock and only callers whose token has already expired
+wait for it. All methods are safe to call from concurrent worker threads.
+
+Requires google-cloud-speech and google-cloud-aiplatform.
+"""
+
+import datetime
+import os
+import threading
+
+# Google Cloud configuration
+PROJECT_ID = os.getenv('GOOGLE_CLOUD_PROJECT_ID', 'refined-circuit-480414-c1')
+LOCATION = os.getenv('GOOGLE_CLOUD_REGION', 'us-central1')
+MODEL = 'gemini-2.0-flash-exp'
+CREDENTIALS_PATH = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'ser_api.json')
+SCOPES = ['https://www.googleapis.com/auth/cloud-platform']
+
+# Refresh the token this long before it expires (google-auth itself only
+# refreshes inside a request, 3m45s ahead)
+TOKEN_REFRESH_MARGIN = 300  # seconds
+REFRESH_RETRY_DELAY = 30  # seconds before retrying a failed background refresh
+
+
+def seconds_left(credentials):
+    """Seconds until the token of credentials expires (0 without a token)"""
+    if not credentials.token or credentials.expiry is None:
+        return 0.0
+    expiry = credentials.expiry
+    if expiry.tzinfo is None:  # google-auth uses naive UTC datetimes
+        expiry = expiry.replace(tzinfo=datetime.timezone.utc)
+    return (expiry - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+
+
+class GoogleClients:
+    """
+    Long-lived credentials and clients, created on first use
+
+    Args:
+        credentials_path: Service-account JSON key file
+        project: Vertex AI project
+        location: Vertex AI region
+    """
+
+    def __init__(self, credentials_path=CREDENTIALS_PATH, project=PROJECT_ID, location=LOCATION):
+        self.credentials_path = credentials_path
+        self.project = project
+        self.location = location
+        self.token_refreshes = 0
+        self._credentials = None
+        self._speech_client = None
+        self._models = {}
+        self._vertex_ready = False
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()  # one token fetch at a time
+        self._closed = threading.Event()
+        self._refresher = None
+
+    @property
+    def credentials(self):
+        """The shared service-account credentials (loaded once)"""
+        with self._lock:
+            if self._credentials is None:
+                from google.oauth2 import service_account
+
+                self._credentials = service_account.Credentials.from_service_account_file(
+                    self.credentials_path, scopes=SCOPES)
+            return self._credentials
+
+    def ensure_token(self):
+        """
+        Refresh the token if it is missing or expires within TOKEN_REFRESH_MARGIN
+
+        The fetch holds only the refresh lock, so other threads keep getting
+        clients meanwhile; while the current token is still valid they use
+        it instead of waiting for the new one.
+
+        Returns:
+            True if a refresh was made
+        """
+        credentials = self.credentials
+        if seconds_left(credentials) > TOKEN_REFRESH_MARGIN:
+            return False
+        if not self._refresh_lock.acquire(blocking=seconds_left(credentials) <= 0):
+            return False  # another thread is refreshing a token that still works
+        try:
+            # Another thread may have refreshed while this one waited
+            if seconds_left(credentials) > TOKEN_REFRESH_MARGIN:
+                return False
+            from google.auth.transport.requests import Request
+
+            credentials.refresh(Request())
+            with self._lock:
+                self.token_refreshes += 1
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def speech_client(self):
+        """Return the shared google.cloud.speech.SpeechClient"""
+        self.ensure_token()
+        with self._lock:
+            if self._speech_client is None:
+                from google.cloud import speech
+
+                self._speech_client = speech.SpeechClient(credentials=self.credentials)
+            return self._speech_client
+
+    def generative_model(self, name=MODEL):
+        """Return the shared vertexai GenerativeModel of a model name"""
+        self.ensure_token()
+        with self._lock:
+            if not self._vertex_ready:
+                from google.cloud import aiplatform
+
+                aiplatform.init(project=self.project, location=self.location,
+                                credentials=self.credentials)
+                self._vertex_ready = True
+            if name not in self._models:
+                # Import after initialization
+                from vertexai.generative_models import GenerativeModel
+
+                self._models[name] = GenerativeModel(name)
+            return self._models[name]
+
+    def start_refresher(self):
+        """Start the background thread that refreshes the token ahead of expiry"""
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop,
+                                                   name='google-token-refresh', daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._closed.is_set():
+            try:
+                self.ensure_token()
+                delay = seconds_left(self.credentials) - TOKEN_REFRESH_MARGIN
+            except Exception as e:
+                print(f"⚠️  Token refresh failed: {e}")
+                delay = REFRESH_RETRY_DELAY
+            self._closed.wait(max(delay, 1))
+
+    def close(self):
+        """Stop the refresher and close the gRPC channel of the speech client"""
+        self._closed.set()
+        with self._lock:
+            if self._speech_client is not None:
+                self._speech_client.transport.close()
+                self._speech_client = None
+
+
+_clients = None
+_clients_lock = threading.Lock()
+
+
+def get_google_clients():
+    """Return the process-wide GoogleClients (token refresher started)"""
+    global _clients
+    with _clients_lock:
+        if _clients is None:
+            _clients = GoogleClients()
+            _clients.start_refresher()
+        return _clients
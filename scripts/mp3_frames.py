@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MP3 frame parser and gapless concatenation
+Joins MP3 segments (sentences synthesized separately, cache entries) into
+one valid stream at frame boundaries, without decoding: ID3 tags and
+Xing/Info/VBRI header frames are dropped, and whole frames of encoder delay
+and padding recorded in a LAME tag are trimmed at every join.
+
+Frames are sliced out of memoryviews (of bytes or mmap'ed files) and
+written directly, so no segment is copied into a temporary buffer.
+
+Usage:
+    python mp3_frames.py output.mp3 part1.mp3 part2.mp3 [...]
+"""
+
+import functools
+import mmap
+import os
+import sys
+from collections import namedtuple
+
+# Force UTF-8 encoding for stdout/stderr on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+FrameHeader = namedtuple(
+    'FrameHeader',
+    ['version', 'layer', 'bitrate', 'sample_rate', 'channels', 'samples', 'length', 'crc']
+)
+
+# Bitrates in kbit/s by (MPEG-1?, layer) and bitrate index 1-14
+BITRATES = {
+    (True, 1): (32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Sample rates by version and sample rate index 0-2
+SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+
+# Version bits 00 / 10 / 11 (01 is reserved) and layer bits 11 / 10 / 01
+VERSIONS = {0: 2.5, 2: 2, 3: 1}
+LAYERS = {3: 1, 2: 2, 1: 3}
+
+ID3V2_HEADER = 10
+ID3V1_SIZE = 128
+APE_FOOTER = 32
+
+# Offset of the encoder delay / padding field inside a LAME tag
+LAME_DELAY_OFFSET = 21
+
+
+def parse_header(data, offset):
+    """
+    Parse the 4-byte frame header at offset
+
+    Returns:
+        FrameHeader, or None if there is no valid frame header there
+    """
+    if offset + 4 > len(data):
+        return None
+    return decode_header(bytes(data[offset:offset + 4]))
+
+
+@functools.lru_cache(maxsize=256)
+def decode_header(raw):
+    """Decode 4 header bytes (cached: a stream repeats a handful of headers)"""
+    b0, b1, b2, b3 = raw
+    if b0 != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = VERSIONS.get((b1 >> 3) & 3)
+    layer = LAYERS.get((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values, or free format (not supported)
+
+    bitrate = BITRATES[(version == 1, layer)][bitrate_index - 1] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    channels = 1 if b3 >> 6 == 3 else 2
+    return FrameHeader(version, layer, bitrate, sample_rate, channels, samples, length,
+                       not b1 & 1)
+
+
+def audio_start(data):
+    """Return the offset of the first byte after any ID3v2 tags"""
+    offset = 0
+    while data[offset:offset + 3] == b'ID3' and len(data) >= offset + ID3V2_HEADER:
+        size = 0
+        for byte in data[offset + 6:offset + 10]:
+            size = size << 7 | byte & 0x7F  # synchsafe integer
+        footer = ID3V2_HEADER if data[offset + 5] & 0x10 else 0
+        offset += ID3V2_HEADER + size + footer
+    return min(offset, len(data))
+
+
+def audio_end(data):
+    """Return the offset where trailing ID3v1 / APEv2 tags start"""
+    end = len(data)
+    if end >= ID3V1_SIZE and data[end - ID3V1_SIZE:end - ID3V1_SIZE + 3] == b'TAG':
+        end -= ID3V1_SIZE
+    if end >= APE_FOOTER and data[end - APE_FOOTER:end - APE_FOOTER + 8] == b'APETAGEX':
+        size = int.from_bytes(data[end - APE_FOOTER + 12:end - APE_FOOTER + 16], 'little')
+        has_header = data[end - APE_FOOTER + 23] & 0x80
+        end -= size + (APE_FOOTER if has_header else 0)
+    return max(end, 0)
+
+
+def iter_frames(data):
+    """
+    Yield (offset, FrameHeader) for every audio frame of an MP3 buffer
+
+    Bytes that are not part of a frame (garbage, truncated frames) are
+    skipped by searching for the next header whose successor also parses;
+    only a frame following a valid frame may end the buffer.
+    """
+    view = memoryview(data)
+    search = data if hasattr(data, 'find') else bytes(view)  # bytes, bytearray, mmap
+    offset = audio_start(view)
+    end = audio_end(view)
+    synced = False
+    header = parse_header(view, offset)
+    while offset + 4 <= end:
+        if header is not None and offset + header.length <= end:
+            following = offset + header.length
+            successor = parse_header(view, following) if following + 4 <= end else None
+            if ((synced and following + 4 > end) or successor is not None
+                    and successor[:2] == header[:2] and successor.sample_rate == header.sample_rate):
+                synced = True
+                yield offset, header
+                offset, header = following, successor
+                continue
+        synced = False
+        offset = search.find(b'\xff', offset + 1, end)
+        if offset < 0:
+            return
+        header = parse_header(view, offset)
+
+
+def side_info_size(header):
+    """Size of the layer III side information following the header (and CRC)"""
+    if header.version == 1:
+        return 17 if header.channels == 1 else 32
+    return 9 if header.channels == 1 else 17
+
+
+def main_data_begin(data, offset, header):
+    """Return how many bytes of earlier frames a layer III frame borrows (bit reservoir)"""
+    start = offset + 4 + (2 if header.crc else 0)
+    if header.version == 1:
+        return data[start] << 1 | data[start + 1] >> 7
+    return data[start]
+
+
+def read_info_tag(data, offset, header):
+    """
+    Recognize a Xing / Info / VBRI header frame
+
+    Returns:
+        None for an audio frame, else (encoder_delay, padding) in samples
+        from its LAME tag ((0, 0) when there is none)
+    """
+    if header.layer != 3:
+        return None
+    tag_offset = offset + 4 + (2 if header.crc else 0) + side_info_size(header)
+    tag = bytes(data[tag_offset:tag_offset + 4])
+    if bytes(data[offset + 36:offset + 40]) == b'VBRI':
+        return 0, 0
+    if tag not in (b'Xing', b'Info'):
+        return None
+
+    flags = int.from_bytes(data[tag_offset + 4:tag_offset + 8], 'big')
+    lame = tag_offset + 8
+    lame += 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+    field = lame + LAME_DELAY_OFFSET
+    encoder = bytes(data[lame:lame + 4])  # 'LAME', or 'Lavc' for ffmpeg's libmp3lame
+    if not encoder.isalpha() or field + 3 > offset + header.length:
+        return 0, 0
+    b0, b1, b2 = data[field:field + 3]
+    return b0 << 4 | b1 >> 4, (b1 & 0x0F) << 8 | b2
+
+
+def segment_frames(data):
+    """
+    Return the audio frames of one segment, encoder delay and padding trimmed
+
+    Leading frames made only of encoder delay are dropped when the first
+    frame kept does not use the bit reservoir (so it decodes on its own);
+    trailing frames made only of padding are always dropped.
+
+    Returns:
+        (frames, first_header) where frames is a list of (offset, length)
+    """
+    frames = list(iter_frames(data))
+    if not frames:
+        return [], None
+    delay = padding = 0
+    info = read_info_tag(data, *frames[0])
+    if info is not None:
+        delay, padding = info
+        frames = frames[1:]
+    if not frames:
+        return [], None
+
+    header = frames[0][1]
+    lead = min(delay // header.samples, len(frames) - 1)
+    if lead and header.layer == 3 and main_data_begin(data, *frames[lead]) != 0:
+        lead = 0
+    tail = min(padding // header.samples, len(frames) - lead - 1)
+    frames = frames[lead:len(frames) - tail]
+    return [(offset, frame.length) for offset, frame in frames], header
+
+
+class SegmentReader:
+    """
+    Incremental segment_frames() for one segment that arrives in chunks
+
+    feed() returns the bytes of the audio frames completed by a chunk, with
+    ID3 tags and the Xing/Info frame dropped. Frames are held while they
+    may still be encoder delay (at the start) or padding (at the end), as
+    many as the LAME tag says, so none are held without one; finish()
+    returns the rest. The output is that of segment_frames() on the whole
+    segment.
+
+    Attributes:
+        header: FrameHeader of the first audio frame (None before it)
+        samples: Samples per channel returned so far
+    """
+
+    def __init__(self):
+        self.header = None
+        self.samples = 0
+        self._data = bytearray()
+        self._tags_skipped = False
+        self._resync = False  # after garbage the last frame may not end the segment
+        self._info_checked = False
+        self._delay_frames = 0
+        self._padding_frames = 0
+        self._lead_decided = False
+        self._held = []  # (frame bytes, header) not returned yet
+        self._released = 0
+
+    def feed(self, chunk):
+        """Add MP3 bytes and return the bytes of the frames they complete"""
+        self._data += chunk
+        self._parse()
+        if not self._lead_decided:
+            return b''
+        return self._release(len(self._held) - self._padding_frames)
+
+    def finish(self):
+        """Return the frames still held that are neither encoder delay nor padding"""
+        self._parse(final=True)
+        self._decide_lead(len(self._held) - 1)
+        tail = min(self._padding_frames, self._released + len(self._held) - 1)
+        out = self._release(len(self._held) - max(tail, 0))
+        self._held, self._data = [], bytearray()
+        return out
+
+    def _parse(self, final=False):
+        """Accept every complete frame of the buffer"""
+        while True:
+            frame = self._next_frame(final)
+            if frame is None:
+                return
+            self._accept(*frame)
+
+    def _next_frame(self, final):
+        """
+        Cut the next frame out of the buffer, or return None to wait for more
+        data. As in iter_frames(), a frame counts once the header of the next
+        one parses; only a frame right after a valid one may end the segment.
+        """
+        data = self._data
+        if not self._tags_skipped:
+            if len(data) < ID3V2_HEADER and not final:
+                return None
+            start = audio_start(data)
+            if not final and (start == len(data) or data[start:start + 3] == b'ID3'):
+                return None  # a tag is still arriving
+            del data[:start]
+            self._tags_skipped = True
+        if final:
+            del data[audio_end(data):]
+
+        while len(data) >= 4:
+            header = parse_header(data, 0)
+            if header is not None and (header.length + 4 <= len(data) or final and header.length <= len(data)):
+                successor = parse_header(data, header.length)
+                if (successor is None and final and not self._resync and len(data) < header.length + 4
+                        or successor is not None and successor[:2] == header[:2]
+                        and successor.sample_rate == header.sample_rate):
+                    self._resync = False
+                    frame = bytes(data[:header.length])
+                    del data[:header.length]
+                    return frame, header
+                if not final and bytes(data[header.length:header.length + 3]) in (b'TAG', b'APE'):
+                    return None  # maybe trailing tags, trimmed by finish()
+            elif header is not None and not final:
+                return None  # wait for the rest of the frame and the next header
+            # Not a frame: skip to the next possible frame header
+            self._resync = True
+            next_sync = data.find(b'\xff', 1)
+            del data[:next_sync if next_sync > 0 else len(data)]
+        return None
+
+    def _accept(self, frame, header):
+        """Drop the Xing/Info frame, hold every other frame"""
+        if not self._info_checked:
+            self._info_checked = True
+            info = read_info_tag(frame, 0, header)
+            if info is not None:
+                delay, padding = info
+                self._delay_frames = delay // header.samples
+                self._padding_frames = padding // header.samples
+                return
+        if self.header is None:
+            self.header = header
+        self._held.append((frame, header))
+        if len(self._held) > self._delay_frames:
+            self._decide_lead(self._delay_frames)
+
+    def _decide_lead(self, limit):
+        """Drop the encoder delay frames unless the first frame kept needs them (bit reservoir)"""
+        if self._lead_decided or not self._held:
+            return
+        self._lead_decided = True
+        lead = min(self._delay_frames, limit)
+        frame, header = self._held[lead]
+        if lead and not (header.layer == 3 and main_data_begin(frame, 0, header) != 0):
+            del self._held[:lead]
+
+    def _release(self, count):
+        """Return the bytes of the first count held frames"""
+        if count <= 0:
+            return b''
+        ready, self._held = self._held[:count], self._held[count:]
+        self._released += len(ready)
+        self.samples += sum(header.samples for _, header in ready)
+        return b''.join(frame for frame, _ in ready)
+
+
+def concat_segments(segments, write):
+    """
+    Write MP3 segments as one stream
+
+    Args:
+        segments: Buffers (bytes, bytearray, mmap) holding MP3 data
+        write: Function receiving memoryview slices of the output, in order
+
+    Returns:
+        (frames, seconds) written
+
+    Raises:
+        ValueError: If the segments differ in sample rate or channel count
+    """
+    format_ = None
+    frame_count = 0
+    samples = 0
+    for data in segments:
+        view = memoryview(data)
+        frames, header = segment_frames(data)
+        if header is None:
+            continue
+        if format_ is None:
+            format_ = (header.sample_rate, header.channels)
+        elif (header.sample_rate, header.channels) != format_:
+            raise ValueError(f"Cannot join {header.sample_rate} Hz / {header.channels} ch audio "
+                             f"to {format_[0]} Hz / {format_[1]} ch audio")
+
+        # Contiguous frames are written as one slice
+        run_start = run_end = None
+        for offset, length in frames:
+            if offset != run_end:
+                if run_start is not None:
+                    write(view[run_start:run_end])
+                run_start = offset
+            run_end = offset + length
+        if run_start is not None:
+            write(view[run_start:run_end])
+        frame_count += len(frames)
+        samples += len(frames) * header.samples
+
+    return frame_count, samples / format_[0] if format_ else 0.0
+
+
+def join_files(input_paths, output_path):
+    """
+    Join MP3 files into output_path (written atomically)
+
+    Inputs are memory-mapped, so they are never read into memory as a whole.
+
+    Returns:
+        (frames, seconds) written
+    """
+    maps = []
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        for path in input_paths:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size:
+                    maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        with open(temp_path, 'wb') as out:
+            result = concat_segments(maps, out.write)
+        os.replace(temp_path, output_path)
+        return result
+    finally:
+        for m in maps:
+            m.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 3:
+        print("Usage:")
+        print("  python mp3_frames.py output.mp3 part1.mp3 part2.mp3 [...]")
+        sys.exit(1)
+
+    try:
+        frames, seconds = join_files(sys.argv[2:], sys.argv[1])
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    print(f"✅ Joined {len(sys.argv) - 2} files: {frames} frames, {seconds:.2f}s -> {sys.argv[1]}")
+
+
+if __name__ == '__main__':
+    main()
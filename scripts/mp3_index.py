@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MP3 frame index and seek table
+Scans the frame headers of an MP3 file (see mp3_frames.py) to get its exact
+duration and average bitrate without decoding, and keeps a compact seek
+table - two parallel arrays of frame byte offsets and start times in
+samples - for byte-range seeking. Files are memory-mapped, so files of
+hundreds of MB are scanned without being read into memory.
+
+Usage:
+    python mp3_index.py file.mp3 [...] [--seek SECONDS]
+"""
+
+import bisect
+import mmap
+import os
+import sys
+from array import array
+
+from mp3_frames import iter_frames, read_info_tag
+
+# Force UTF-8 encoding for stdout/stderr on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+
+class FrameIndex:
+    """
+    Seek table of one MP3 stream
+
+    offsets[i] is the byte offset of audio frame i and timestamps[i] the
+    sample at which it starts; the Xing/Info header frame is not indexed.
+    """
+
+    def __init__(self, offsets, timestamps, sample_rate, audio_bytes, end_sample):
+        self.offsets = offsets
+        self.timestamps = timestamps
+        self.sample_rate = sample_rate
+        self.audio_bytes = audio_bytes
+        self.end_sample = end_sample
+
+    @classmethod
+    def from_buffer(cls, data):
+        """Index an MP3 held in a buffer (bytes, bytearray, mmap)"""
+        offsets = array('Q' if len(data) >= 1 << 32 else 'I')
+        timestamps = array('Q')
+        sample_rate = 0
+        audio_bytes = 0
+        sample = 0
+
+        frames = iter_frames(data)
+        for offset, header in frames:
+            if not offsets and read_info_tag(data, offset, header) is not None:
+                continue  # VBR/LAME header frame: no audio
+            if header.sample_rate != sample_rate:
+                if sample_rate:
+                    raise ValueError("Sample rate changes mid-stream")
+                sample_rate = header.sample_rate
+            offsets.append(offset)
+            timestamps.append(sample)
+            sample += header.samples
+            audio_bytes += header.length
+
+        return cls(offsets, timestamps, sample_rate, audio_bytes, sample)
+
+    @classmethod
+    def from_file(cls, path):
+        """Index an MP3 file through a read-only memory map"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(array('I'), array('Q'), 0, 0, 0)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return cls.from_buffer(data)
+
+    @property
+    def frames(self):
+        return len(self.offsets)
+
+    @property
+    def duration(self):
+        """Duration in seconds"""
+        return self.end_sample / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def bitrate(self):
+        """Average bitrate in bit/s"""
+        return round(self.audio_bytes * 8 / self.duration) if self.duration else 0
+
+    def frame_at(self, seconds):
+        """Return the index of the frame playing at a time (clamped to the stream)"""
+        if not self.offsets:
+            raise ValueError("No MP3 frames")
+        sample = int(seconds * self.sample_rate)
+        return max(0, min(bisect.bisect_right(self.timestamps, sample) - 1, self.frames - 1))
+
+    def offset_at(self, seconds):
+        """Return the byte offset to start reading from to play from a time"""
+        return self.offsets[self.frame_at(seconds)]
+
+    def time_of(self, frame):
+        """Return the start time in seconds of a frame"""
+        return self.timestamps[frame] / self.sample_rate
+
+    def memory_bytes(self):
+        """Size of the seek table arrays"""
+        return (self.offsets.itemsize * len(self.offsets)
+                + self.timestamps.itemsize * len(self.timestamps))
+
+
+def main():
+    """Main function"""
+    args = sys.argv[1:]
+    seek = None
+    if '--seek' in args:
+        index = args.index('--seek')
+        seek = float(args[index + 1])
+        del args[index:index + 2]
+    if not args:
+        print("Usage:")
+        print("  python mp3_index.py file.mp3 [...] [--seek SECONDS]")
+        sys.exit(1)
+
+    for path in args:
+        try:
+            index = FrameIndex.from_file(path)
+        except (OSError, ValueError) as e:
+            print(f"❌ {path}: {e}")
+            continue
+        if not index.frames:
+            print(f"⚠️  {path}: no MP3 frames (empty or not an MP3 file)")
+            continue
+        print(f"{path}: {index.duration:.3f}s, {index.bitrate / 1000:.1f} kbit/s, "
+              f"{index.sample_rate} Hz, {index.frames} frames, "
+              f"seek table {index.memory_bytes():,} bytes")
+        if seek is not None:
+            frame = index.frame_at(seek)
+            print(f"  {seek:g}s -> frame {frame} at byte {index.offsets[frame]} "
+                  f"(starts at {index.time_of(frame):.3f}s)")
+
+
+if __name__ == '__main__':
+    main()
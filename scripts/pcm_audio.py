@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming PCM conversion for Edge-TTS audio
+Decodes the MP3 stream produced by edge-tts into 16-bit mono PCM while it
+is still arriving, and resamples it with NumPy to the rate the browser
+player expects (24 kHz, same as the Gemini Live audio). Leading and
+trailing silence is trimmed and speech is normalized to a target loudness
+on the way (SilenceTrimmer, LoudnessNormalizer), chunk by chunk.
+
+Requires numpy and an ffmpeg binary (TTS_FFMPEG, default: ffmpeg on PATH).
+"""
+
+import asyncio
+import os
+
+import numpy as np
+
+# Edge-TTS MP3 output is 24 kHz mono
+SOURCE_RATE = 24000
+DEFAULT_SAMPLE_RATE = 24000
+
+FFMPEG = os.getenv('TTS_FFMPEG', 'ffmpeg')
+READ_SIZE = 4096  # bytes of PCM read from ffmpeg at a time
+
+# Environment configuration (TTS_TRIM_SILENCE=0 / TTS_NORMALIZE=0 disable a stage)
+TRIM_SILENCE = os.getenv('TTS_TRIM_SILENCE', '1') != '0'
+NORMALIZE = os.getenv('TTS_NORMALIZE', '1') != '0'
+SILENCE_DB = float(os.getenv('TTS_SILENCE_DB', '-50'))  # dBFS RMS below which a block is silent
+TARGET_DB = float(os.getenv('TTS_TARGET_DB', '-20'))    # dBFS RMS of speech after normalization
+
+BLOCK_MS = 10           # silence detection resolution
+LEAD_MARGIN_MS = 30     # silence kept before the first speech block
+TAIL_MARGIN_MS = 60     # silence kept after the last speech block
+MAX_HOLD_MS = 2000      # longest pause held back while it could be trailing silence
+MAX_GAIN_DB = 12.0
+PEAK_LIMIT = 32767 * 0.98
+LOWPASS_TAPS = 63       # anti-aliasing filter length when downsampling
+
+
+def block_db(samples, block):
+    """RMS level in dBFS of each whole block of int16 samples"""
+    blocks = samples[:len(samples) // block * block].astype(np.float32).reshape(-1, block)
+    rms = np.sqrt(np.mean(blocks * blocks, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-3) / 32768)
+
+
+def lowpass_taps(cutoff, taps=LOWPASS_TAPS):
+    """Windowed-sinc low-pass FIR coefficients; cutoff is a fraction of the sample rate"""
+    n = np.arange(taps) - (taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+class StreamingResampler:
+    """
+    Linear-interpolation resampler for int16 mono audio
+
+    Keeps the interpolation phase and the last input sample between calls,
+    so a stream resampled chunk by chunk is identical to resampling it in
+    one piece. When downsampling, a low-pass FIR below the new Nyquist
+    frequency runs first (its history is kept between calls as well), so
+    content above it does not alias; it delays the audio by
+    (LOWPASS_TAPS - 1) / 2 input samples, about 1.3 ms at 24 kHz.
+    """
+
+    def __init__(self, src_rate, dst_rate):
+        self.step = src_rate / dst_rate
+        self._pos = 0.0      # next output position, in input samples from self._last
+        self._last = None    # last input sample of the previous chunk
+        self._taps = lowpass_taps(0.45 * dst_rate / src_rate) if dst_rate < src_rate else None
+        self._history = np.zeros(LOWPASS_TAPS - 1, dtype=np.float32)  # filter input of the previous chunks
+
+    def process(self, samples):
+        """Resample one chunk of int16 samples"""
+        if self.step == 1.0:
+            return samples
+
+        x = samples.astype(np.float32)
+        if self._taps is not None:
+            x = np.concatenate((self._history, x))
+            self._history = x[len(x) - len(self._history):]
+            x = np.convolve(x, self._taps, mode='valid').astype(np.float32)
+        if self._last is not None:
+            x = np.concatenate(([self._last], x))
+        if len(x) < 2:
+            if len(x):
+                self._last = x[-1]
+            return np.empty(0, dtype=np.int16)
+
+        limit = len(x) - 1
+        count = int(np.ceil((limit - self._pos) / self.step)) if self._pos < limit else 0
+        positions = self._pos + self.step * np.arange(count)
+        index = positions.astype(np.int64)
+        frac = (positions - index).astype(np.float32)
+        y = x[index] * (1.0 - frac) + x[index + 1] * frac
+
+        self._pos += self.step * count - limit
+        self._last = x[-1]
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+
+class SilenceTrimmer:
+    """
+    Streaming trimmer of leading and trailing silence for int16 mono audio
+
+    Leading silence is dropped as it arrives. Silence after speech is held
+    back until more speech arrives (it is then released with it, so speech
+    is never delayed) or the stream ends (it is then dropped); only the
+    samples of an unfinished detection block, under BLOCK_MS, are delayed.
+    """
+
+    def __init__(self, sample_rate, threshold_db=SILENCE_DB):
+        self.block = sample_rate * BLOCK_MS // 1000
+        self.lead_margin = sample_rate * LEAD_MARGIN_MS // 1000
+        self.tail_margin = sample_rate * TAIL_MARGIN_MS // 1000
+        self.max_hold = sample_rate * MAX_HOLD_MS // 1000
+        self.threshold_db = threshold_db
+        self.samples_in = 0
+        self.samples_out = 0
+        self._started = False
+        self._pending = np.empty(0, dtype=np.int16)  # samples short of a whole block
+        self._held = np.empty(0, dtype=np.int16)     # silence after the last speech block
+
+    @property
+    def samples_trimmed(self):
+        return self.samples_in - self.samples_out
+
+    def process(self, samples):
+        """Trim one chunk; returns the samples that can be played now"""
+        self.samples_in += len(samples)
+        x = np.concatenate((self._pending, samples))
+        whole = len(x) // self.block * self.block
+        x, self._pending = x[:whole], x[whole:]
+        if not whole:
+            return x
+
+        loud = np.flatnonzero(block_db(x, self.block) >= self.threshold_db)
+        if not self._started:
+            lead = np.concatenate((self._held, x[:loud[0] * self.block if len(loud) else whole]))
+            self._held = lead[max(len(lead) - self.lead_margin, 0):]
+            if not len(loud):
+                return x[:0]
+            self._started = True
+            x = x[loud[0] * self.block:]
+            loud = loud - loud[0]
+
+        if not len(loud):
+            self._held = np.concatenate((self._held, x))
+            out = x[:0]
+            if len(self._held) > self.max_hold:
+                # A long pause inside the answer: play the part beyond the hold limit
+                out = self._held[:-self.max_hold]
+                self._held = self._held[-self.max_hold:]
+        else:
+            end = (loud[-1] + 1) * self.block
+            out = np.concatenate((self._held, x[:end]))
+            self._held = x[end:]
+        self.samples_out += len(out)
+        return out
+
+    def flush(self):
+        """End of stream: return the tail margin of the trailing silence"""
+        tail = np.concatenate((self._held, self._pending))[:self.tail_margin]
+        if not self._started:
+            tail = tail[:0]
+        self._held = self._pending = tail[:0]
+        self.samples_out += len(tail)
+        return tail
+
+
+class LoudnessNormalizer:
+    """
+    Streaming gain normalization of speech toward TARGET_DB
+
+    The speech level is the RMS of the non-silent blocks seen so far (the
+    current chunk included, so the first chunk is already normalized with
+    no lookahead). The gain ramps linearly across each chunk from its
+    previous value and is capped at MAX_GAIN_DB up or down, and lowered
+    when the chunk would clip.
+    """
+
+    def __init__(self, sample_rate, target_db=TARGET_DB, threshold_db=SILENCE_DB):
+        self.block = sample_rate * BLOCK_MS // 1000
+        self.target_rms = 32768 * 10 ** (target_db / 20)
+        self.threshold_db = threshold_db
+        self.gain = None
+        self._energy = 0.0  # sum of squares of the speech blocks
+        self._count = 0     # samples in the speech blocks
+
+    @property
+    def gain_db(self):
+        return 20 * np.log10(self.gain) if self.gain else 0.0
+
+    def process(self, samples):
+        """Normalize one chunk of int16 samples"""
+        if not len(samples):
+            return samples
+        x = samples.astype(np.float32)
+        levels = block_db(samples, self.block)
+        speech = x[:len(levels) * self.block].reshape(-1, self.block)[levels >= self.threshold_db]
+        if speech.size:
+            self._energy += float(np.sum(speech * speech))
+            self._count += speech.size
+        if not self._count:
+            return samples  # nothing but silence so far: no level to go by
+
+        limit = 10 ** (MAX_GAIN_DB / 20)
+        target = min(max(self.target_rms / np.sqrt(self._energy / self._count), 1 / limit), limit)
+        peak = float(np.max(np.abs(x)))
+        if peak * target > PEAK_LIMIT:
+            target = PEAK_LIMIT / peak
+        start = target if self.gain is None else self.gain
+        self.gain = target
+        gain = np.linspace(start, target, len(x), dtype=np.float32) if start != target else target
+        return np.clip(np.rint(x * gain), -32768, 32767).astype(np.int16)
+
+
+async def decode_mp3_stream(mp3_chunks):
+    """
+    Decode an async iterable of MP3 chunks into int16 arrays (SOURCE_RATE, mono)
+
+    ffmpeg runs as a pipe, so PCM comes out while MP3 is still going in.
+    Errors from the MP3 source are re-raised once the decoder drains.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            FFMPEG, '-hide_banner', '-loglevel', 'error',
+            '-probesize', '32', '-analyzeduration', '0',
+            '-f', 'mp3', '-i', 'pipe:0',
+            '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(SOURCE_RATE),
+            'pipe:1',
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise RuntimeError(f"ffmpeg not found ('{FFMPEG}'); it is required for PCM output")
+
+    async def feed():
+        try:
+            async for chunk in mp3_chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    leftover = b''
+    try:
+        while True:
+            data = await process.stdout.read(READ_SIZE)
+            if not data:
+                break
+            data = leftover + data
+            usable = len(data) - len(data) % 2
+            leftover = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype='<i2')
+
+        await feeder
+        if await process.wait() != 0:
+            error = (await process.stderr.read()).decode('utf-8', 'replace').strip()
+            raise RuntimeError(f"ffmpeg failed: {error}")
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+async def mp3_to_pcm_stream(mp3_chunks, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    Convert an async iterable of MP3 chunks into 16-bit little-endian mono
+    PCM bytes at sample_rate, yielding frames as soon as they are decoded
+
+    Silence trimming and loudness normalization (TTS_TRIM_SILENCE,
+    TTS_NORMALIZE) run before resampling, at the decoder rate.
+    """
+    trimmer = SilenceTrimmer(SOURCE_RATE) if TRIM_SILENCE else None
+    normalizer = LoudnessNormalizer(SOURCE_RATE) if NORMALIZE else None
+    resampler = StreamingResampler(SOURCE_RATE, sample_rate)
+
+    def convert(samples):
+        if normalizer is not None:
+            samples = normalizer.process(samples)
+        return resampler.process(samples)
+
+    async for samples in decode_mp3_stream(mp3_chunks):
+        if trimmer is not None:
+            samples = trimmer.process(samples)
+        pcm = convert(samples)
+        if len(pcm):
+            yield pcm.astype('<i2', copy=False).tobytes()
+
+    if trimmer is not None:
+        pcm = convert(trimmer.flush())
+        if len(pcm):
+            yield pcm.astype('<i2', copy=False).tobytes()
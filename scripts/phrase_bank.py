@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Warm phrase bank
+Utterances that are spoken constantly (greeting, out-of-scope apology,
+"please repeat") are synthesized once and served from memory afterwards
+"""
+
+import asyncio
+import os
+import sys
+
+from tts_cache import normalize_text
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Environment configuration
+PHRASE_BANK_FILE = os.getenv('TTS_PHRASE_BANK', os.path.join(SCRIPT_DIR, 'phrase_bank.txt'))
+WARM_CONCURRENCY = 4
+
+
+def load_phrases(path, default_voice):
+    """
+    Read a phrase bank file
+
+    Each line is "voice | phrase" (or just "phrase" for the default voice);
+    blank lines and lines starting with # are ignored.
+
+    Returns:
+        List of (phrase, voice) pairs
+    """
+    phrases = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            voice, separator, phrase = line.partition('|')
+            if separator:
+                phrases.append((phrase.strip(), voice.strip()))
+            else:
+                phrases.append((line, default_voice))
+    return phrases
+
+
+class PhraseBank:
+    """
+    In-memory audio for a fixed set of phrases
+
+    Entries are keyed by (normalized text, voice, rate, pitch) and hold the
+    MP3 bytes plus the word timings of the synthesis.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text, voice, rate='+0%', pitch='+0Hz'):
+        """Return the lookup key of a phrase"""
+        return (normalize_text(text), voice, rate, pitch)
+
+    async def warm(self, phrases, render, concurrency=WARM_CONCURRENCY):
+        """
+        Synthesize phrases concurrently and keep the results
+
+        Args:
+            phrases: List of (phrase, voice) pairs
+            render: Coroutine function (text, voice, timings) -> MP3 bytes
+            concurrency: Maximum number of phrases rendered at once
+
+        Returns:
+            Number of phrases that failed to render
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def warm_one(text, voice):
+            async with semaphore:
+                timings = []
+                audio = await render(text, voice, timings)
+                self.entries[self.make_key(text, voice)] = (audio, timings)
+
+        results = await asyncio.gather(
+            *(warm_one(text, voice) for text, voice in phrases),
+            return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        for error in failures:
+            print(f"[TTS] Phrase bank: failed to render a phrase: {error}")
+        return len(failures)
+
+    def get(self, text, voice, rate='+0%', pitch='+0Hz', timings=None):
+        """Return the audio of a phrase (and extend timings), or None if not in the bank"""
+        entry = self.entries.get(self.make_key(text, voice, rate, pitch))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        audio, words = entry
+        if timings is not None:
+            timings.extend(words)
+        return audio
+
+    def stats(self):
+        """Return size, memory footprint and hit rate"""
+        audio_bytes = sum(len(audio) for audio, _ in self.entries.values())
+        memory_bytes = sum(
+            sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+            + sys.getsizeof(audio) + sys.getsizeof(words)
+            + sum(sys.getsizeof(word) for word in words)
+            for key, (audio, words) in self.entries.items()
+        )
+        lookups = self.hits + self.misses
+        return {
+            'phrases': len(self.entries),
+            'audio_bytes': audio_bytes,
+            'memory_bytes': memory_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+_phrase_bank = None
+
+
+def get_phrase_bank():
+    """Return the process-wide phrase bank, or None if none was warmed"""
+    return _phrase_bank
+
+
+def set_phrase_bank(bank):
+    """Install the process-wide phrase bank"""
+    global _phrase_bank
+    _phrase_bank = bank
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Phrase packing for short utterances
+Many short phrases (UI prompts, numbers) are joined into one edge-tts
+request and the audio is cut back into one clip per phrase using the
+WordBoundary offsets of the same stream, so the websocket handshake is paid
+once per pack instead of once per phrase
+"""
+
+import bisect
+import math
+
+from mp3_frames import iter_frames, main_data_begin, read_info_tag
+from word_timings import WordTiming
+
+# Packs are kept well below the size at which edge-tts splits the text itself
+PACK_MAX_CHARS = 800
+PACK_MAX_PHRASE_CHARS = 120  # longer texts are not worth packing
+
+# Phrases are joined as separate sentences so that the voice pauses between them
+PACK_SEPARATOR = '\n'
+SENTENCE_END = ('.', '!', '?', '؟', '،', '؛')
+
+
+def group_phrases(phrases, max_chars=PACK_MAX_CHARS):
+    """
+    Split a list of phrases into packs of at most max_chars characters
+
+    Returns:
+        List of lists of indexes into phrases
+    """
+    groups = []
+    current, size = [], 0
+    for index, phrase in enumerate(phrases):
+        length = len(phrase) + len(PACK_SEPARATOR) + 1
+        if current and size + length > max_chars:
+            groups.append(current)
+            current, size = [], 0
+        current.append(index)
+        size += length
+    if current:
+        groups.append(current)
+    return groups
+
+
+def pack_phrases(phrases):
+    """
+    Join phrases into the text of one request
+
+    Returns:
+        (text, spans) where spans[i] is the (start, end) character range of
+        phrases[i] in text
+    """
+    parts, spans = [], []
+    position = 0
+    for phrase in phrases:
+        phrase = phrase.strip()
+        if not phrase.endswith(SENTENCE_END):
+            phrase += '.'
+        spans.append((position, position + len(phrase)))
+        parts.append(phrase)
+        position += len(phrase) + len(PACK_SEPARATOR)
+    return PACK_SEPARATOR.join(parts), spans
+
+
+def assign_words(text, spans, timings):
+    """
+    Attribute every word timing of a packed request to its phrase
+
+    Words are located in the packed text in order; a word that cannot be
+    found (the service may normalize it) stays with the current phrase.
+
+    Returns:
+        One list of WordTiming per span
+    """
+    starts = [start for start, _ in spans]
+    groups = [[] for _ in spans]
+    cursor, phrase = 0, 0
+    for timing in timings:
+        position = text.find(timing.text, cursor) if timing.text else -1
+        if position >= 0:
+            cursor = position + len(timing.text)
+            phrase = max(phrase, bisect.bisect_right(starts, position) - 1)
+        groups[phrase].append(timing)
+    return groups
+
+
+def split_packed(audio, text, spans, timings):
+    """
+    Cut the MP3 audio of a packed request into one clip per phrase
+
+    Each cut lies in the pause between the last word of a phrase and the
+    first word of the next one, at a frame boundary found by parsing the
+    frames: the frame closest to the middle of the pause that does not use
+    the bit reservoir (so the clip decodes on its own), or the middle frame
+    when every frame of the pause borrows from the previous ones. Word
+    timings are made relative to the start of their clip.
+
+    Returns:
+        List of (mp3_bytes, timings) pairs, one per phrase
+
+    Raises:
+        ValueError: If a phrase got no word timings or no audio
+    """
+    groups = assign_words(text, spans, timings)
+    if not all(groups):
+        raise ValueError("Packed synthesis returned no word timings for some phrases")
+
+    frames = list(iter_frames(audio))
+    if frames and read_info_tag(audio, *frames[0]) is not None:
+        frames = frames[1:]
+    if not frames:
+        raise ValueError("Packed synthesis returned no audio")
+    header = frames[0][1]
+    frame_ms = header.samples * 1000 / header.sample_rate
+    total_frames = len(frames)
+    offsets = [offset for offset, _ in frames] + [frames[-1][0] + frames[-1][1].length]
+
+    def self_contained(index):
+        return header.layer != 3 or main_data_begin(audio, *frames[index]) == 0
+
+    cuts = [0]
+    for words, following in zip(groups, groups[1:]):
+        end = words[-1].offset + words[-1].duration
+        start = max(following[0].offset, end)
+        middle = round((end + start) / 2 / frame_ms)
+        pause = range(max(math.ceil(end / frame_ms), cuts[-1]),
+                      min(int(start / frame_ms), total_frames - 1) + 1)
+        candidates = [index for index in pause if self_contained(index)]
+        frame = min(candidates, key=lambda index: abs(index - middle)) if candidates else middle
+        cuts.append(min(max(frame, cuts[-1]), total_frames))
+    cuts.append(total_frames)
+
+    clips = []
+    for words, first, last in zip(groups, cuts, cuts[1:]):
+        clip_start = first * frame_ms
+        clip = audio[offsets[first]:offsets[last]]
+        if not clip:
+            raise ValueError("Packed synthesis is shorter than its word timings")
+        clips.append((clip, [
+            WordTiming(w.text, max(round(w.offset - clip_start), 0), w.duration) for w in words
+        ]))
+    return clips
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Queue-based pipeline engine
+Runs items through a chain of stages, each with its own pool of workers
+and a bounded input queue. A saturated stage fills its queue, which blocks
+the stage before it, and so on back to the input: memory stays bounded and
+inputs are only read as fast as the slowest stage drains them.
+
+Blocking stages (SDK calls) run in a thread pool so they never block the
+event loop. Every stage reports its service time percentiles, queue depth
+and worker utilization.
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tts_latency import percentile
+
+DEFAULT_QUEUE_SIZE = 8
+DEPTH_SAMPLE_INTERVAL = 0.05  # seconds between queue depth samples
+
+
+class Stage:
+    """
+    One pipeline stage
+
+    Args:
+        name: Stage name used in the metrics
+        handler: Called with each item; its return value goes to the next
+            stage. A coroutine function, or a plain function if blocking
+        workers: Number of items processed at once
+        queue_size: Capacity of the input queue (backpressure threshold)
+        blocking: Run handler in the engine's thread pool
+    """
+
+    def __init__(self, name, handler, workers=1, queue_size=DEFAULT_QUEUE_SIZE, blocking=False):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue_size = queue_size
+        self.blocking = blocking
+
+
+class StageMetrics:
+    """Service times, failures, queue depth samples and busy time of one stage"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.service_times = []
+        self.failed = 0
+        self.busy = 0.0
+        self.depths = []
+
+    def stats(self, wall):
+        """Return the stage metrics (times in ms) for a run of wall seconds"""
+        times = self.service_times
+        return {
+            'stage': self.stage.name,
+            'workers': self.stage.workers,
+            'items': len(times),
+            'failed': self.failed,
+            'service_p50_ms': round(percentile(times, 50) * 1000, 1),
+            'service_p95_ms': round(percentile(times, 95) * 1000, 1),
+            'queue_mean': round(sum(self.depths) / len(self.depths), 2) if self.depths else 0.0,
+            'queue_max': max(self.depths, default=0),
+            'utilization': round(self.busy / (wall * self.stage.workers), 3) if wall else 0.0,
+        }
+
+
+class PipelineEngine:
+    """
+    Bounded-queue pipeline over a list of Stage objects
+
+    Items are dicts. A stage that raises marks the item with 'error' and
+    'failed_stage'; the item then skips the remaining stages.
+    """
+
+    def __init__(self, stages, executor=None):
+        self.stages = stages
+        self.metrics = [StageMetrics(stage) for stage in stages]
+        self.wall = 0.0
+        threads = sum(stage.workers for stage in stages if stage.blocking) or 1
+        self._executor = executor or ThreadPoolExecutor(max_workers=threads,
+                                                        thread_name_prefix='pipeline')
+
+    async def run(self, items, on_result=None):
+        """
+        Process items (any iterable, read lazily) through every stage
+
+        Args:
+            on_result: Optional function called with each finished item.
+                Exceptions it raises are logged and do not stop the run
+
+        Returns:
+            The finished items, in completion order
+        """
+        loop = asyncio.get_running_loop()
+        queues = [asyncio.Queue(stage.queue_size) for stage in self.stages]
+        queues.append(asyncio.Queue(self.stages[-1].queue_size))  # finished items
+        results = []
+        started = time.perf_counter()
+
+        async def worker(index):
+            stage, metrics = self.stages[index], self.metrics[index]
+            inbox, outbox = queues[index], queues[index + 1]
+            while True:
+                item = await inbox.get()
+                try:
+                    if 'error' not in item:
+                        begin = time.perf_counter()
+                        try:
+                            if stage.blocking:
+                                item = await loop.run_in_executor(self._executor, stage.handler, item)
+                            else:
+                                item = await stage.handler(item)
+                        except Exception as e:
+                            item['error'] = str(e)
+                            item['failed_stage'] = stage.name
+                            metrics.failed += 1
+                        elapsed = time.perf_counter() - begin
+                        metrics.busy += elapsed
+                        metrics.service_times.append(elapsed)
+                    await outbox.put(item)  # blocks while the next stage is saturated
+                finally:
+                    inbox.task_done()
+
+        async def collect():
+            while True:
+                item = await queues[-1].get()
+                results.append(item)
+                try:
+                    if on_result is not None:
+                        on_result(item)
+                except Exception as e:
+                    # The item is done either way: a collector that died here
+                    # would leave run() waiting on the queue forever
+                    print(f"[Pipeline] on_result failed: {e}", file=sys.stderr)
+                finally:
+                    queues[-1].task_done()
+
+        async def sample_depths():
+            while True:
+                for queue, metrics in zip(queues, self.metrics):
+                    metrics.depths.append(queue.qsize())
+                await asyncio.sleep(DEPTH_SAMPLE_INTERVAL)
+
+        tasks = [asyncio.create_task(worker(index))
+                 for index, stage in enumerate(self.stages) for _ in range(stage.workers)]
+        tasks.append(asyncio.create_task(collect()))
+        tasks.append(asyncio.create_task(sample_depths()))
+        try:
+            for item in items:
+                await queues[0].put(item)  # blocks while the first stage is saturated
+            for queue in queues:
+                await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.wall = time.perf_counter() - started
+        return results
+
+    def stats(self):
+        """Return the metrics of every stage"""
+        return [metrics.stats(self.wall) for metrics in self.metrics]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
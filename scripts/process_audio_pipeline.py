@@ -3,28 +3,52 @@
 """
 Complete Audio Pipeline for Voice Chatbot
 Processes audio file -> Speech-to-Text -> AI Response -> Text-to-Speech
+
+Usage:
+    python process_audio_pipeline.py [audio_file | file.pcm | -] [--stream] [--realtime] [--pipeline]
+    python process_audio_pipeline.py --batch <directory | manifest> [--output DIR]
+                                     [--stt-workers N] [--llm-workers N] [--tts-workers N]
+                                     [--queue-size N]
+
+--stream recognizes the audio with streaming_recognize while it is being
+read (see speech_stream.py); --realtime paces the input like a microphone.
+--pipeline streams the Gemini answer and synthesizes it sentence by
+sentence while it is still being generated, so the first audio does not
+wait for the whole answer.
+--batch runs many inputs through the three stages at once (see
+run_pipeline_batch and pipeline_engine.py).
 """
 
 import os
 import sys
+import time
 import asyncio
-import edge_tts
-from google.cloud import speech
-from google.cloud import aiplatform
-from google.oauth2 import service_account
 import json
 
+from edge_service import import_edge_tts
+from google_clients import CREDENTIALS_PATH, MODEL, get_google_clients
+from pipeline_engine import DEFAULT_QUEUE_SIZE, PipelineEngine, Stage
+from speakable_text import SpeakableText, make_speakable
+from speech_stream import iterate_in_thread, pcm_chunks, stream_transcripts, streaming_transcribe
+from text_segments import SentenceStream
+from tts_edge import get_option, stream_sentences, synthesize_bytes, write_file_atomic
+
 # Configuration
 AUDIO_FILE = 's.m4a'
 OUTPUT_AUDIO = 'bot_response_audio.mp3'
 OUTPUT_TEXT = 'bot_response_text.txt'
 TRANSCRIPT_TEXT = 'audio_transcript.txt'
 
-# Google Cloud Configuration
-PROJECT_ID = os.getenv('GOOGLE_CLOUD_PROJECT_ID', 'refined-circuit-480414-c1')
-LOCATION = os.getenv('GOOGLE_CLOUD_REGION', 'us-central1')
-MODEL = 'gemini-2.0-flash-exp'
-CREDENTIALS_PATH = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'ser_api.json')
+# Batch (--batch) configuration: workers per stage and per-item outputs
+BATCH_OUTPUT_DIR = 'pipeline_output'
+BATCH_RESULTS = 'results.jsonl'
+STT_WORKERS = 4
+LLM_WORKERS = 4
+TTS_WORKERS = 8
+AUDIO_EXTENSIONS = ('.m4a', '.mp3', '.wav', '.flac', '.ogg', '.webm', '.pcm', '.raw')
+
+# Arabic voice (Saudi Female)
+VOICE = 'ar-SA-ZariNeural'
 
 # System Instruction
 SYSTEM_INSTRUCTION = """أنت روبوت مساعد متخصص في علوم الحاسب وهندسة المعلوماتية.
@@ -72,43 +96,35 @@ def transcribe_audio(audio_file_path):
     """
     Transcribe audio file using Google Cloud Speech-to-Text
     Supports: m4a, wav, flac, ogg, mp3
+
+    Only the speech found by voice_activity.py is uploaded (STT_VAD=0
+    sends the file as is).
     """
     print_step("STEP 1: Speech-to-Text", f"Transcribing audio file: {audio_file_path}")
     
     try:
-        # Initialize client
-        credentials = service_account.Credentials.from_service_account_file(CREDENTIALS_PATH)
-        client = speech.SpeechClient(credentials=credentials)
-        
-        # Read audio file
-        with open(audio_file_path, 'rb') as audio_file:
-            audio_content = audio_file.read()
-        
-        # Configure audio
-        audio = speech.RecognitionAudio(content=audio_content)
-        
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.ENCODING_UNSPECIFIED,
-            sample_rate_hertz=16000,
-            language_code='ar-EG',
-            alternative_language_codes=['en-US'],
-            enable_automatic_punctuation=True,
-            model='latest_long'
-        )
-        
-        # Detect encoding if needed
-        print("🔍 Detecting audio encoding...")
-        
-        # Try transcription
-        print("📤 Sending to Google Cloud Speech-to-Text...")
-        response = client.recognize(config=config, audio=audio)
-        
-        # Extract transcript
-        transcript = ''
-        for result in response.results:
-            transcript += result.alternatives[0].transcript + ' '
-        
-        transcript = transcript.strip()
+        # Imported here: numpy is only needed to transcribe a file
+        from voice_activity import STT_VAD, plan_upload, recognize_file, recognize_uploads
+
+        # Shared client (credentials, channel and token are reused across calls)
+        client = get_google_clients().speech_client()
+        
+        if STT_VAD:
+            # Send only the speech, cut at pauses into recognize()-sized segments
+            print("🔇 Detecting speech...")
+            uploads, stats = plan_upload(audio_file_path)
+            if not stats['segments']:
+                raise Exception("No speech detected")
+            if stats['vad']:
+                print(f"🔇 Speech: {stats['speech_ratio']:.0%} of {stats['duration']:.2f}s"
+                      + (", file is smaller as is" if stats['as_is']
+                         else f", sending {stats['segments']} segment(s)"))
+            print("📤 Sending to Google Cloud Speech-to-Text...")
+            transcript, uploaded = recognize_uploads(client, uploads)
+        else:
+            print("📤 Sending to Google Cloud Speech-to-Text...")
+            transcript, uploaded = recognize_file(client, audio_file_path)
+        print(f"📊 Uploaded {uploaded:,} bytes (file: {os.path.getsize(audio_file_path):,} bytes)")
         
         if not transcript:
             raise Exception("No transcript received")
@@ -133,6 +149,60 @@ def transcribe_audio(audio_file_path):
         return fallback_text
 
 
+async def transcribe_stream(source, realtime=False):
+    """
+    Transcribe audio with streaming recognition, printing interim results
+
+    Chunks are sent while the source is still being read (or recorded), so
+    recognition finishes right after the audio ends. Final results are
+    printed as they land; the transcript is their concatenation.
+    """
+    print_step("STEP 1: Speech-to-Text (streaming)", f"Streaming audio: {source}")
+
+    try:
+        client = get_google_clients().speech_client()
+
+        print("📤 Streaming to Google Cloud Speech-to-Text...")
+        finals = []
+        async for result in stream_transcripts(client, pcm_chunks(source, realtime=realtime)):
+            if result.is_final:
+                finals.append(result.text)
+                print(f"\r✅ [{result.end_time:6.2f}s] {result.text}")
+            else:
+                print(f"\r… {result.text}", end='', flush=True)
+
+        transcript = ' '.join(text for text in finals if text)
+        if not transcript:
+            raise Exception("No transcript received")
+
+        print_success("Transcription successful!")
+        print(f"📝 Transcript: \"{transcript}\"")
+
+        with open(TRANSCRIPT_TEXT, 'w', encoding='utf-8') as f:
+            f.write(transcript)
+        print(f"💾 Transcript saved to: {TRANSCRIPT_TEXT}")
+
+        return transcript
+
+    except Exception as e:
+        print_error(f"Transcription failed: {str(e)}")
+        print("\n💡 Trying alternative method...")
+
+        fallback_text = "ما هي لغة بايثون؟"
+        print(f"📝 Using fallback text: \"{fallback_text}\"")
+        return fallback_text
+
+
+def build_prompt(text):
+    """Return the Gemini prompt for a question"""
+    return f"{SYSTEM_INSTRUCTION}\n\nالسؤال: {text}"
+
+
+def gemini_model():
+    """Return the shared Gemini model (Vertex AI is initialized once, see google_clients.py)"""
+    return get_google_clients().generative_model(MODEL)
+
+
 def get_gemini_response(text):
     """
     Get AI response from Vertex AI Gemini API
@@ -140,22 +210,10 @@ def get_gemini_response(text):
     print_step("STEP 2: AI Response", f"Getting response from Gemini for: \"{text}\"")
     
     try:
-        # Initialize Vertex AI
-        credentials = service_account.Credentials.from_service_account_file(
-            CREDENTIALS_PATH,
-            scopes=['https://www.googleapis.com/auth/cloud-platform']
-        )
-        
-        aiplatform.init(project=PROJECT_ID, location=LOCATION, credentials=credentials)
-        
-        # Import after initialization
-        from vertexai.generative_models import GenerativeModel
-        
-        # Create model
-        model = GenerativeModel(MODEL)
+        model = gemini_model()
         
         # Generate response
-        prompt = f"{SYSTEM_INSTRUCTION}\n\nالسؤال: {text}"
+        prompt = build_prompt(text)
         
         print("📤 Sending to Gemini API...")
         response = model.generate_content(prompt)
@@ -181,6 +239,94 @@ def get_gemini_response(text):
         raise
 
 
+def gemini_text_pieces(model, prompt):
+    """Yield the text of a streamed Gemini answer piece by piece (blocking)"""
+    for chunk in model.generate_content(prompt, stream=True):
+        try:
+            text = chunk.text
+        except ValueError:
+            continue  # chunk without text (e.g. only safety ratings)
+        if text:
+            yield text
+
+
+async def respond_pipelined(text, output_file):
+    """
+    Stream the Gemini answer and speak it sentence by sentence
+
+    The answer is cleaned (SpeakableText) and cut at sentence boundaries
+    (SentenceStream) as it streams in; every completed sentence is sent to
+    TTS while Gemini is still generating, and the audio is written in
+    order. The first audio therefore depends on the first sentence only
+    (plus MIN_SEGMENT_CHARS of the next, which the splitter waits for in
+    case the answer ends with a short piece to merge), not on the length of
+    the answer.
+
+    Returns:
+        The full response text
+    """
+    print_step("STEP 2+3: AI Response -> Text-to-Speech (pipelined)",
+               f"Streaming response from Gemini for: \"{text}\"")
+    
+    started = time.perf_counter()
+    marks = {}
+    pieces = []
+    
+    def mark(name):
+        if name not in marks:
+            marks[name] = time.perf_counter() - started
+    
+    async def sentences():
+        cleaner = SpeakableText()
+        splitter = SentenceStream()
+        model = gemini_model()
+        prompt = build_prompt(text)
+        print("📤 Streaming from Gemini API...")
+        async for piece in iterate_in_thread(gemini_text_pieces(model, prompt)):
+            mark('first_token')
+            pieces.append(piece)
+            for sentence in splitter.feed(cleaner.feed(piece)):
+                mark('first_sentence')
+                print(f"🗣️  [{time.perf_counter() - started:5.2f}s] {sentence}")
+                yield sentence
+        mark('answer_done')
+        for sentence in splitter.feed(cleaner.finish()) + splitter.finish():
+            mark('first_sentence')
+            print(f"🗣️  [{time.perf_counter() - started:5.2f}s] {sentence}")
+            yield sentence
+    
+    temp_path = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            async for chunk in stream_sentences(sentences(), VOICE):
+                mark('first_audio')
+                f.write(chunk)
+        os.replace(temp_path, output_file)
+        mark('audio_done')
+        
+        response_text = ''.join(pieces).strip()
+        if not response_text:
+            raise Exception("Empty response from Gemini")
+        
+        with open(OUTPUT_TEXT, 'w', encoding='utf-8') as f:
+            f.write(response_text)
+        
+        print_success("AI response spoken!")
+        print(f"🤖 Response: \"{response_text}\"")
+        print(f"💾 Response saved to: {OUTPUT_TEXT}")
+        print(f"📁 Output file: {output_file} ({os.path.getsize(output_file):,} bytes)")
+        print("⏱️  " + ", ".join(f"{name.replace('_', ' ')} {seconds:.2f}s"
+                                 for name, seconds in marks.items()))
+        
+        return response_text
+        
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        print_error(f"Pipelined response failed: {str(e)}")
+        raise
+
+
 async def text_to_speech(text, output_file):
     """
     Convert text to speech using Edge-TTS
@@ -188,14 +334,18 @@ async def text_to_speech(text, output_file):
     print_step("STEP 3: Text-to-Speech", f"Converting response to audio using Edge-TTS")
     
     try:
-        # Arabic voice (Saudi Female)
-        voice = 'ar-SA-ZariNeural'
+        voice = VOICE
+        
+        # Drop Markdown, URLs and emoji so they are not read aloud
+        text, saved = make_speakable(text)
+        if saved > 0:
+            print(f"🧹 Speakable text: {saved} characters removed")
         
         print(f"🎤 Using voice: {voice}")
         print(f"📝 Text: \"{text[:50]}...\"")
         
-        # Create communicate object
-        communicate = edge_tts.Communicate(
+        # Create communicate object (edge_tts and aiohttp are only imported here)
+        communicate = import_edge_tts().Communicate(
             text=text,
             voice=voice,
             rate='+0%',
@@ -220,18 +370,180 @@ async def text_to_speech(text, output_file):
         raise
 
 
+def batch_inputs(source):
+    """
+    Yield {'id', 'audio'} items for a directory or a manifest of inputs
+
+    A directory yields its audio files (AUDIO_EXTENSIONS), sorted by name.
+    A .jsonl manifest holds one {"audio": path, "id": optional name} per
+    line; any other manifest holds one audio path per line. Relative paths
+    are resolved against the manifest directory. Ids default to the file
+    name without extension and are made unique, since they name the outputs.
+    """
+    if os.path.isdir(source):
+        paths = sorted(entry.path for entry in os.scandir(source)
+                       if entry.is_file() and os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS)
+        entries = ((None, path) for path in paths)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(source))
+
+        def read_manifest():
+            with open(source, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if source.endswith('.jsonl'):
+                        job = json.loads(line)
+                        yield job.get('id'), os.path.join(base_dir, job['audio'])
+                    else:
+                        yield None, os.path.join(base_dir, line)
+
+        entries = read_manifest()
+
+    used = set()
+    for item_id, path in entries:
+        base = item_id or os.path.splitext(os.path.basename(path))[0]
+        item_id, suffix = base, 2
+        while item_id in used:
+            item_id, suffix = f"{base}-{suffix}", suffix + 1
+        used.add(item_id)
+        yield {'id': item_id, 'audio': path}
+
+
+def print_stage_metrics(stats, wall):
+    """Print the per-stage metrics of a PipelineEngine run"""
+    print(f"\n{'stage':<6} {'workers':>7} {'items':>6} {'failed':>6} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'queue avg':>9} {'queue max':>9} {'busy':>6}")
+    for row in stats:
+        print(f"{row['stage']:<6} {row['workers']:>7} {row['items']:>6} {row['failed']:>6} "
+              f"{row['service_p50_ms']:>8.1f} {row['service_p95_ms']:>8.1f} "
+              f"{row['queue_mean']:>9.2f} {row['queue_max']:>9} {row['utilization']:>6.0%}")
+    print(f"⏱️  Wall time: {wall:.2f}s")
+
+
+async def run_pipeline_batch(source, output_dir=BATCH_OUTPUT_DIR, stt_workers=STT_WORKERS,
+                             llm_workers=LLM_WORKERS, tts_workers=TTS_WORKERS,
+                             queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Run every input of a directory or manifest through STT -> Gemini -> TTS
+
+    The stages run concurrently with their own worker pools and bounded
+    queues (PipelineEngine): Speech-to-Text and Gemini calls run in the
+    thread pool, TTS on the event loop. Every item writes <id>.transcript.txt,
+    <id>.response.txt and <id>.mp3 to output_dir, so the single-run files
+    (TRANSCRIPT_TEXT, OUTPUT_TEXT, OUTPUT_AUDIO) are left alone; items whose
+    audio already exists are skipped. A line per item is appended to
+    output_dir/results.jsonl. Failed items are reported, not replaced with
+    fallback text.
+
+    Returns:
+        Dict of counters (done, skipped, failed) and the stage metrics
+    """
+    print_step("BATCH: Speech-to-Text -> AI Response -> Text-to-Speech",
+               f"Inputs: {source}\nOutputs: {output_dir}\n"
+               f"Workers: STT {stt_workers}, Gemini {llm_workers}, TTS {tts_workers} "
+               f"(queues of {queue_size})")
+    os.makedirs(output_dir, exist_ok=True)
+
+    def output_path(item, suffix):
+        return os.path.join(output_dir, f"{item['id']}{suffix}")
+
+    def transcribe(item):
+        client = get_google_clients().speech_client()
+        results = streaming_transcribe(client, pcm_chunks(item['audio']), interim_results=False)
+        item['transcript'] = ' '.join(result.text for result in results if result.is_final and result.text)
+        if not item['transcript']:
+            raise Exception("No transcript received")
+        write_file_atomic(output_path(item, '.transcript.txt'), item['transcript'].encode('utf-8'))
+        return item
+
+    def respond(item):
+        item['response'] = gemini_model().generate_content(build_prompt(item['transcript'])).text.strip()
+        if not item['response']:
+            raise Exception("Empty response from Gemini")
+        write_file_atomic(output_path(item, '.response.txt'), item['response'].encode('utf-8'))
+        return item
+
+    async def speak(item):
+        audio = await synthesize_bytes(item['response'], VOICE)
+        write_file_atomic(output_path(item, '.mp3'), audio)
+        item['output'] = output_path(item, '.mp3')
+        return item
+
+    engine = PipelineEngine([
+        Stage('stt', transcribe, stt_workers, queue_size, blocking=True),
+        Stage('llm', respond, llm_workers, queue_size, blocking=True),
+        Stage('tts', speak, tts_workers, queue_size),
+    ])
+    counts = {'done': 0, 'skipped': 0, 'failed': 0}
+
+    def pending():
+        for item in batch_inputs(source):
+            if os.path.exists(output_path(item, '.mp3')):
+                counts['skipped'] += 1
+                continue
+            yield item
+
+    with open(os.path.join(output_dir, BATCH_RESULTS), 'a', encoding='utf-8') as results:
+        def finished(item):
+            if 'error' in item:
+                counts['failed'] += 1
+                print(f"❌ [{item['id']}] {item['failed_stage']}: {item['error']}")
+            else:
+                counts['done'] += 1
+                print(f"✅ [{item['id']}] {item['transcript'][:40]} -> {item['output']}")
+            results.write(json.dumps(item, ensure_ascii=False) + '\n')
+            results.flush()
+
+        try:
+            await engine.run(pending(), on_result=finished)
+        finally:
+            engine.close()
+
+    print_success(f"Batch finished: {counts['done']} done, {counts['skipped']} skipped, "
+                  f"{counts['failed']} failed")
+    print_stage_metrics(engine.stats(), engine.wall)
+    return {**counts, 'stages': engine.stats()}
+
+
 async def main():
     """Main execution function"""
     print("\n" + "="*70)
     print("🎙️  COMPLETE AUDIO PIPELINE FOR VOICE CHATBOT")
     print("="*70)
+
+    if '--batch' in sys.argv:
+        args = sys.argv[1:]
+        source = get_option(args, '--batch')
+        if not source or not os.path.exists(source):
+            print_error(f"Batch input not found: {source}")
+            sys.exit(1)
+        if not os.path.exists(CREDENTIALS_PATH):
+            print_error(f"Credentials file not found: {CREDENTIALS_PATH}")
+            sys.exit(1)
+        stats = await run_pipeline_batch(
+            source,
+            output_dir=get_option(args, '--output', BATCH_OUTPUT_DIR),
+            stt_workers=int(get_option(args, '--stt-workers', STT_WORKERS)),
+            llm_workers=int(get_option(args, '--llm-workers', LLM_WORKERS)),
+            tts_workers=int(get_option(args, '--tts-workers', TTS_WORKERS)),
+            queue_size=int(get_option(args, '--queue-size', DEFAULT_QUEUE_SIZE))
+        )
+        if stats['failed']:
+            sys.exit(1)
+        return
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    audio_file = args[0] if args else AUDIO_FILE
+    streaming = '--stream' in sys.argv or audio_file == '-'
     
     try:
         # Validate files
-        if not os.path.exists(AUDIO_FILE):
-            print_error(f"Audio file not found: {AUDIO_FILE}")
+        if audio_file != '-' and not os.path.exists(audio_file):
+            print_error(f"Audio file not found: {audio_file}")
             print(f"💡 Current directory: {os.getcwd()}")
-            print(f"💡 Looking for: {os.path.abspath(AUDIO_FILE)}")
+            print(f"💡 Looking for: {os.path.abspath(audio_file)}")
             sys.exit(1)
         
         if not os.path.exists(CREDENTIALS_PATH):
@@ -239,18 +551,25 @@ async def main():
             sys.exit(1)
         
         print(f"\n✅ Configuration validated")
-        print(f"📁 Audio file: {AUDIO_FILE}")
+        print(f"📁 Audio file: {audio_file}")
         print(f"🔐 Credentials: {CREDENTIALS_PATH}")
         print(f"🤖 Model: {MODEL}")
         
-        # Step 1: Transcribe audio
-        transcript = transcribe_audio(AUDIO_FILE)
-        
-        # Step 2: Get AI response
-        response = get_gemini_response(transcript)
-        
-        # Step 3: Convert to speech
-        await text_to_speech(response, OUTPUT_AUDIO)
+        # Step 1: Transcribe audio (streaming: Gemini starts as soon as the last final result lands)
+        if streaming:
+            transcript = await transcribe_stream(audio_file, realtime='--realtime' in sys.argv)
+        else:
+            transcript = transcribe_audio(audio_file)
+        
+        if '--pipeline' in sys.argv:
+            # Steps 2 and 3 overlapped: speech starts with the first sentence
+            response = await respond_pipelined(transcript, OUTPUT_AUDIO)
+        else:
+            # Step 2: Get AI response
+            response = get_gemini_response(transcript)
+            
+            # Step 3: Convert to speech
+            await text_to_speech(response, OUTPUT_AUDIO)
         
         # Final success message
         print("\n" + "="*70)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single-flight coalescing of identical syntheses
+When several sessions ask for the same (text, voice, rate, pitch) at the
+same moment, only the first one reaches edge-tts; the others attach to its
+flight and receive the same audio chunks as they arrive
+"""
+
+import asyncio
+
+
+class Flight:
+    """
+    One upstream synthesis shared by every subscriber
+
+    Chunks are kept until the flight ends, so a subscriber that attaches
+    late first replays what it missed and then follows the live stream.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.words = []       # WordTiming of every spoken word
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk):
+        """Append one audio chunk and wake up the subscribers"""
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error=None):
+        """Mark the flight as complete (or failed with error)"""
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self):
+        """Yield every chunk of the flight, from the first one"""
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class SingleFlight:
+    """
+    Registry of the syntheses in flight, by cache key
+
+    The upstream synthesis runs as its own task, so it is not interrupted
+    when the subscriber that started it goes away; it is only cancelled
+    once no subscriber is left.
+    """
+
+    def __init__(self):
+        self.flights = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    async def stream(self, key, produce, timings=None):
+        """
+        Yield the audio chunks of the flight for key, starting it if needed
+
+        Args:
+            key: Synthesis key (see tts_cache.make_key)
+            produce: Coroutine function filling a Flight via publish() and
+                its words list; called at most once per key at a time
+            timings: Optional list receiving the flight's word timings
+        """
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = Flight()
+            self.flights[key] = flight
+            self.upstream_calls += 1
+            flight.task = asyncio.get_running_loop().create_task(self._run(key, flight, produce))
+        else:
+            self.coalesced += 1
+
+        flight.subscribers += 1
+        try:
+            async for chunk in flight.subscribe():
+                yield chunk
+            if timings is not None:
+                timings.extend(flight.words)
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening anymore: new requests start a fresh flight
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    async def _run(self, key, flight, produce):
+        try:
+            await produce(flight)
+            flight.finish()
+        except asyncio.CancelledError:
+            flight.finish(RuntimeError("Synthesis cancelled"))
+        except Exception as e:
+            flight.finish(e)
+        finally:
+            self._forget(key, flight)
+
+    def _forget(self, key, flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    def stats(self):
+        """Return upstream call and coalescing counters"""
+        return {
+            'upstream_calls': self.upstream_calls,
+            'saved_upstream_calls': self.coalesced,
+            'in_flight': len(self.flights),
+        }
+
+
+_single_flight = None
+
+
+def get_single_flight():
+    """Return the process-wide single-flight registry"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Speakable text for TTS
+Gemini answers contain Markdown (bold, bullets, headings, links, code
+fences), URLs and emoji that are either read aloud as symbols or just cost
+synthesis time. SpeakableText removes or verbalizes them and works on
+partial text, so streamed answers can be cleaned as they arrive.
+"""
+
+import os
+import re
+
+# Environment configuration (TTS_SPEAKABLE=0 sends text verbatim)
+SPEAKABLE_ENABLED = os.getenv('TTS_SPEAKABLE', '1') != '0'
+
+# Spoken instead of a fenced code block / a URL
+CODE_PLACEHOLDER = 'يوجد مثال برمجي في النص.'
+URL_PLACEHOLDER = 'رابط'
+
+CODE_FENCE = re.compile(r'\s*(```|~~~)')
+LINE_MARKUP = re.compile(
+    r'^\s*(?:#{1,6}\s+'          # headings
+    r'|>+\s?'                    # block quotes
+    r'|[-*+•]\s+(?:\[[ xX]\]\s+)?'  # bullets and task list boxes
+    r')'
+)
+NUMBERED_ITEM = re.compile(r'^\s*(\d+)[.)]\s+')
+HORIZONTAL_RULE = re.compile(r'^\s*(?:[-*_]\s*){3,}$')
+TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-{3,}')
+
+IMAGE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+LINK = re.compile(r'\[([^\]]+)\]\([^)]*\)')
+URL = re.compile(r'(?:https?://|www\.)\S+')
+INLINE_CODE = re.compile(r'`([^`]*)`')
+# Paired delimiters around non-space text, not inside words: 2 * 3 and
+# snake_case stay as they are (identifiers like __init__ are kept, below)
+EMPHASIS = re.compile(r'(?<![\w*~])(\*{1,3}|_{2,3}|~~)(?=[^\s*_~])(.+?)(?<=[^\s*_~])\1(?![\w*~])')
+EMPHASIS_OPEN = re.compile(r'(?<![\w*~])(?:\*{1,3}|_{2,3}|~~)(?=[^\s*_~])')
+CODE_SPAN_MARK = re.compile('\uE000(\\d+)\uE001')  # private-use placeholders for code spans
+EMOJI = re.compile(
+    '[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF'
+    '\uFE0E\uFE0F\u200D\u20E3\U000E0020-\U000E007F]+'
+)
+SPACES = re.compile(r'[ \t]{2,}')
+
+
+def strip_emphasis(text):
+    """Remove paired emphasis delimiters (nested ones too)"""
+    def replace(match):
+        mark, inner = match.groups()
+        if mark[0] == '_' and inner.isascii() and inner.isidentifier():
+            return match.group(0)  # __init__, __main__
+        return strip_emphasis(inner)
+
+    return EMPHASIS.sub(replace, text)
+
+
+def clean_inline(text):
+    """Remove inline Markdown, URLs and emoji from a piece of one line"""
+    # Inline code spans lose their backticks but are otherwise kept verbatim
+    spans = []
+
+    def protect(match):
+        spans.append(match.group(1))
+        return f'\uE000{len(spans) - 1}\uE001'
+
+    text = INLINE_CODE.sub(protect, text)
+    text = IMAGE.sub(r'\1', text)
+    text = LINK.sub(r'\1', text)
+    text = URL.sub(URL_PLACEHOLDER, text)
+    text = strip_emphasis(text)
+    text = EMOJI.sub('', text)
+    text = SPACES.sub(' ', text)
+    return CODE_SPAN_MARK.sub(lambda match: spans[int(match.group(1))], text)
+
+
+def clean_line_start(line):
+    """Remove the block markup of a line (heading, bullet, quote, rule, table)"""
+    if HORIZONTAL_RULE.match(line) or TABLE_SEPARATOR.match(line):
+        return ''
+    if line.lstrip().startswith('|'):
+        line = line.strip().strip('|').replace('|', '، ')  # table cells
+    line = LINE_MARKUP.sub('', line, count=1)
+    return NUMBERED_ITEM.sub(r'\1، ', line, count=1)
+
+
+class SpeakableText:
+    """
+    Incremental Markdown-to-speech cleaner
+
+    feed() returns the speakable text for everything that can already be
+    decided, holding back the end of the current line while it could still
+    be part of a link, emphasis, inline code or code fence; finish()
+    flushes the rest.
+    """
+
+    def __init__(self):
+        self.chars_in = 0
+        self.chars_out = 0
+        self._buffer = ''
+        self._line_start = True   # the buffer starts at the beginning of a line
+        self._line_spoken = False  # part of the current line was already returned
+        self._in_code = False
+        self._after_space = True
+
+    @property
+    def chars_saved(self):
+        return self.chars_in - self.chars_out
+
+    def feed(self, text):
+        """Add a piece of text and return the speakable text it completes"""
+        self.chars_in += len(text)
+        self._buffer += text
+        out = []
+
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            spoken = self._line(line)
+            if spoken.strip() or self._line_spoken:
+                out.append(spoken.rstrip(' \t') + '\n')
+            self._line_start = True
+            self._line_spoken = False
+
+        out.append(self._partial())
+        return self._emit(''.join(out))
+
+    def finish(self):
+        """Return the speakable text of whatever is still buffered"""
+        rest, self._buffer = self._buffer, ''
+        return self._emit(self._line(rest) if rest else '')
+
+    def _emit(self, text):
+        """Drop whitespace repeated across pieces, count and return text"""
+        if self._after_space:
+            text = text.lstrip(' \t')
+        if text:
+            self._after_space = text[-1] in ' \t\n'
+        self.chars_out += len(text)
+        return text
+
+    def _line(self, line):
+        """Clean the (rest of a) complete line"""
+        if self._line_start and CODE_FENCE.match(line):
+            self._in_code = not self._in_code
+            return CODE_PLACEHOLDER if self._in_code else ''
+        if self._in_code:
+            return ''
+        if self._line_start:
+            return clean_inline(clean_line_start(line)).lstrip(' \t')
+        return clean_inline(line)
+
+    def _partial(self):
+        """Clean the safe prefix of the unfinished line, if any"""
+        buffer = self._buffer
+        if self._in_code or (self._line_start and len(buffer.lstrip()) < 3):
+            return ''  # fence line still being written, or inside a code block
+        if self._line_start and (CODE_FENCE.match(buffer) or buffer.lstrip().startswith('|')):
+            return ''  # fence or table row: wait for the whole line
+
+        cut = max(buffer.rfind(' '), buffer.rfind('\t'))
+        if cut < len(buffer) - len(buffer.lstrip()):
+            return ''  # no word yet
+        if self._line_start:
+            markup = LINE_MARKUP.match(buffer) or NUMBERED_ITEM.match(buffer)
+            if markup and markup.end() > cut:
+                return ''  # the block markup may still grow ("- [x] ")
+        prefix = buffer[:cut]  # the space stays buffered: the line may end right after it
+        if prefix.count('`') % 2 or prefix.rfind('[') > prefix.rfind(')'):
+            return ''  # inside inline code or a link
+        if EMPHASIS_OPEN.search(strip_emphasis(INLINE_CODE.sub('', prefix))):
+            return ''  # inside emphasis
+
+        self._buffer = buffer[cut:]
+        text = self._line(buffer[:cut + 1]).rstrip(' \t')
+        self._line_start = False
+        self._line_spoken = self._line_spoken or bool(text.strip())
+        return text
+
+
+# Process-wide totals, reported by the worker "stats" op
+_totals = {'texts': 0, 'chars_in': 0, 'chars_saved': 0}
+
+
+def make_speakable(text):
+    """
+    Clean a complete text for synthesis
+
+    Returns:
+        (speakable_text, characters_saved)
+    """
+    if not SPEAKABLE_ENABLED:
+        return text, 0
+    cleaner = SpeakableText()
+    spoken = (cleaner.feed(text) + cleaner.finish()).strip()
+    saved = len(text) - len(spoken)
+    _totals['texts'] += 1
+    _totals['chars_in'] += len(text)
+    _totals['chars_saved'] += saved
+    return spoken, saved
+
+
+def speakable_stats():
+    """Return the number of texts cleaned and the characters they lost"""
+    return dict(_totals)
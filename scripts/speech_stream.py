@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming speech recognition
+Feeds 16 kHz mono LINEAR16 audio to Google Cloud Speech-to-Text
+streaming_recognize in fixed-size chunks while it is being read (raw PCM
+from a file or stdin, or any file ffmpeg can decode) and yields interim
+and final results as they arrive, so later stages can start on the first
+final result instead of waiting for the whole upload and recognition.
+
+Requires google-cloud-speech, and ffmpeg (TTS_FFMPEG) for compressed input.
+
+Usage:
+    python speech_stream.py <audio_file | file.pcm | -> [--realtime]
+"""
+
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+# Force UTF-8 encoding for stdout/stderr on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2
+CHUNK_MS = 100  # recommended streaming frame size
+CHUNK_BYTES = BYTES_PER_SECOND * CHUNK_MS // 1000
+
+# streaming_recognize ends a stream after about 305 s of audio: longer
+# input is sent as consecutive streams
+STREAM_LIMIT_SECONDS = 290
+
+# Raw 16 kHz mono 16-bit little-endian input, sent as is
+RAW_EXTENSIONS = ('.pcm', '.raw')
+
+FFMPEG = os.getenv('TTS_FFMPEG', 'ffmpeg')
+LANGUAGE_CODE = 'ar-EG'
+ALTERNATIVE_LANGUAGE_CODES = ['en-US']
+
+TranscriptResult = namedtuple('TranscriptResult', ['text', 'is_final', 'stability', 'end_time'])
+
+
+def read_chunks(stream, chunk_bytes=CHUNK_BYTES, realtime=False):
+    """
+    Yield fixed-size chunks of a binary stream (the last one may be shorter)
+
+    With realtime, chunks are paced at the speed of the audio, like a
+    microphone.
+    """
+    while True:
+        chunk = stream.read(chunk_bytes)
+        if not chunk:
+            return
+        if realtime:
+            time.sleep(len(chunk) / BYTES_PER_SECOND)
+        yield chunk
+
+
+def pcm_chunks(source, chunk_bytes=CHUNK_BYTES, realtime=False):
+    """
+    Yield 16 kHz mono LINEAR16 chunks of an audio source
+
+    Args:
+        source: '-' for raw PCM on stdin, a .pcm / .raw file, or any other
+            audio file, decoded with ffmpeg while it is being sent
+        chunk_bytes: Size of every chunk but the last
+        realtime: Pace chunks at the speed of the audio
+
+    Raises:
+        RuntimeError: If ffmpeg is missing or cannot decode the file
+    """
+    if source == '-':
+        yield from read_chunks(sys.stdin.buffer, chunk_bytes, realtime)
+        return
+    if os.path.splitext(source)[1].lower() in RAW_EXTENSIONS:
+        with open(source, 'rb') as f:
+            yield from read_chunks(f, chunk_bytes, realtime)
+        return
+
+    try:
+        process = subprocess.Popen(
+            [FFMPEG, '-hide_banner', '-loglevel', 'error', '-i', source,
+             '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise RuntimeError(f"ffmpeg not found ('{FFMPEG}'); it is required to decode {source}")
+    try:
+        yield from read_chunks(process.stdout, chunk_bytes, realtime)
+        if process.wait() != 0:
+            error = process.stderr.read().decode('utf-8', 'replace').strip()
+            raise RuntimeError(f"ffmpeg failed: {error}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def streaming_config(interim_results=True):
+    """Return the StreamingRecognitionConfig used for LINEAR16 chunks"""
+    from google.cloud import speech
+
+    return speech.StreamingRecognitionConfig(
+        config=speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=SAMPLE_RATE,
+            language_code=LANGUAGE_CODE,
+            alternative_language_codes=ALTERNATIVE_LANGUAGE_CODES,
+            enable_automatic_punctuation=True,
+            model='latest_long'
+        ),
+        interim_results=interim_results
+    )
+
+
+def streaming_transcribe(client, chunks, interim_results=True):
+    """
+    Recognize a stream of LINEAR16 chunks (blocking, see stream_transcripts)
+
+    Args:
+        client: google.cloud.speech.SpeechClient
+        chunks: Iterable of audio chunks, consumed as the stream is sent
+        interim_results: Also yield the non-final hypotheses
+
+    Yields:
+        TranscriptResult; end_time is in seconds from the start of the audio
+    """
+    from google.cloud import speech
+
+    config = streaming_config(interim_results)
+    chunks = iter(chunks)
+    limit = STREAM_LIMIT_SECONDS * BYTES_PER_SECOND
+    offset = 0.0  # audio seconds sent in earlier streams
+    while True:
+        first = next(chunks, None)
+        if first is None:
+            return
+        sent = [0]
+
+        def requests(first=first, sent=sent):
+            for chunk in itertools.chain([first], chunks):
+                sent[0] += len(chunk)
+                yield speech.StreamingRecognizeRequest(audio_content=chunk)
+                if sent[0] >= limit:
+                    return
+
+        for response in client.streaming_recognize(config=config, requests=requests()):
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                yield TranscriptResult(
+                    result.alternatives[0].transcript.strip(),
+                    result.is_final,
+                    result.stability,
+                    offset + result.result_end_time.total_seconds()
+                )
+        offset += sent[0] / BYTES_PER_SECOND
+
+
+async def iterate_in_thread(iterable):
+    """
+    Consume a blocking iterable (gRPC stream, streamed Gemini answer) in a
+    worker thread and yield its items on the event loop as they arrive
+
+    Errors raised by the iterable are re-raised here.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    def run():
+        try:
+            for item in iterable:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    worker = loop.run_in_executor(None, run)
+    while True:
+        item = await queue.get()
+        if item is done:
+            break
+        if isinstance(item, Exception):
+            raise item
+        yield item
+    await worker
+
+
+async def stream_transcripts(client, chunks, interim_results=True):
+    """
+    Async iterator over streaming_transcribe() results
+
+    The blocking gRPC stream (and the reading of chunks) runs in a worker
+    thread; results are handed to the event loop as soon as they arrive.
+    """
+    async for result in iterate_in_thread(streaming_transcribe(client, chunks, interim_results)):
+        yield result
+
+
+def main():
+    """Main function"""
+    args = [arg for arg in sys.argv[1:] if arg != '--realtime']
+    if len(args) != 1:
+        print("Usage:")
+        print("  python speech_stream.py <audio_file | file.pcm | -> [--realtime]")
+        sys.exit(1)
+
+    from google.cloud import speech
+
+    client = speech.SpeechClient()
+    started = time.perf_counter()
+    chunks = pcm_chunks(args[0], realtime='--realtime' in sys.argv)
+    try:
+        for result in streaming_transcribe(client, chunks):
+            elapsed = time.perf_counter() - started
+            if result.is_final:
+                print(f"\r✅ [{elapsed:6.2f}s] {result.text}")
+            else:
+                print(f"\r… [{elapsed:6.2f}s] {result.text}", end='', flush=True)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
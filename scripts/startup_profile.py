@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-time profiling for the TTS scripts
+Runs a fresh interpreter with -X importtime and summarizes where cold
+start time goes, module by module
+"""
+
+import os
+import subprocess
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# What a plain tts_edge.py invocation imports, and what the first synthesis adds
+STARTUP_PATHS = {
+    'startup (usage, argument errors)': 'import tts_edge',
+    'first synthesis (+ edge_tts, aiohttp)': 'import tts_edge, edge_tts',
+}
+
+
+def profile_imports(code):
+    """
+    Run code in a fresh interpreter and return its import times
+
+    Returns:
+        List of (module, self_us, cumulative_us, depth), in import order
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def print_startup_report(top=15):
+    """Print the import-time breakdown of every STARTUP_PATHS entry"""
+    for label, code in STARTUP_PATHS.items():
+        imports = profile_imports(code)
+        total = sum(self_us for _, self_us, _, _ in imports)
+        print(f"\n=== Import time: {label} ===")
+        print(f"Total: {total / 1000:.1f} ms in {len(imports)} modules\n")
+
+        # Top-level imports and their direct children, by cumulative time
+        roots = [entry for entry in imports if entry[3] <= 1]
+        for name, self_us, cumulative_us, _ in sorted(roots, key=lambda e: -e[2])[:top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
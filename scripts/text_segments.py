@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Arabic-aware sentence splitting for TTS
+Cuts answers into segments that can be synthesized independently
+"""
+
+import re
+
+# Terminators: . ! ? and their Arabic forms (؟ question mark, ، comma, ؛ semicolon).
+# Punctuation only ends a segment when followed by whitespace or the end of the
+# text, so numbers like 3.5 and URLs stay intact. Newlines always end a segment.
+SEGMENT_BOUNDARY = re.compile(r'[.!?؟،؛]+(?=\s|$)|\n+')
+
+# Shorter pieces are merged into the next one so that comma-separated clauses
+# don't turn into choppy one-word requests
+MIN_SEGMENT_CHARS = 20
+
+# Pieces are joined with single spaces, so whitespace runs count as one
+SPACES = re.compile(r'\s+')
+
+
+def split_sentences(text, min_chars=MIN_SEGMENT_CHARS):
+    """
+    Split text into speakable segments at sentence and clause boundaries
+
+    Args:
+        text: The text to split
+        min_chars: Pieces shorter than this are merged with the next piece
+
+    Returns:
+        List of non-empty segments, in order
+    """
+    pieces = []
+    start = 0
+    for match in SEGMENT_BOUNDARY.finditer(text):
+        piece = text[start:match.end()].strip()
+        start = match.end()
+        if piece:
+            pieces.append(piece)
+    tail = text[start:].strip()
+    if tail:
+        pieces.append(tail)
+
+    segments = []
+    pending = ''
+    for piece in pieces:
+        pending = f'{pending} {piece}' if pending else piece
+        if len(pending) >= min_chars:
+            segments.append(pending)
+            pending = ''
+    if pending:
+        if segments:
+            segments[-1] = f'{segments[-1]} {pending}'
+        else:
+            segments.append(pending)
+
+    return segments
+
+
+class SentenceStream:
+    """
+    Incremental split_sentences() for text that arrives in pieces
+
+    feed() returns the segments completed by a piece of text: a boundary
+    only counts once the character after it has arrived (3.5, URLs), and
+    pieces shorter than min_chars are merged with the next one. The last
+    completed segment is held back only while the text after it is shorter
+    than min_chars, so that finish() can merge a short trailing piece into
+    it: the segments are exactly those of split_sentences() on the whole
+    text, and a sentence is released as soon as min_chars of the next one
+    have arrived.
+    """
+
+    def __init__(self, min_chars=MIN_SEGMENT_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ''
+        self._pending = ''
+        self._held = None
+
+    def feed(self, text):
+        """Add a piece of text and return the segments it completes"""
+        self._buffer += text
+        segments = []
+        start = 0
+        for match in SEGMENT_BOUNDARY.finditer(self._buffer):
+            if match.end() == len(self._buffer):
+                break  # the boundary may still grow or turn out not to be one
+            self._add(self._buffer[start:match.end()].strip(), segments)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        if self._held is not None and self._tail_length() >= self.min_chars:
+            # Never merged back: the text after it will make a segment of its own
+            segments.append(self._held)
+            self._held = None
+        return segments
+
+    def finish(self):
+        """Return the remaining segments (the held-back one and the rest)"""
+        segments = []
+        self._add(self._buffer.strip(), segments)
+        self._buffer = ''
+        if self._pending:
+            if self._held is not None:
+                self._held = f'{self._held} {self._pending}'
+            else:
+                self._held = self._pending
+            self._pending = ''
+        if self._held is not None:
+            segments.append(self._held)
+            self._held = None
+        return segments
+
+    def _tail_length(self):
+        """Lower bound of the length of the pieces after the held segment"""
+        rest = SPACES.sub(' ', self._buffer.strip())
+        if self._pending and rest:
+            return len(self._pending) + 1 + len(rest)
+        return len(self._pending) + len(rest)
+
+    def _add(self, piece, segments):
+        """Merge a piece into the pending segment and emit it once long enough"""
+        if not piece:
+            return
+        self._pending = f'{self._pending} {piece}' if self._pending else piece
+        if len(self._pending) >= self.min_chars:
+            if self._held is not None:
+                segments.append(self._held)
+            self._held = self._pending
+            self._pending = ''
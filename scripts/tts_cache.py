@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed TTS cache
+Stores synthesized audio on disk keyed by a hash of everything that affects
+the output, with a byte budget and least-recently-used eviction
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from arabic_text import canonicalize
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Environment configuration (TTS_CACHE=0 disables the cache)
+CACHE_ENABLED = os.getenv('TTS_CACHE', '1') != '0'
+CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(SCRIPT_DIR, '..', 'temp', 'tts_cache'))
+CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Seconds between rescans of the directory for entries of other processes
+CACHE_RESCAN_INTERVAL = float(os.getenv('TTS_CACHE_RESCAN', '60'))
+
+ENTRY_SUFFIX = '.audio'
+# Readable by other users and services sharing the directory (mkstemp uses 0600)
+ENTRY_MODE = 0o644
+
+
+def normalize_text(text):
+    """Normalize text for cache keys (see arabic_text.canonicalize)"""
+    return canonicalize(text)
+
+
+def make_key(text, voice, rate, pitch, output_format):
+    """Return the cache key for one synthesis request"""
+    fields = [normalize_text(text), voice, rate, pitch, output_format]
+    return hashlib.sha256('\x1f'.join(fields).encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """
+    On-disk LRU cache of synthesized audio
+
+    Entries are written atomically (temporary file + rename), so concurrent
+    writers, including other processes sharing the directory, never expose
+    a partial entry. Recency survives restarts through file mtimes.
+
+    Processes sharing the directory share its byte budget: an entry missing
+    from the index is looked up on disk (another process may have written
+    it), and the directory is rescanned every rescan_interval seconds
+    before evicting, so entries written by other processes are counted and
+    evicted too. Recency across processes comes from the mtimes that every
+    hit refreshes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES,
+                 rescan_interval=CACHE_RESCAN_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_interval = rescan_interval
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._lock = threading.Lock()
+        self._scanned_at = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """(Re)build the index from the directory, oldest access first"""
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(ENTRY_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # evicted meanwhile
+                found.append((stat.st_mtime, entry.name[:-len(ENTRY_SUFFIX)], stat.st_size))
+
+        self._entries.clear()
+        self.total_bytes = 0
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.total_bytes += size
+        self._scanned_at = time.monotonic()
+
+    def path_for(self, key):
+        """Return the file path of an entry"""
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Return the cached audio bytes for key, or None on a miss"""
+        path = self.path_for(key)
+        with self._lock:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)
+            except FileNotFoundError:
+                # Never stored, or evicted by another process sharing the directory
+                self.total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+                return None
+            # Entries written by other processes join the index on their first hit
+            self.total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """Store audio bytes under key and evict old entries over budget"""
+        if len(data) > self.max_bytes:
+            return
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(temp_path, ENTRY_MODE)
+            os.replace(temp_path, self.path_for(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        with self._lock:
+            if time.monotonic() - self._scanned_at >= self.rescan_interval:
+                self._load()  # includes the entry just written
+            else:
+                self.total_bytes -= self._entries.pop(key, 0)
+                self._entries[key] = len(data)
+                self.total_bytes += len(data)
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the budget is met"""
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.unlink(self.path_for(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Return the process-wide cache, or None when disabled via TTS_CACHE=0"""
+    global _default_cache
+    if not CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = TTSCache()
+    return _default_cache
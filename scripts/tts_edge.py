@@ -6,9 +6,27 @@ This script converts Arabic text to speech using Microsoft Edge's online TTS
 """
 
 import asyncio
-import edge_tts
+import json
+import random
+import struct
 import sys
 import os
+import time
+
+from audio_bundle import get_bundle
+from edge_service import import_edge_tts
+from mp3_frames import SegmentReader
+from mp3_index import FrameIndex
+from phrase_bank import PHRASE_BANK_FILE, PhraseBank, get_phrase_bank, load_phrases, set_phrase_bank
+from phrase_packing import PACK_MAX_CHARS, PACK_MAX_PHRASE_CHARS, group_phrases, pack_phrases, split_packed
+from single_flight import get_single_flight
+from speakable_text import make_speakable, speakable_stats
+from text_segments import split_sentences
+from tts_cache import get_default_cache, make_key
+from tts_latency import (REQUEST_DEADLINE, UPSTREAM_BACKOFF, UPSTREAM_RETRIES, DeadlineExceeded, UpstreamExhausted,
+                         get_latency_tracker, race_first_audio)
+from voice_catalog import BUILTIN_VOICES, get_catalog, resolve_voice
+import word_timings
 
 # Force UTF-8 encoding for stdout/stderr on Windows
 if sys.platform == 'win32':
@@ -17,33 +35,41 @@ if sys.platform == 'win32':
 
 
 # Arabic voices from Microsoft Edge TTS
-ARABIC_VOICES = [
-    'ar-SA-ZariNeural',      # Female, Saudi Arabia
-    'ar-SA-OmarNeural',      # Male, Saudi Arabia
-    'ar-EG-SalmaNeural',     # Female, Egypt
-    'ar-EG-ShakirNeural',    # Male, Egypt
-    'ar-IOR-LaylaNeural',    # Female, Iraq
-    'ar-IOR-YoussefNeural',  # Male, Iraq
-    'ar-JO-FatimaNeural',    # Female, Jordan
-    'ar-JO-SanaNeural',      # Female, Jordan
-    'ar-JO-TaimNeural',      # Male, Jordan
-    'ar-KW-FahedNeural',     # Male, Kuwait
-    'ar-KW-NouraNeural',     # Female, Kuwait
-    'ar-LB-LaylaNeural',     # Female, Lebanon
-    'ar-LB-RamiNeural',      # Male, Lebanon
-    'ar-QA-AmalNeural',      # Female, Qatar
-    'ar-QA-MoazNeural',      # Male, Qatar
-    'ar-AE-FatimaNeural',    # Female, UAE
-    'ar-AE-HamdanNeural',    # Male, UAE
-    'ar-YA-MaryamNeural',    # Female, Yemen
-    'ar-YA-SalehNeural',     # Male, Yemen
-]
+ARABIC_VOICES = [name for name, _ in BUILTIN_VOICES]
 
 # Default voice (Egyptian Female)
 DEFAULT_VOICE = 'ar-EG-SalmaNeural'
 
+# Worker (--serve) protocol: every result frame is
+#   >II header_length payload_length | JSON header | payload bytes
+FRAME_HEADER = struct.Struct('>II')
+DEFAULT_CONCURRENCY = 8
+
+# Segments of one answer synthesized at the same time (--segmented)
+SEGMENT_CONCURRENCY = 4
+
+# Audio format produced by edge-tts (part of every cache key)
+OUTPUT_FORMAT = 'audio-24khz-48kbitrate-mono-mp3'
+OUTPUT_BITRATE = 48000
+
+# Cache entries holding the word timings of an audio entry use its key + suffix
+WORDS_KEY_SUFFIX = '-words'
+
+# Formats accepted by the output_format option: 'mp3' as produced by edge-tts,
+# or 'pcm' (16-bit mono little-endian, see pcm_audio.py)
+OUTPUT_FORMATS = ('mp3', 'pcm')
+PCM_SAMPLE_RATE = 24000  # same rate as the Gemini Live audio played by the browser
+
+# Batch (--batch) retry policy for transient failures
+BATCH_RETRIES = 3
+BATCH_BACKOFF = 0.5  # seconds, doubled on every attempt
+BATCH_PROGRESS_INTERVAL = 5.0  # seconds
+BATCH_REQUIRED_FIELDS = ('text', 'output')
 
-async def text_to_speech(text, output_file, voice=None, rate='+0%', pitch='+0Hz'):
+
+async def text_to_speech(text, output_file, voice=None, rate='+0%', pitch='+0Hz',
+                         segmented=False, output_format='mp3', sample_rate=None,
+                         timings_file=None):
     """
     Convert text to speech using edge-tts
     
@@ -53,6 +79,11 @@ async def text_to_speech(text, output_file, voice=None, rate='+0%', pitch='+0Hz'
         voice: The voice to use (default: ar-SA-ZariNeural)
         rate: Speaking rate (default: +0%)
         pitch: Pitch adjustment (default: +0Hz)
+        segmented: Synthesize sentences in parallel (see stream_segmented)
+        output_format: 'mp3' or 'pcm' (raw 16-bit mono)
+        sample_rate: PCM sample rate (default: 24000)
+        timings_file: Also write the word timing track here (.bin: packed
+            uint32 offset/duration pairs, otherwise JSON lines)
     """
     if not text:
         raise ValueError("Text cannot be empty")
@@ -64,32 +95,834 @@ async def text_to_speech(text, output_file, voice=None, rate='+0%', pitch='+0Hz'
     print(f"[TTS] Using voice: {voice}")
     print(f"[TTS] Text: {text[:50]}...")
     
-    # Create the communicate object
-    communicate = edge_tts.Communicate(
-        text=text,
-        voice=voice
-    )
-    
-    # Save audio to file
-    await communicate.save(output_file)
+    # Synthesize (or fetch from the cache) and save audio to file
+    timings = [] if timings_file else None
+    audio = await synthesize_bytes(text, voice, rate, pitch, segmented, output_format,
+                                   sample_rate, timings)
+    with open(output_file, 'wb') as f:
+        f.write(audio)
     
     print(f"[TTS] Audio saved to: {output_file}")
+
+    if timings_file:
+        word_timings.write_timings(timings_file, timings)
+        print(f"[TTS] Word timings ({len(timings)} words) saved to: {timings_file}")
     
     # Get file size
     file_size = os.path.getsize(output_file)
     print(f"[TTS] File size: {file_size} bytes")
+    if output_format == 'mp3':
+        print(f"[TTS] Duration: {FrameIndex.from_buffer(audio).duration:.2f}s")
     
     return output_file
 
 
+async def synthesize_bytes(text, voice=None, rate='+0%', pitch='+0Hz', segmented=False,
+                           output_format='mp3', sample_rate=None, timings=None, clean=True):
+    """
+    Convert text to speech and return the audio as bytes (no file is written)
+    """
+    chunks = stream_audio(text, voice, rate, pitch, segmented, output_format, sample_rate, timings,
+                          clean)
+    return b''.join([chunk async for chunk in chunks])
+
+
+async def synthesize_packed(phrases, voice=None, rate='+0%', pitch='+0Hz'):
+    """
+    Synthesize short phrases with one edge-tts request per pack of phrases
+    and cut the audio back into one MP3 clip per phrase (see phrase_packing.py)
+
+    Args:
+        phrases: List of texts, all spoken with the same voice, rate and pitch
+
+    Returns:
+        List of (mp3_bytes, timings) pairs, in the order of phrases
+    """
+    # Cleaned once, up front: the packed text must not change again, or the
+    # phrase spans would no longer match it
+    phrases = [make_speakable(phrase)[0] for phrase in phrases]
+    results = [None] * len(phrases)
+    for group in group_phrases(phrases):
+        text, spans = pack_phrases([phrases[index] for index in group])
+        timings = []
+        audio = await synthesize_bytes(text, voice, rate, pitch, timings=timings, clean=False)
+        try:
+            clips = split_packed(audio, text, spans, timings)
+        except ValueError as e:
+            # No reliable place to cut: fall back to one request per phrase
+            print(f"[TTS] Packed synthesis not split ({e}), synthesizing {len(group)} phrases one by one")
+            clips = []
+            for index in group:
+                words = []
+                clips.append((await synthesize_bytes(phrases[index], voice, rate, pitch,
+                                                     timings=words, clean=False), words))
+        for index, clip in zip(group, clips):
+            results[index] = clip
+    return results
+
+
+def stream_audio(text, voice=None, rate='+0%', pitch='+0Hz', segmented=False,
+                 output_format='mp3', sample_rate=None, timings=None, clean=True):
+    """
+    Return an async iterator of audio chunks in the requested format
+
+    Args:
+        segmented: Synthesize sentences in parallel (see stream_segmented)
+        output_format: 'mp3' or 'pcm' (16-bit mono, decoded while streaming)
+        sample_rate: PCM sample rate (default: 24000, the browser player rate)
+        timings: Optional list receiving the WordTiming of every spoken word
+        clean: Make the text speakable first (False for text already cleaned)
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    # Markdown, URLs and emoji are not spoken (see speakable_text.py)
+    if text and clean:
+        text, saved = make_speakable(text)
+        if saved > 0:
+            print(f"[TTS] Speakable text: {saved} of {len(text) + saved} characters removed")
+
+    # Phrases of the warm phrase bank are served from memory
+    bank = get_phrase_bank()
+    audio = None
+    if bank is not None and text:
+        voice = resolve_voice(voice or DEFAULT_VOICE)
+        audio = bank.get(text, voice, rate, pitch, timings)
+
+    if audio is not None:
+        chunks = iterate_bytes(audio)
+    else:
+        source = stream_segmented if segmented else stream_speech
+        chunks = source(text, voice, rate, pitch, timings)
+    if output_format == 'pcm':
+        from pcm_audio import mp3_to_pcm_stream
+        return mp3_to_pcm_stream(chunks, int(sample_rate or PCM_SAMPLE_RATE))
+    return chunks
+
+
+async def iterate_bytes(data):
+    """Async iterator yielding data as a single chunk"""
+    yield data
+
+
+async def stream_speech(text, voice=None, rate='+0%', pitch='+0Hz', timings=None):
+    """
+    Convert text to speech, yielding MP3 audio chunks as edge-tts produces them
+
+    Results are served from the audio bundle of TTS_BUNDLE (see
+    audio_bundle.py) if set, then from the synthesis cache, where new
+    results are stored unless it is disabled with TTS_CACHE=0. Concurrent
+    identical requests are coalesced into one edge-tts call (see
+    single_flight.py). If a timings list is given, the WordBoundary events
+    of the same synthesis are appended to it as WordTiming tuples.
+
+    Usage:
+        async for chunk in stream_speech('مرحباً بك'):
+            player.feed(chunk)
+    """
+    if not text:
+        raise ValueError("Text cannot be empty")
+
+    # Validate the voice and resolve aliases (female-eg...) locally
+    voice = resolve_voice(voice or DEFAULT_VOICE)
+    key = make_key(text, voice, rate, pitch, OUTPUT_FORMAT)
+    cache = get_default_cache()
+    for name, store in (('Bundle', get_bundle()), ('Cache', cache)):
+        if store is None:
+            continue
+        audio = store.get(key)
+        if audio is not None and timings is not None:
+            words = store.get(key + WORDS_KEY_SUFFIX)
+            if words is None:
+                audio = None  # synthesize again to recover the timings
+            else:
+                timings.extend(word_timings.from_jsonl(words))
+        if audio is not None:
+            print(f"[TTS] {name} hit: {key[:12]}")
+            yield audio
+            return
+
+    # Identical requests already in flight share one upstream synthesis
+    async def produce(flight):
+        await synthesize_upstream(flight, text, voice, rate, pitch, cache, key)
+
+    async for chunk in get_single_flight().stream(key, produce, timings):
+        yield chunk
+
+
+async def synthesize_upstream(flight, text, voice, rate, pitch, cache=None, key=None):
+    """
+    Run one edge-tts synthesis, publishing its audio chunks and word
+    timings to flight, and store the result in the cache
+
+    The synthesis must finish within REQUEST_DEADLINE. Failures before the
+    first audio chunk are retried with jittered backoff while the deadline
+    allows it; slow first chunks are hedged (see tts_latency.py).
+
+    Raises:
+        DeadlineExceeded: REQUEST_DEADLINE passed
+        UpstreamExhausted: Every upstream retry failed (the last error is its cause)
+    """
+    # Imported here: edge_tts pulls in aiohttp, which dominates startup time
+    edge_tts = import_edge_tts()
+
+    def start():
+        return edge_tts.Communicate(text=text, voice=voice, rate=rate, pitch=pitch).stream()
+
+    tracker = get_latency_tracker()
+    tracker.requests += 1
+    deadline = time.monotonic() + REQUEST_DEADLINE
+    for attempt in range(UPSTREAM_RETRIES + 1):
+        flight.words.clear()
+        try:
+            await asyncio.wait_for(stream_upstream(flight, start, tracker),
+                                   deadline - time.monotonic())
+            break
+        except ValueError:
+            raise
+        except Exception as e:
+            # Only the deadline is a timeout here; aiohttp timeouts are retried like other errors
+            if isinstance(e, asyncio.TimeoutError) and deadline - time.monotonic() <= 0:
+                tracker.timeouts += 1
+                raise DeadlineExceeded(f"Synthesis exceeded its {REQUEST_DEADLINE:g}s deadline") from e
+            if flight.chunks:
+                raise  # audio was already published, a retry would repeat it
+            delay = retry_delay(attempt, UPSTREAM_BACKOFF)
+            if attempt == UPSTREAM_RETRIES or time.monotonic() + delay >= deadline:
+                raise UpstreamExhausted(f"{e} (after {attempt} upstream retries)") from e
+            tracker.retries += 1
+            print(f"[TTS] Upstream retry {attempt + 1}/{UPSTREAM_RETRIES} in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+
+    if cache is not None and flight.chunks:
+        audio, words = b''.join(flight.chunks), word_timings.to_jsonl(flight.words)
+
+        def store():
+            cache.put(key, audio)
+            cache.put(key + WORDS_KEY_SUFFIX, words)
+
+        # In a thread: writing entries and rescanning the directory would block the event loop
+        await asyncio.get_running_loop().run_in_executor(None, store)
+
+
+async def stream_upstream(flight, start, tracker):
+    """Stream one (possibly hedged) edge-tts request into flight and record its latency"""
+    started = time.perf_counter()
+    leading, events = await race_first_audio(start, tracker)
+    # TTFB is the first audio chunk, not the first (metadata) event
+    tracker.ttfb.append(time.perf_counter() - started)
+
+    def handle(event):
+        if event['type'] == 'audio':
+            flight.publish(event['data'])
+        elif event['type'] == 'WordBoundary':
+            flight.words.append(word_timings.from_boundary(event))
+
+    for event in leading:
+        handle(event)
+    async for event in events:
+        handle(event)
+    tracker.total.append(time.perf_counter() - started)
+
+
+async def stream_segmented(text, voice=None, rate='+0%', pitch='+0Hz', timings=None,
+                           concurrency=SEGMENT_CONCURRENCY):
+    """
+    Split text into sentences, synthesize them concurrently and yield the
+    audio chunks strictly in sentence order
+
+    The first sentence streams as soon as edge-tts produces it while the
+    following ones render in the background (at most `concurrency` at a time),
+    so latency no longer grows with the length of the answer. Word timings
+    are shifted by the duration of the preceding segments.
+    """
+    if not text:
+        raise ValueError("Text cannot be empty")
+
+    async def segments():
+        for segment in split_sentences(text):
+            yield segment
+
+    async for chunk in stream_sentences(segments(), voice, rate, pitch, timings, concurrency):
+        yield chunk
+
+
+async def stream_sentences(sentences, voice=None, rate='+0%', pitch='+0Hz', timings=None,
+                           concurrency=SEGMENT_CONCURRENCY):
+    """
+    Synthesize sentences as they arrive and yield the audio chunks strictly
+    in sentence order
+
+    Args:
+        sentences: Async iterable of sentences, e.g. cut from a streamed LLM
+            answer while it is still being generated
+
+    Each sentence starts rendering as soon as it arrives (at most
+    `concurrency` at a time) while earlier ones are still streaming. The
+    sentences are joined at frame boundaries (mp3_frames.SegmentReader):
+    tags and header frames are dropped, encoder delay and padding trimmed
+    when a LAME tag records them, and word timings are shifted by the
+    exact duration of the frames written.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    order = asyncio.Queue()  # (audio queue, timings) per sentence, then None
+    tasks = []
+
+    async def render(segment, queue, words):
+        try:
+            async with semaphore:
+                async for chunk in stream_speech(segment, voice, rate, pitch, words):
+                    queue.put_nowait(chunk)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    async def collect():
+        try:
+            async for segment in sentences:
+                queue, words = asyncio.Queue(), []
+                tasks.append(asyncio.create_task(render(segment, queue, words)))
+                order.put_nowait((queue, words))
+            order.put_nowait(None)
+        except Exception as e:
+            order.put_nowait(e)
+
+    collector = asyncio.create_task(collect())
+    try:
+        elapsed = 0.0  # seconds of audio written
+        while True:
+            entry = await order.get()
+            if entry is None:
+                break
+            if isinstance(entry, Exception):
+                raise entry
+            queue, words = entry
+            reader = SegmentReader()
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                frames = reader.feed(item)
+                if frames:
+                    yield frames
+            frames = reader.finish()
+            if frames:
+                yield frames
+            if timings is not None:
+                timings.extend(word_timings.shift(words, round(elapsed * 1000)))
+            if reader.header is not None:
+                elapsed += reader.samples / reader.header.sample_rate
+    finally:
+        collector.cancel()
+        for task in tasks:
+            task.cancel()
+
+
+async def stream_to_stdout(text, voice=None, rate='+0%', pitch='+0Hz', segmented=False,
+                           output_format='mp3', sample_rate=None, timings_file=None):
+    """
+    Write audio to stdout as it arrives: one "chunk" frame per audio chunk,
+    then a "done" frame (same framing as the worker protocol)
+    """
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+
+    timings = [] if timings_file else None
+    size = 0
+    async for chunk in stream_audio(text, voice, rate, pitch, segmented, output_format,
+                                    sample_rate, timings):
+        size += len(chunk)
+        out.write(encode_frame({'type': 'chunk'}, chunk))
+        out.flush()
+    out.write(encode_frame({'type': 'done', 'size': size}))
+    out.flush()
+
+    if timings_file:
+        word_timings.write_timings(timings_file, timings)
+
+
+async def warm_phrase_bank(path=PHRASE_BANK_FILE):
+    """
+    Load a phrase bank file and render its phrases concurrently
+
+    The bank is installed before rendering, so phrases are served from
+    memory as soon as each one is ready.
+    """
+    phrases = load_phrases(path, DEFAULT_VOICE)
+    bank = PhraseBank()
+    set_phrase_bank(bank)
+
+    async def render(text, voice, timings):
+        return b''.join([chunk async for chunk in stream_speech(text, voice, timings=timings)])
+
+    start = time.perf_counter()
+    failures = await bank.warm(phrases, render)
+    stats = bank.stats()
+    print(f"[TTS] Phrase bank: {stats['phrases']}/{len(phrases)} phrases in "
+          f"{time.perf_counter() - start:.2f}s, {stats['memory_bytes']:,} bytes in memory")
+    return bank, failures
+
+
+def worker_stats():
+    """Return the counters reported by the worker "stats" op"""
+    cache = get_default_cache()
+    bank = get_phrase_bank()
+    bundle = get_bundle()
+    return {
+        'cache': cache.stats() if cache is not None else None,
+        'bundle': bundle.stats() if bundle is not None else None,
+        'phrase_bank': bank.stats() if bank is not None else None,
+        'single_flight': get_single_flight().stats(),
+        'latency': get_latency_tracker().stats(),
+        'speakable': speakable_stats(),
+    }
+
+
+def encode_frame(header, payload=b''):
+    """Encode one worker result frame (see FRAME_HEADER)"""
+    head = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    return FRAME_HEADER.pack(len(head), len(payload)) + head + payload
+
+
+def job_options(job):
+    """Return the synthesis options of a worker or manifest job"""
+    return {
+        'segmented': bool(job.get('segmented')),
+        'output_format': job.get('format') or 'mp3',
+        'sample_rate': job.get('sample_rate'),
+    }
+
+
+async def handle_job(line, send, semaphore):
+    """
+    Run one newline-delimited JSON job and send its result frame
+
+    Job fields: id, text, voice, rate, pitch and optionally output or
+    stream. With an output path the audio is written there; with
+    "stream": true it is sent as "chunk" frames as soon as it arrives;
+    otherwise it is returned as the "done" frame payload. "segmented": true
+    synthesizes the sentences in parallel and "format": "pcm" (with an
+    optional "sample_rate") returns 16-bit mono PCM. "timings": true adds
+    the word timings ("words": [{text, offset, duration}], in ms) to the
+    done frame. Non-streamed MP3 results report their "duration" (seconds,
+    from the frame headers). "deadline" (seconds) bounds the whole job, queueing
+    included. A job with "op": "stats" is answered with the worker
+    counters instead, and "op": "warm_phrases" (optional "path") reloads
+    the phrase bank.
+    """
+    job_id = None
+    try:
+        job = json.loads(line)
+        job_id = job.get('id')
+        if job.get('op') == 'stats':
+            await send({'id': job_id, 'type': 'stats', **worker_stats()})
+            return
+        if job.get('op') == 'warm_phrases':
+            bank, failures = await warm_phrase_bank(job.get('path') or PHRASE_BANK_FILE)
+            await send({'id': job_id, 'type': 'done', 'failed': failures, **bank.stats()})
+            return
+
+        text = job.get('text')
+        voice = job.get('voice') or DEFAULT_VOICE
+        rate = job.get('rate') or '+0%'
+        pitch = job.get('pitch') or '+0Hz'
+        output_file = job.get('output')
+        options = job_options(job)
+        timings = [] if job.get('timings') else None
+        done = {'id': job_id, 'type': 'done'}
+        payload = b''
+
+        async def run():
+            nonlocal payload
+            async with semaphore:
+                if job.get('stream') and not output_file:
+                    size = 0
+                    async for chunk in stream_audio(text, voice, rate, pitch, timings=timings,
+                                                    **options):
+                        size += len(chunk)
+                        await send({'id': job_id, 'type': 'chunk'}, chunk)
+                    done['size'] = size
+                else:
+                    audio = await synthesize_bytes(text, voice, rate, pitch, timings=timings,
+                                                   **options)
+                    done['size'] = len(audio)
+                    if options['output_format'] == 'mp3':
+                        done['duration'] = FrameIndex.from_buffer(audio).duration
+                    if output_file:
+                        write_file_atomic(output_file, audio)
+                        done['output'] = output_file
+                    else:
+                        payload = audio
+
+        deadline = job.get('deadline')
+        if deadline:
+            try:
+                await asyncio.wait_for(run(), float(deadline))
+            except DeadlineExceeded:
+                raise  # REQUEST_DEADLINE of the upstream synthesis, not the job deadline
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Deadline of {float(deadline):g}s exceeded")
+        else:
+            await run()
+
+        if timings is not None:
+            done['words'] = [timing._asdict() for timing in timings]
+        await send(done, payload)
+    except Exception as e:
+        await send({'id': job_id, 'type': 'error', 'error': str(e)})
+
+
+async def serve_stream(readline, write, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Serve jobs from one connection until EOF
+
+    Args:
+        readline: Coroutine function returning the next line (b'' at EOF)
+        write: Function writing one encoded frame
+        concurrency: Maximum number of syntheses running at once
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    lock = asyncio.Lock()
+    tasks = set()
+
+    async def send(header, payload=b''):
+        async with lock:
+            await write(encode_frame(header, payload))
+
+    while True:
+        line = await readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        task = asyncio.create_task(handle_job(line, send, semaphore))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def serve(socket_path=None, concurrency=DEFAULT_CONCURRENCY, phrase_bank=PHRASE_BANK_FILE):
+    """
+    Long-running worker mode: read JSON jobs, answer with result frames
+
+    Jobs are read from stdin (frames go to stdout) or, with socket_path,
+    from every client of a Unix socket. Log output goes to stderr so that
+    stdout only carries frames. The phrase bank file, if it exists, is
+    warmed in the background while jobs are already being served.
+    """
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    loop = asyncio.get_running_loop()
+    get_catalog().schedule_refresh()
+    warm_task = None
+    if phrase_bank and os.path.exists(phrase_bank):
+        warm_task = loop.create_task(warm_phrase_bank(phrase_bank))
+    try:
+        await serve_clients(out, socket_path, concurrency)
+    finally:
+        # The warm-up may still be running at EOF: stop it, and surface its error if it failed
+        if warm_task is not None:
+            warm_task.cancel()
+            results = await asyncio.gather(warm_task, return_exceptions=True)
+            if isinstance(results[0], Exception):
+                print(f"[TTS] Phrase bank warm-up failed: {results[0]}")
+
+
+async def serve_clients(out, socket_path, concurrency):
+    """Serve jobs from stdin (frames written to out), or from every client of the Unix socket socket_path"""
+    loop = asyncio.get_running_loop()
+    if socket_path is None:
+        async def write_stdout(frame):
+            out.write(frame)
+            out.flush()
+
+        print(f"[TTS] Worker ready on stdin (concurrency {concurrency})")
+        await serve_stream(
+            lambda: loop.run_in_executor(None, sys.stdin.buffer.readline),
+            write_stdout,
+            concurrency
+        )
+        return
+
+    async def on_client(reader, writer):
+        async def write_socket(frame):
+            writer.write(frame)
+            await writer.drain()
+
+        try:
+            await serve_stream(reader.readline, write_socket, concurrency)
+        finally:
+            writer.close()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(on_client, path=socket_path)
+    print(f"[TTS] Worker listening on {socket_path} (concurrency {concurrency})")
+    async with server:
+        await server.serve_forever()
+
+
+def audio_duration(size, options):
+    """Estimate the duration in seconds of size bytes of audio in the given format"""
+    if options['output_format'] == 'pcm':
+        return size / 2 / int(options['sample_rate'] or PCM_SAMPLE_RATE)
+    return size * 8 / OUTPUT_BITRATE
+
+
+def write_file_atomic(path, data):
+    """Write data to path via a temporary file so readers never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def retry_delay(attempt, backoff=BATCH_BACKOFF):
+    """Jittered exponential backoff delay in seconds before retry number attempt + 1"""
+    return backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+async def call_with_retry(call, retries=BATCH_RETRIES):
+    """
+    Await call(), retrying transient failures with jittered exponential
+    backoff. ValueError (bad input) is never retried, nor is a synthesis
+    that already used up its upstream retries (UpstreamExhausted), so the
+    batch retries do not multiply the upstream ones.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await call()
+        except (ValueError, UpstreamExhausted):
+            raise
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = retry_delay(attempt)
+            print(f"[TTS] Retry {attempt + 1}/{retries} in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+
+
+async def synthesize_with_retry(job, retries=BATCH_RETRIES, timings=None):
+    """Synthesize one manifest job, retrying transient failures (see call_with_retry)"""
+    async def call():
+        if timings is not None:
+            timings.clear()
+        return await synthesize_bytes(
+            job['text'],
+            job.get('voice') or DEFAULT_VOICE,
+            job.get('rate') or '+0%',
+            job.get('pitch') or '+0Hz',
+            timings=timings,
+            **job_options(job)
+        )
+
+    return await call_with_retry(call, retries)
+
+
+def validate_batch_job(job):
+    """
+    Check the fields of a manifest job
+
+    Raises:
+        ValueError: If the job is not an object or a required field is missing or empty
+    """
+    if not isinstance(job, dict):
+        raise ValueError("job must be a JSON object")
+    for field in BATCH_REQUIRED_FIELDS:
+        if field not in job or job[field] is None:
+            raise ValueError(f"missing field '{field}'")
+        if not isinstance(job[field], str) or not job[field].strip():
+            raise ValueError(f"field '{field}' must be a non-empty string")
+
+
+def is_packable(job):
+    """True for manifest jobs short enough to share a packed request (MP3 only)"""
+    text = job.get('text')
+    return (bool(text) and bool(job.get('output')) and len(text) <= PACK_MAX_PHRASE_CHARS
+            and not job.get('segmented') and (job.get('format') or 'mp3') == 'mp3')
+
+
+async def run_batch(manifest_path, concurrency=DEFAULT_CONCURRENCY, retries=BATCH_RETRIES,
+                    pack=False):
+    """
+    Synthesize every job of a JSON-lines manifest
+
+    Each line holds text, output and optionally voice, rate, pitch,
+    segmented, format, sample_rate and timings (path of a word timing
+    track). Relative outputs are resolved against the manifest directory
+    and existing outputs are skipped. The manifest is read lazily through a
+    bounded queue, so its size does not matter.
+
+    With pack, short MP3 jobs sharing voice, rate and pitch are synthesized
+    together, one request per pack (see synthesize_packed).
+
+    Returns:
+        Dict of counters (done, skipped, failed, elapsed, audio_seconds)
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    get_catalog().schedule_refresh()
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    stats = {'done': 0, 'skipped': 0, 'failed': 0, 'audio_seconds': 0.0}
+    start = time.perf_counter()
+    last_progress = start
+
+    def progress():
+        elapsed = time.perf_counter() - start
+        finished = stats['done'] + stats['skipped'] + stats['failed']
+        print(f"[TTS] {finished} jobs ({stats['done']} done, {stats['skipped']} skipped, "
+              f"{stats['failed']} failed) in {elapsed:.1f}s")
+
+    def save(job, audio, timings):
+        write_file_atomic(os.path.join(base_dir, job['output']), audio)
+        if timings is not None:
+            word_timings.write_timings(os.path.join(base_dir, job['timings']), timings)
+        stats['done'] += 1
+        stats['audio_seconds'] += audio_duration(len(audio), job_options(job))
+
+    async def run_job(line_number, job):
+        try:
+            if os.path.exists(os.path.join(base_dir, job['output'])):
+                stats['skipped'] += 1
+                return
+            timings = [] if job.get('timings') else None
+            audio = await synthesize_with_retry(job, retries, timings)
+            save(job, audio, timings)
+        except Exception as e:
+            stats['failed'] += 1
+            print(f"❌ Line {line_number}: {e}")
+
+    async def run_pack(items):
+        pending = [(line_number, job) for line_number, job in items
+                   if not os.path.exists(os.path.join(base_dir, job['output']))]
+        stats['skipped'] += len(items) - len(pending)
+        if not pending:
+            return
+        job = pending[0][1]
+        try:
+            clips = await call_with_retry(lambda: synthesize_packed(
+                [job['text'] for _, job in pending],
+                job.get('voice') or DEFAULT_VOICE,
+                job.get('rate') or '+0%',
+                job.get('pitch') or '+0Hz'
+            ), retries)
+            for (_, job), (audio, timings) in zip(pending, clips):
+                save(job, audio, timings if job.get('timings') else None)
+        except Exception as e:
+            stats['failed'] += len(pending)
+            print(f"❌ Lines {', '.join(str(line_number) for line_number, _ in pending)}: {e}")
+
+    async def worker():
+        nonlocal last_progress
+        while True:
+            items = await queue.get()
+            if items is None:
+                return
+            if len(items) == 1 and not is_packable(items[0][1]) or not pack:
+                await run_job(*items[0])
+            else:
+                await run_pack(items)
+            if time.perf_counter() - last_progress >= BATCH_PROGRESS_INTERVAL:
+                last_progress = time.perf_counter()
+                progress()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+    # Packs being filled, by (voice, rate, pitch): [items, characters]
+    packs = {}
+    with open(manifest_path, 'r', encoding='utf-8') as manifest:
+        for line_number, line in enumerate(manifest, 1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+                validate_batch_job(job)
+            except json.JSONDecodeError as e:
+                stats['failed'] += 1
+                print(f"❌ Line {line_number}: invalid JSON ({e})")
+                continue
+            except ValueError as e:
+                stats['failed'] += 1
+                print(f"❌ Line {line_number}: {e}")
+                continue
+            if not (pack and is_packable(job)):
+                await queue.put([(line_number, job)])
+                continue
+
+            key = (job.get('voice') or DEFAULT_VOICE, job.get('rate') or '+0%', job.get('pitch') or '+0Hz')
+            items, size = packs.setdefault(key, [[], 0])
+            if items and size + len(job['text']) + 2 > PACK_MAX_CHARS:
+                await queue.put(items)
+                items, size = [], 0
+            items.append((line_number, job))
+            packs[key] = [items, size + len(job['text']) + 2]
+
+    for items, _ in packs.values():
+        await queue.put(items)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+
+    progress()
+    elapsed = time.perf_counter() - start
+    audio_seconds = stats['audio_seconds']
+    print(f"[TTS] Throughput: {stats['done'] / elapsed:.2f} jobs/s, "
+          f"{audio_seconds / elapsed:.2f} audio-seconds/s")
+    return {**stats, 'elapsed': elapsed}
+
+
+# Command line options that take a value (everything else starting with -- is a flag)
+VALUE_OPTIONS = ('--socket', '--concurrency', '--retries', '--format', '--sample-rate',
+                 '--timings', '--phrase-bank')
+
+
+def get_option(args, name, default=None):
+    """Return the value following --name in args, or default"""
+    if name in args:
+        index = args.index(name)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return default
+
+
+def get_positional(args):
+    """Return args without --flags and --options with their values"""
+    positional = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in VALUE_OPTIONS:
+            skip = True
+        elif not arg.startswith('--'):
+            positional.append(arg)
+    return positional
+
+
+def output_options(args):
+    """Return the segmented / output_format / sample_rate options given on the command line"""
+    sample_rate = get_option(args, '--sample-rate')
+    return {
+        'segmented': '--segmented' in args,
+        'output_format': get_option(args, '--format', 'mp3'),
+        'sample_rate': int(sample_rate) if sample_rate else None,
+    }
+
+
 async def list_voices():
-    """List all available Arabic voices"""
+    """List all available Arabic voices (from the local catalog)"""
+    catalog = get_catalog()
+    if catalog.is_stale():
+        await catalog.refresh()
+
     print("\n=== Available Arabic Voices ===\n")
     
-    voices = await edge_tts.list_voices()
-    arabic_voices = [v for v in voices if v['Locale'].startswith('ar-')]
-    
-    for voice in arabic_voices:
+    for voice in catalog.by_language.get('ar', []):
         print(f"Name: {voice['Name']}")
         print(f"  Description: {voice['FriendlyName']}")
         print(f"  Gender: {voice['Gender']}")
@@ -97,30 +930,110 @@ async def list_voices():
         print()
 
 
+def print_usage():
+    """Print the command line usage"""
+    print("Usage:")
+    print("  python tts_edge.py <text> [output_file] [voice] [--format mp3|pcm] [--sample-rate HZ]")
+    print("      [--timings words.jsonl|words.bin]")
+    print("\nExamples:")
+    print("  python tts_edge.py 'مرحباً بك' output.mp3")
+    print("  python tts_edge.py 'مرحباً بك' output.mp3 ar-SA-ZariNeural")
+    print("\nTo list available voices:")
+    print("  python tts_edge.py --list-voices")
+    print("\nImport-time breakdown of a cold start:")
+    print("  python tts_edge.py --startup-report")
+    print("\nStream framed audio chunks to stdout:")
+    print("  python tts_edge.py --stream <text> [voice] [--segmented] [--format mp3|pcm] [--sample-rate HZ]")
+    print("      [--timings PATH]")
+    print("\nWorker mode (JSON jobs on stdin or a Unix socket):")
+    print("  python tts_edge.py --serve [--socket PATH] [--concurrency N]")
+    print("      [--phrase-bank PATH | --no-phrase-bank]")
+    print("\nRender the phrase bank and report its memory footprint:")
+    print("  python tts_edge.py --phrase-bank-report [PATH]")
+    print("\nBatch mode (one JSON job per line: text, output, voice...):")
+    print("  python tts_edge.py --batch manifest.jsonl [--concurrency N] [--retries N] [--pack]")
+
+
 async def main():
     """Main function"""
     if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python tts_edge.py <text> [output_file] [voice]")
-        print("\nExamples:")
-        print("  python tts_edge.py 'مرحباً بك' output.mp3")
-        print("  python tts_edge.py 'مرحباً بك' output.mp3 ar-SA-ZariNeural")
-        print("\nTo list available voices:")
-        print("  python tts_edge.py --list-voices")
+        print_usage()
         sys.exit(1)
     
     # Check if listing voices
     if sys.argv[1] == '--list-voices':
         await list_voices()
         return
+
+    if sys.argv[1] == '--phrase-bank-report':
+        path = sys.argv[2] if len(sys.argv) > 2 else PHRASE_BANK_FILE
+        bank, failures = await warm_phrase_bank(path)
+        for name, value in bank.stats().items():
+            print(f"  {name}: {value}")
+        if failures:
+            sys.exit(1)
+        return
+
+    if sys.argv[1] == '--startup-report':
+        from startup_profile import print_startup_report
+        print_startup_report()
+        return
+
+    if sys.argv[1] == '--stream':
+        args = get_positional(sys.argv[2:])
+        if not args:
+            print("❌ Error: --stream needs a text argument", file=sys.stderr)
+            sys.exit(1)
+        voice = args[1] if len(args) > 1 else DEFAULT_VOICE
+        await get_catalog().fetch_if_missing()
+        try:
+            await stream_to_stdout(args[0], voice, timings_file=get_option(sys.argv[2:], '--timings'),
+                                   **output_options(sys.argv[2:]))
+        except Exception as e:
+            print(f"\n❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if sys.argv[1] == '--serve':
+        args = sys.argv[2:]
+        await serve(
+            socket_path=get_option(args, '--socket'),
+            concurrency=int(get_option(args, '--concurrency', DEFAULT_CONCURRENCY)),
+            phrase_bank=None if '--no-phrase-bank' in args
+            else get_option(args, '--phrase-bank', PHRASE_BANK_FILE)
+        )
+        return
+
+    if sys.argv[1] == '--batch':
+        args = sys.argv[2:]
+        manifest = get_positional(args)
+        if not manifest or not os.path.exists(manifest[0]):
+            print(f"❌ Error: manifest not found: {manifest[0] if manifest else ''}")
+            sys.exit(1)
+        stats = await run_batch(
+            manifest[0],
+            concurrency=int(get_option(args, '--concurrency', DEFAULT_CONCURRENCY)),
+            retries=int(get_option(args, '--retries', BATCH_RETRIES)),
+            pack='--pack' in args
+        )
+        if stats['failed']:
+            sys.exit(1)
+        return
     
     # Get parameters
-    text = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else 'output.mp3'
-    voice = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_VOICE
+    args = get_positional(sys.argv[1:])
+    if not args:
+        print_usage()
+        sys.exit(1)
+    options = output_options(sys.argv[1:])
+    text = args[0]
+    output_file = args[1] if len(args) > 1 else f"output.{options['output_format']}"
+    voice = args[2] if len(args) > 2 else DEFAULT_VOICE
+    await get_catalog().fetch_if_missing()
     
     try:
-        await text_to_speech(text, output_file, voice)
+        await text_to_speech(text, output_file, voice,
+                             timings_file=get_option(sys.argv[1:], '--timings'), **options)
         print(f"\n✅ Success! Audio saved to: {output_file}")
     except Exception as e:
         print(f"\n❌ Error: {e}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latency control for edge-tts requests
+Tracks time to first byte (TTFB) and total synthesis time over a rolling
+window, and hedges slow requests: when the first attempt has produced
+no audio by the rolling p95 TTFB, a duplicate request is started, the first
+one to produce audio wins and the other one is cancelled
+"""
+
+import asyncio
+import math
+import os
+from collections import deque
+
+# Environment configuration
+REQUEST_DEADLINE = float(os.getenv('TTS_DEADLINE', '15'))  # seconds per synthesis, retries included
+UPSTREAM_RETRIES = int(os.getenv('TTS_UPSTREAM_RETRIES', '2'))
+UPSTREAM_BACKOFF = float(os.getenv('TTS_UPSTREAM_BACKOFF', '0.25'))  # seconds, doubled on every retry
+HEDGE_ENABLED = os.getenv('TTS_HEDGE', '1') != '0'
+
+LATENCY_WINDOW = 200       # requests kept for the rolling percentiles
+HEDGE_MIN_SAMPLES = 20     # no hedging until the p95 is meaningful
+HEDGE_MIN_DELAY = 0.2      # seconds; never hedge sooner than this
+
+
+class UpstreamExhausted(Exception):
+    """A synthesis that failed after using up its upstream retries; retrying it again is pointless"""
+
+
+class DeadlineExceeded(UpstreamExhausted, TimeoutError):
+    """A synthesis that did not finish within REQUEST_DEADLINE"""
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of values (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class LatencyTracker:
+    """Rolling TTFB / total latency window plus hedging, retry and timeout counters"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.ttfb = deque(maxlen=window)
+        self.total = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.timeouts = 0
+
+    def hedge_delay(self):
+        """Seconds to wait for a first chunk before hedging, or None to not hedge"""
+        if not HEDGE_ENABLED or len(self.ttfb) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(percentile(self.ttfb, 95), HEDGE_MIN_DELAY)
+
+    def stats(self):
+        """Return p50 / p95 / p99 TTFB and total latency (ms) and the counters"""
+        stats = {}
+        for name, values in (('ttfb', self.ttfb), ('total', self.total)):
+            for p in (50, 95, 99):
+                stats[f'{name}_p{p}_ms'] = round(percentile(values, p) * 1000, 1)
+        stats.update({
+            'requests': self.requests,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'retries': self.retries,
+            'timeouts': self.timeouts,
+        })
+        return stats
+
+
+async def first_audio(events):
+    """
+    Wait for the first 'audio' event of an async iterator of stream events
+
+    Metadata events (WordBoundary...) that come first are collected, not
+    counted as the first byte.
+
+    Returns:
+        (events up to and including the first audio event, iterator); the
+        iterator is closed if the wait is cancelled
+    """
+    leading = []
+    try:
+        async for event in events:
+            leading.append(event)
+            if event['type'] == 'audio':
+                break
+        return leading, events
+    except asyncio.CancelledError:
+        await events.aclose()
+        raise
+
+
+async def race_first_audio(start, tracker):
+    """
+    Start a request and wait for its first audio, hedging it if it is slow
+
+    Args:
+        start: Function returning a new async iterator of stream events
+        tracker: LatencyTracker providing the hedge delay and counters
+
+    Raises:
+        The error of the last attempt if every attempt failed
+
+    Returns:
+        (events up to the first audio, iterator of the remaining events) of
+        the winner
+    """
+    hedge_delay = tracker.hedge_delay()
+    attempts = [asyncio.create_task(first_audio(start()))]
+    primary = attempts[0]
+    winner = None
+    try:
+        while True:
+            timeout = hedge_delay if len(attempts) == 1 else None
+            done, _ = await asyncio.wait(attempts, timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                tracker.hedges += 1
+                hedge_delay = None  # at most one hedge per request
+                attempts.append(asyncio.create_task(first_audio(start())))
+                continue
+
+            for task in done:
+                if task.exception() is None:
+                    winner = task
+                    if task is not primary:
+                        tracker.hedge_wins += 1
+                    return task.result()
+            # Keep waiting on the attempt still running, if any
+            pending = [task for task in attempts if not task.done()]
+            if not pending:
+                raise done.pop().exception()
+            attempts = pending
+            hedge_delay = None
+    finally:
+        for task in attempts:
+            if not task.done():
+                task.cancel()
+            elif task is not winner and not task.cancelled() and task.exception() is None:
+                # Both attempts answered at once: close the loser's stream
+                await task.result()[1].aclose()
+
+
+_tracker = None
+
+
+def get_latency_tracker():
+    """Return the process-wide latency tracker"""
+    global _tracker
+    if _tracker is None:
+        _tracker = LatencyTracker()
+    return _tracker
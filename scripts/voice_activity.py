@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Voice activity detection for Speech-to-Text uploads
+Finds the speech in 16 kHz mono PCM with vectorized NumPy frame features
+(RMS energy against an adaptive noise floor, plus zero-crossing rate to
+tell voiced speech from hiss) and hangover smoothing, so recognition only
+receives the speech: leading and trailing silence is dropped and long
+pauses are shortened to the hangover.
+
+Recordings longer than the synchronous recognize() limits (about 60 s or
+10 MB per request) are cut at pauses into segments that fit, and the
+segments are uploaded as FLAC and recognized in parallel.
+
+Requires numpy, and ffmpeg (TTS_FFMPEG) for FLAC uploads and compressed
+input.
+
+Usage:
+    python voice_activity.py <audio_file | file.pcm> [...]
+"""
+
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pcm_audio import block_db
+from speech_stream import (ALTERNATIVE_LANGUAGE_CODES, FFMPEG, LANGUAGE_CODE, RAW_EXTENSIONS, SAMPLE_RATE,
+                           pcm_chunks)
+
+# Force UTF-8 encoding for stdout/stderr on Windows
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+# Environment configuration (STT_VAD=0 uploads recordings as they are)
+STT_VAD = os.getenv('STT_VAD', '1') != '0'
+
+FRAME_MS = 20
+FLOOR_DB = -55.0          # frames below this are never speech
+MAX_THRESHOLD_DB = -35.0  # frames above this are speech candidates even without pauses to learn from
+NOISE_MARGIN_DB = 12.0    # speech threshold above the noise floor (10th percentile of frame levels)
+STRONG_MARGIN_DB = 10.0   # this far above the threshold, high-ZCR frames (fricatives) count too
+VOICED_ZCR = 0.25         # zero crossings per sample below which a frame sounds voiced
+NOISE_ZCR = 0.4           # at or above this a frame sounds like hiss (white noise is 0.5), never speech
+MIN_SPEECH_MS = 60        # shorter bursts (clicks, pops) are dropped
+HANGOVER_MS = 200         # speech state held after the last speech frame
+PREROLL_MS = 100          # audio kept before the first speech frame of a region
+
+# Synchronous recognize() limits: 1 minute of audio, 10 MB per request (with margin)
+SYNC_LIMIT_SECONDS = 55
+SYNC_LIMIT_BYTES = 10 * 1024 * 1024 - 64 * 1024
+SEGMENT_WORKERS = 4
+
+
+def load_pcm(source):
+    """Decode an audio file (or read a .pcm / .raw file) to 16 kHz int16 samples"""
+    return np.frombuffer(b''.join(pcm_chunks(source)), dtype='<i2')
+
+
+def frame_features(samples, sample_rate=SAMPLE_RATE):
+    """
+    Per-frame RMS level and zero-crossing rate
+
+    Returns:
+        (level_db, zcr) arrays with one value per whole FRAME_MS frame
+    """
+    frame = sample_rate * FRAME_MS // 1000
+    frames = samples[:len(samples) // frame * frame].reshape(-1, frame)
+    signs = frames >= 0
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame - 1)
+    return block_db(samples, frame), zcr
+
+
+def runs(mask):
+    """Return (starts, ends) of the runs of True in a boolean array"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_regions(samples, sample_rate=SAMPLE_RATE):
+    """
+    Find the speech of a recording
+
+    A frame is speech when its level is above the threshold and its
+    zero-crossing rate is that of voiced sound, or when it is well above
+    the threshold and does not sound like hiss. Bursts shorter than
+    MIN_SPEECH_MS are dropped; each region then gets PREROLL_MS before it
+    and HANGOVER_MS after it, and regions that overlap are merged (pauses
+    shorter than that stay inside).
+
+    Returns:
+        List of (start, end) sample offsets, in order
+    """
+    level, zcr = frame_features(samples, sample_rate)
+    if not len(level):
+        return []
+    noise = np.percentile(level, 10)
+    threshold = max(FLOOR_DB, min(noise + NOISE_MARGIN_DB, MAX_THRESHOLD_DB))
+    speech = (level > threshold) & ((zcr < VOICED_ZCR)
+                                    | ((level > threshold + STRONG_MARGIN_DB) & (zcr < NOISE_ZCR)))
+
+    starts, ends = runs(speech)
+    keep = ends - starts >= MIN_SPEECH_MS // FRAME_MS
+    starts, ends = starts[keep], ends[keep]
+    if not len(starts):
+        return []
+    starts = np.maximum(starts - PREROLL_MS // FRAME_MS, 0)
+    ends = np.minimum(ends + HANGOVER_MS // FRAME_MS, len(level))
+
+    # A region starts where no earlier region reaches
+    reach = np.maximum.accumulate(ends)
+    first = np.concatenate(([True], starts[1:] > reach[:-1]))
+    frame = sample_rate * FRAME_MS // 1000
+    region_starts = starts[first] * frame
+    region_ends = np.concatenate((reach[np.flatnonzero(first)[1:] - 1], [reach[-1]])) * frame
+    if region_ends[-1] == len(level) * frame:
+        region_ends[-1] = len(samples)  # keep the partial last frame
+    return list(zip(region_starts.tolist(), region_ends.tolist()))
+
+
+def plan_segments(regions, max_samples):
+    """
+    Group speech regions into segments of at most max_samples of speech
+
+    Segments are cut between regions, i.e. at pauses; a region longer than
+    max_samples on its own is split into max_samples pieces.
+
+    Returns:
+        List of segments, each a list of (start, end) regions
+    """
+    segments, current, size = [], [], 0
+    for start, end in regions:
+        while end - start > max_samples:
+            if current:
+                segments.append(current)
+            segments.append([(start, start + max_samples)])
+            current, size = [], 0
+            start += max_samples
+        if size + end - start > max_samples:
+            segments.append(current)
+            current, size = [], 0
+        current.append((start, end))
+        size += end - start
+    if current:
+        segments.append(current)
+    return segments
+
+
+def prepare_upload(samples, sample_rate=SAMPLE_RATE):
+    """
+    Trim a recording to its speech and cut it into recognize()-sized segments
+
+    Returns:
+        (segments, stats): a list of int16 arrays, and a dict with duration,
+        speech_seconds, speech_ratio and segments
+    """
+    regions = speech_regions(samples, sample_rate)
+    max_samples = min(SYNC_LIMIT_SECONDS * sample_rate, SYNC_LIMIT_BYTES // 2)
+    segments = [np.concatenate([samples[start:end] for start, end in group])
+                for group in plan_segments(regions, max_samples)]
+    duration = len(samples) / sample_rate
+    speech_seconds = sum(end - start for start, end in regions) / sample_rate
+    return segments, {
+        'duration': duration,
+        'speech_seconds': speech_seconds,
+        'speech_ratio': speech_seconds / duration if duration else 0.0,
+        'segments': len(segments),
+    }
+
+
+def encode_segment(samples, sample_rate=SAMPLE_RATE):
+    """
+    Encode samples for upload: FLAC (lossless, about half the size), or
+    LINEAR16 when ffmpeg is not available
+
+    Returns:
+        (content bytes, encoding name of RecognitionConfig.AudioEncoding)
+    """
+    pcm = samples.astype('<i2').tobytes()
+    try:
+        result = subprocess.run(
+            [FFMPEG, '-hide_banner', '-loglevel', 'error', '-f', 's16le', '-ar', str(sample_rate),
+             '-ac', '1', '-i', 'pipe:0', '-f', 'flac', 'pipe:1'],
+            input=pcm, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+    except FileNotFoundError:
+        return pcm, 'LINEAR16'
+    if result.returncode != 0 or not result.stdout:
+        return pcm, 'LINEAR16'
+    return result.stdout, 'FLAC'
+
+
+def plan_upload(path):
+    """
+    Decide what to upload for an audio file
+
+    The speech segments of prepare_upload(), FLAC-encoded; or the file as
+    it is when it is smaller and fits one request (short, low-bitrate
+    clips: trimming them saves less than the compression of the original).
+
+    When the file cannot be decoded locally (no ffmpeg, or a format only
+    the service understands) it is uploaded as is, with a warning.
+
+    Returns:
+        (uploads, stats): a list of (content, encoding) and the stats of
+        prepare_upload() plus 'as_is' and 'vad' (False when VAD was skipped)
+    """
+    try:
+        samples = load_pcm(path)
+    except RuntimeError as e:
+        print(f"⚠️  VAD skipped, uploading the file as is: {e}")
+        with open(path, 'rb') as f:
+            uploads = [(f.read(), 'ENCODING_UNSPECIFIED')]
+        return uploads, {'duration': None, 'speech_seconds': None, 'speech_ratio': None,
+                         'segments': 1, 'as_is': True, 'vad': False}
+
+    segments, stats = prepare_upload(samples)
+    uploads = [encode_segment(segment) for segment in segments]
+    size = os.path.getsize(path)
+    as_is = (len(uploads) == 1 and size <= len(uploads[0][0]) and size <= SYNC_LIMIT_BYTES
+             and stats['duration'] <= SYNC_LIMIT_SECONDS
+             and os.path.splitext(path)[1].lower() not in RAW_EXTENSIONS)
+    if as_is:
+        with open(path, 'rb') as f:
+            uploads = [(f.read(), 'ENCODING_UNSPECIFIED')]
+    return uploads, {**stats, 'as_is': as_is, 'vad': True}
+
+
+def recognize_uploads(client, uploads, sample_rate=SAMPLE_RATE):
+    """
+    Recognize uploads with synchronous recognize() calls, in parallel
+
+    Args:
+        client: google.cloud.speech.SpeechClient (shared by the threads)
+        uploads: (content, encoding name) pairs, e.g. from plan_upload()
+
+    Returns:
+        (transcript, uploaded bytes)
+    """
+    from google.cloud import speech
+
+    def recognize(upload):
+        content, encoding = upload
+        config = speech.RecognitionConfig(
+            encoding=getattr(speech.RecognitionConfig.AudioEncoding, encoding),
+            sample_rate_hertz=sample_rate,
+            language_code=LANGUAGE_CODE,
+            alternative_language_codes=ALTERNATIVE_LANGUAGE_CODES,
+            enable_automatic_punctuation=True,
+            model='latest_long'
+        )
+        response = client.recognize(config=config, audio=speech.RecognitionAudio(content=content))
+        return ' '.join(result.alternatives[0].transcript.strip()
+                        for result in response.results if result.alternatives)
+
+    if not uploads:
+        return '', 0
+    with ThreadPoolExecutor(max_workers=min(SEGMENT_WORKERS, len(uploads))) as pool:
+        texts = list(pool.map(recognize, uploads))
+    return ' '.join(text for text in texts if text), sum(len(content) for content, _ in uploads)
+
+
+def recognize_file(client, path):
+    """Recognize a file as it is, with one recognize() call (the STT_VAD=0 path)"""
+    with open(path, 'rb') as f:
+        return recognize_uploads(client, [(f.read(), 'ENCODING_UNSPECIFIED')])
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print("  python voice_activity.py <audio_file | file.pcm> [...]")
+        sys.exit(1)
+
+    for source in sys.argv[1:]:
+        try:
+            samples = load_pcm(source)
+        except (OSError, RuntimeError) as e:
+            print(f"❌ {source}: {e}")
+            continue
+        segments, stats = prepare_upload(samples)
+        kept = sum(len(segment) for segment in segments) / SAMPLE_RATE
+        uploads = [encode_segment(segment) for segment in segments]
+        uploaded = sum(len(content) for content, _ in uploads)
+        encodings = '/'.join(sorted({encoding for _, encoding in uploads})) or 'nothing'
+        print(f"{source}: {stats['duration']:.2f}s, speech {stats['speech_ratio']:.0%}, "
+              f"{kept:.2f}s kept in {stats['segments']} segment(s), "
+              f"{uploaded:,} bytes as {encodings} ({os.path.getsize(source):,} bytes as is)")
+
+
+if __name__ == '__main__':
+    main()
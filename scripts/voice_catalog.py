@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local Edge-TTS voice catalog
+Keeps the edge-tts voice list on disk with a TTL, refreshes it in the
+background and indexes it by short name, locale and gender so that voices
+can be validated and aliases resolved without a network round trip
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Environment configuration
+CATALOG_FILE = os.getenv('TTS_VOICES_FILE', os.path.join(SCRIPT_DIR, '..', 'temp', 'voices.json'))
+CATALOG_TTL = float(os.getenv('TTS_VOICES_TTL', str(7 * 24 * 3600)))  # seconds
+
+# Arabic voices from Microsoft Edge TTS, used until the catalog has been
+# fetched once. They are not authoritative: unknown names are let through.
+BUILTIN_VOICES = [
+    ('ar-SA-ZariNeural', 'Female'),      # Saudi Arabia
+    ('ar-SA-OmarNeural', 'Male'),        # Saudi Arabia
+    ('ar-EG-SalmaNeural', 'Female'),     # Egypt
+    ('ar-EG-ShakirNeural', 'Male'),      # Egypt
+    ('ar-IOR-LaylaNeural', 'Female'),    # Iraq
+    ('ar-IOR-YoussefNeural', 'Male'),    # Iraq
+    ('ar-JO-FatimaNeural', 'Female'),    # Jordan
+    ('ar-JO-SanaNeural', 'Female'),      # Jordan
+    ('ar-JO-TaimNeural', 'Male'),        # Jordan
+    ('ar-KW-FahedNeural', 'Male'),       # Kuwait
+    ('ar-KW-NouraNeural', 'Female'),     # Kuwait
+    ('ar-LB-LaylaNeural', 'Female'),     # Lebanon
+    ('ar-LB-RamiNeural', 'Male'),        # Lebanon
+    ('ar-QA-AmalNeural', 'Female'),      # Qatar
+    ('ar-QA-MoazNeural', 'Male'),        # Qatar
+    ('ar-AE-FatimaNeural', 'Female'),    # UAE
+    ('ar-AE-HamdanNeural', 'Male'),      # UAE
+    ('ar-YA-MaryamNeural', 'Female'),    # Yemen
+    ('ar-YA-SalehNeural', 'Male'),       # Yemen
+]
+
+# Same keys as ARABIC_VOICES in backend/tts-edge-handler.js. Any other
+# "<gender>-<country>" key is resolved through the locale/gender index.
+VOICE_ALIASES = {
+    'female-sa': 'ar-SA-ZariNeural',
+    'male-sa': 'ar-SA-OmarNeural',
+    'female-eg': 'ar-EG-SalmaNeural',
+    'male-eg': 'ar-EG-ShakirNeural',
+    'female-jo': 'ar-JO-FatimaNeural',
+    'male-jo': 'ar-JO-TaimNeural',
+    'female-ae': 'ar-AE-FatimaNeural',
+    'male-ae': 'ar-AE-HamdanNeural',
+}
+
+
+def builtin_entries():
+    """Return BUILTIN_VOICES in the edge_tts.list_voices() format"""
+    return [
+        {
+            'ShortName': name,
+            'Name': name,
+            'FriendlyName': name,
+            'Gender': gender,
+            'Locale': '-'.join(name.split('-')[:2]),
+        }
+        for name, gender in BUILTIN_VOICES
+    ]
+
+
+class VoiceCatalog:
+    """
+    Indexed voice catalog backed by a JSON file
+
+    Lookups never touch the network. refresh() fetches the list from the
+    service; schedule_refresh() does so in the background when the data is
+    older than the TTL, and fetch_if_missing() waits for it when there is
+    no catalog file yet (one-shot commands, which exit before a background
+    refresh could finish).
+    """
+
+    def __init__(self, path=CATALOG_FILE, ttl=CATALOG_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.fetched_at = 0.0
+        self.authoritative = False
+        self._refresh_task = None
+        self._load()
+
+    def _load(self):
+        """Load the catalog file, or the built-in voices if there is none"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._index(data['voices'])
+            self.fetched_at = data['fetched_at']
+            self.authoritative = True
+        except (OSError, ValueError, KeyError):
+            self._index(builtin_entries())
+
+    def _index(self, voices):
+        """Build the short name, locale, language and gender indexes"""
+        self.voices = sorted(voices, key=lambda v: v['ShortName'])
+        self.by_name = {}
+        self.by_locale = {}
+        self.by_language = {}
+        self.by_locale_gender = {}
+        for voice in self.voices:
+            locale = voice['Locale']
+            self.by_name[voice['ShortName']] = voice
+            self.by_locale.setdefault(locale, []).append(voice)
+            self.by_language.setdefault(locale.split('-')[0], []).append(voice)
+            self.by_locale_gender.setdefault((locale, voice['Gender']), []).append(voice)
+
+    def is_stale(self):
+        """True when the catalog was never fetched or is older than the TTL"""
+        return time.time() - self.fetched_at > self.ttl
+
+    async def refresh(self):
+        """Fetch the voice list from the service and persist it"""
+        from edge_service import import_edge_tts
+
+        voices = await import_edge_tts().list_voices()
+        fetched_at = time.time()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fetched_at': fetched_at, 'voices': voices}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+        self._index(voices)
+        self.fetched_at = fetched_at
+        self.authoritative = True
+
+    def schedule_refresh(self):
+        """Refresh in the background if stale (needs a running event loop)"""
+        if not self.is_stale():
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        async def run():
+            try:
+                await self.refresh()
+                print(f"[TTS] Voice catalog refreshed ({len(self.voices)} voices)")
+            except Exception as e:
+                print(f"[TTS] Voice catalog refresh failed: {e}")
+
+        self._refresh_task = asyncio.get_running_loop().create_task(run())
+
+    async def fetch_if_missing(self):
+        """
+        Fetch the catalog now if it was never fetched
+
+        Without it, unknown voice names are let through unvalidated. A
+        failed fetch is reported and the built-in voices are kept.
+        """
+        if self.authoritative:
+            return
+        try:
+            await self.refresh()
+        except Exception as e:
+            # stderr: stdout may be carrying --stream frames
+            print(f"[TTS] Voice catalog fetch failed, voices are not validated: {e}", file=sys.stderr)
+
+    def find(self, locale, gender=None):
+        """Return the voices of a locale, optionally of one gender"""
+        if gender is None:
+            return self.by_locale.get(locale, [])
+        return self.by_locale_gender.get((locale, gender.capitalize()), [])
+
+    def resolve(self, voice):
+        """
+        Return the edge-tts short name for a voice name or alias
+
+        Raises:
+            ValueError: If the voice is unknown to an authoritative catalog
+        """
+        alias = voice.lower()
+        target = VOICE_ALIASES.get(alias)
+        if target is not None and (target in self.by_name or not self.authoritative):
+            return target
+
+        gender, _, country = alias.partition('-')
+        if gender in ('female', 'male') and country:
+            matches = self.find(f'ar-{country.upper()}', gender)
+            if matches:
+                return matches[0]['ShortName']
+            raise ValueError(f"No {gender} voice for country '{country}'")
+
+        if voice in self.by_name or not self.authoritative:
+            return voice
+        raise ValueError(f"Unknown voice: {voice}")
+
+
+_catalog = None
+
+
+def get_catalog():
+    """Return the process-wide voice catalog"""
+    global _catalog
+    if _catalog is None:
+        _catalog = VoiceCatalog()
+    return _catalog
+
+
+def resolve_voice(voice):
+    """Resolve a voice name or alias through the process-wide catalog"""
+    return get_catalog().resolve(voice)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word timing track from edge-tts WordBoundary events
+Used for subtitle highlighting and mouth animation
+
+Two encodings are supported:
+    JSON lines  {"text": "...", "offset": ms, "duration": ms} per word
+    binary      little-endian uint32 (offset_ms, duration_ms) pairs, one per word
+"""
+
+import json
+import sys
+from array import array
+from collections import namedtuple
+
+# edge-tts reports offsets and durations in 100 ns ticks
+TICKS_PER_MS = 10000
+
+WordTiming = namedtuple('WordTiming', ['text', 'offset', 'duration'])  # milliseconds
+
+
+def from_boundary(event):
+    """Build a WordTiming from an edge-tts WordBoundary stream event"""
+    return WordTiming(
+        event['text'],
+        event['offset'] // TICKS_PER_MS,
+        event['duration'] // TICKS_PER_MS
+    )
+
+
+def shift(timings, offset_ms):
+    """Return timings moved later by offset_ms"""
+    return [WordTiming(t.text, t.offset + offset_ms, t.duration) for t in timings]
+
+
+def to_jsonl(timings):
+    """Encode timings as UTF-8 JSON lines"""
+    lines = [json.dumps(t._asdict(), ensure_ascii=False) for t in timings]
+    return ''.join(line + '\n' for line in lines).encode('utf-8')
+
+
+def from_jsonl(data):
+    """Decode timings from UTF-8 JSON lines (bytes or any buffer)"""
+    return [WordTiming(**json.loads(line)) for line in str(data, 'utf-8').splitlines() if line]
+
+
+def pack(timings):
+    """Encode timings as packed little-endian uint32 (offset, duration) pairs"""
+    values = array('I')
+    for t in timings:
+        values.append(t.offset)
+        values.append(t.duration)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack(data):
+    """Decode packed timings into (offset, duration) pairs (word text is not stored)"""
+    values = array('I')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return list(zip(values[0::2], values[1::2]))
+
+
+def write_timings(path, timings):
+    """Write a timing track; .bin / .u32 files are packed, anything else is JSON lines"""
+    data = pack(timings) if path.endswith(('.bin', '.u32')) else to_jsonl(timings)
+    with open(path, 'wb') as f:
+        f.write(data)
@@ -46,6 +46,15 @@ if errorlevel 1 (
     exit /b 1
 )
 for /f "tokens=2" %%i in ('python --version 2^>^&1') do echo      ✅ Python %%i
+if defined TTS_FFMPEG (set "FFMPEG_BIN=%TTS_FFMPEG%") else (set "FFMPEG_BIN=ffmpeg")
+"%FFMPEG_BIN%" -version >nul 2>&1
+if errorlevel 1 (
+    echo      ⚠️ ffmpeg غير مثبت: الردود الصوتية سترسل بصيغة MP3 بدل PCM
+    echo      💡 قم بتثبيت ffmpeg من: https://ffmpeg.org/download.html
+    echo      💡 أو اضبط TTS_FFMPEG على مسار ffmpeg.exe
+) else (
+    echo      ✅ ffmpeg
+)
 echo.
 
 :: ============================================
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic MP3 streams for the tests
+
+Frames are MPEG-2 layer III, 24 kHz, 48 kbit/s, mono - the format edge-tts
+produces - with zeroed audio data, so they parse but carry no sound.
+"""
+
+HEADER = bytes([0xFF, 0xF3, 0x64, 0xC4])  # MPEG-2 layer III, no CRC, 48 kbit/s, 24 kHz, mono
+FRAME_BYTES = 144
+FRAME_SAMPLES = 576
+SAMPLE_RATE = 24000
+SIDE_INFO = 9  # MPEG-2 mono side information
+
+HEADER_22K = bytes([0xFF, 0xF3, 0x60, 0xC4])  # same at 22.05 kHz (156 bytes per frame)
+
+
+def frame(reservoir=0, fill=0, header=HEADER, length=FRAME_BYTES):
+    """One audio frame; reservoir is its main_data_begin, fill marks its payload"""
+    return header + bytes([reservoir]) + bytes([fill]) * (length - 5)
+
+
+def info_frame(delay=0, padding=0, tag=b'Info'):
+    """A Xing/Info header frame with a LAME tag recording delay and padding (samples)"""
+    body = bytes(SIDE_INFO) + tag + bytes(4)  # no optional Xing fields
+    lame = b'LAME3.100' + bytes(12) + bytes([delay >> 4, (delay & 0x0F) << 4 | padding >> 8,
+                                             padding & 0xFF])
+    data = HEADER + body + lame
+    return data + bytes(FRAME_BYTES - len(data))
+
+
+def stream(count, reservoirs=(), info=None):
+    """
+    count audio frames, frame i filled with byte i + 1
+
+    Args:
+        reservoirs: main_data_begin of the first frames (0 for the rest)
+        info: (delay, padding) to start with an Info frame
+    """
+    frames = [frame(reservoirs[i] if i < len(reservoirs) else 0, i + 1) for i in range(count)]
+    return (info_frame(*info) if info else b'') + b''.join(frames)
+
+
+def id3v2(size=20):
+    """An ID3v2 tag of size payload bytes"""
+    return b'ID3\x04\x00\x00' + bytes([0, 0, size >> 7 & 0x7F, size & 0x7F]) + bytes(size)
+
+
+def id3v1():
+    """An ID3v1 tag"""
+    return b'TAG' + bytes(125)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Arabic text canonicalization for cache and dedup keys
+
+Usage:
+    python -m unittest tests/test_arabic_text.py
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from arabic_text import canonicalize  # noqa: E402
+
+
+class CanonicalizeTest(unittest.TestCase):
+    def test_cases(self):
+        # text -> canonical form
+        cases = [
+            ('مَرْحَباً بِكَ', 'مرحبا بك'),               # diacritics
+            ('الـــتطبيق', 'التطبيق'),                    # tatweel
+            ('أإآٱ', 'اااا'),                             # alef forms
+            ('١٢٣ ۴۵۶', '123 456'),                       # Arabic-Indic digits
+            ('\ufeffمرحبا\u200f بك\u061c\u200b', 'مرحبا بك'),  # invisible marks, past the Arabic block too
+            ('  مرحبا\n\tبك  ', 'مرحبا بك'),              # whitespace
+            ('\u0627\u0653', 'ا'),  # NFC first: alef + madda is آ
+            ('“نص” 😀', '“نص” 😀'),                       # anything else is kept
+            ('plain  text', 'plain text'),
+            ('', ''),
+        ]
+        for text, canonical in cases:
+            with self.subTest(text=text):
+                self.assertEqual(canonicalize(text), canonical)
+
+
+if __name__ == '__main__':
+    unittest.main()
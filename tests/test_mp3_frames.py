@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MP3 frame parsing, gapless trimming and SegmentReader
+
+Usage:
+    python -m unittest tests/test_mp3_frames.py
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mp3_samples as mp3  # noqa: E402
+from mp3_frames import (FrameHeader, SegmentReader, concat_segments, decode_header,  # noqa: E402
+                        iter_frames, main_data_begin, read_info_tag, segment_frames)
+
+
+def frame_bytes(data):
+    """Concatenated frames that segment_frames() keeps"""
+    frames, _ = segment_frames(data)
+    return b''.join(data[offset:offset + length] for offset, length in frames)
+
+
+class HeaderTest(unittest.TestCase):
+    def test_decode(self):
+        cases = [
+            (mp3.HEADER, FrameHeader(2, 3, 48000, 24000, 1, 576, 144, False)),
+            (mp3.HEADER_22K, FrameHeader(2, 3, 48000, 22050, 1, 576, 156, False)),
+            (bytes([0xFF, 0xFB, 0x90, 0x64]), FrameHeader(1, 3, 128000, 44100, 2, 1152, 417, False)),
+            (bytes([0xFF, 0xFA, 0x92, 0x64]), FrameHeader(1, 3, 128000, 44100, 2, 1152, 418, True)),
+        ]
+        for raw, expected in cases:
+            with self.subTest(raw=raw.hex()):
+                self.assertEqual(decode_header(raw), expected)
+
+    def test_invalid(self):
+        for raw in (b'\x00\xf3\x64\xc4',   # no sync
+                    b'\xff\xeb\x64\xc4',   # reserved version
+                    b'\xff\xf1\x64\xc4',   # reserved layer
+                    b'\xff\xf3\x04\xc4',   # free format
+                    b'\xff\xf3\xf4\xc4',   # bad bitrate
+                    b'\xff\xf3\x6c\xc4'):  # reserved sample rate
+            with self.subTest(raw=raw.hex()):
+                self.assertIsNone(decode_header(raw))
+
+
+class IterFramesTest(unittest.TestCase):
+    def offsets(self, data):
+        return [offset for offset, _ in iter_frames(data)]
+
+    def test_plain_stream(self):
+        self.assertEqual(self.offsets(mp3.stream(3)), [0, 144, 288])
+
+    def test_tags_are_skipped(self):
+        tag = mp3.id3v2()
+        data = tag + mp3.stream(3) + mp3.id3v1()
+        self.assertEqual(self.offsets(data), [len(tag) + i * 144 for i in range(3)])
+
+    def test_garbage_is_skipped(self):
+        # A frame only counts if the next header parses: the one before the garbage is lost too
+        data = mp3.stream(2) + b'\xff\x00garbage' + mp3.stream(2)
+        self.assertEqual(self.offsets(data), [0, 297, 441])
+
+    def test_truncated_last_frame_is_dropped(self):
+        self.assertEqual(self.offsets(mp3.stream(3)[:-10]), [0, 144])
+
+    def test_not_mp3(self):
+        self.assertEqual(self.offsets(b'RIFF' + bytes(500)), [])
+        self.assertEqual(self.offsets(b''), [])
+
+
+class InfoTagTest(unittest.TestCase):
+    def test_lame_delay_and_padding(self):
+        data = mp3.info_frame(1105, 1000)
+        self.assertEqual(read_info_tag(data, 0, decode_header(mp3.HEADER)), (1105, 1000))
+
+    def test_xing_without_lame_tag(self):
+        data = mp3.HEADER + bytes(mp3.SIDE_INFO) + b'Xing' + bytes(mp3.FRAME_BYTES - 17)
+        self.assertEqual(read_info_tag(data, 0, decode_header(mp3.HEADER)), (0, 0))
+
+    def test_audio_frame(self):
+        self.assertIsNone(read_info_tag(mp3.frame(), 0, decode_header(mp3.HEADER)))
+
+    def test_main_data_begin(self):
+        self.assertEqual(main_data_begin(mp3.frame(reservoir=37), 0, decode_header(mp3.HEADER)), 37)
+
+
+class SegmentFramesTest(unittest.TestCase):
+    def test_trimming(self):
+        # (frames, info, reservoirs) -> fill bytes of the frames kept
+        cases = [
+            (5, None, (), [1, 2, 3, 4, 5]),
+            (5, (0, 0), (), [1, 2, 3, 4, 5]),
+            (5, (1200, 0), (), [3, 4, 5]),            # 2 whole frames of delay
+            (5, (1200, 1000), (), [3, 4]),            # and 1 of padding
+            (5, (1200, 0), (0, 0, 20), [1, 2, 3, 4, 5]),  # frame 3 needs the reservoir
+            (2, (4000, 4000), (), [2]),               # never trimmed to nothing
+            (1, (1200, 1000), (), [1]),
+        ]
+        for count, info, reservoirs, kept in cases:
+            with self.subTest(count=count, info=info, reservoirs=reservoirs):
+                data = mp3.stream(count, reservoirs, info)
+                frames, header = segment_frames(data)
+                self.assertEqual([data[offset + 5] for offset, _ in frames], kept)
+                self.assertEqual(header.sample_rate, mp3.SAMPLE_RATE)
+
+    def test_no_audio(self):
+        self.assertEqual(segment_frames(b''), ([], None))
+        self.assertEqual(segment_frames(mp3.info_frame()), ([], None))
+
+
+class SegmentReaderTest(unittest.TestCase):
+    SEGMENTS = [
+        mp3.stream(6),
+        mp3.stream(6, info=(1200, 1000)),
+        mp3.stream(6, (0, 0, 20), info=(1200, 0)),
+        mp3.stream(2, info=(4000, 4000)),
+        mp3.id3v2(300) + mp3.stream(4, info=(600, 600)) + mp3.id3v1(),
+        mp3.stream(2) + b'\xff\x00garbage' + mp3.stream(3),
+        mp3.stream(3)[:-10],
+        mp3.info_frame(),
+        b'',
+    ]
+
+    def read(self, data, size):
+        reader = SegmentReader()
+        out = b''.join(reader.feed(data[start:start + size]) for start in range(0, len(data), size))
+        return out + reader.finish(), reader
+
+    def test_matches_segment_frames(self):
+        for index, data in enumerate(self.SEGMENTS):
+            for size in (1, 7, 144, 500, len(data) or 1):
+                with self.subTest(segment=index, size=size):
+                    out, reader = self.read(data, size)
+                    self.assertEqual(out, frame_bytes(data))
+                    self.assertEqual(reader.samples, len(out) // mp3.FRAME_BYTES * mp3.FRAME_SAMPLES)
+
+    def test_frames_are_released_before_finish(self):
+        reader = SegmentReader()
+        # Frames 1-2 are delay, 4 may still be padding and 5 waits for the next header
+        out = reader.feed(mp3.stream(5, info=(1200, 1000)))
+        self.assertEqual(out, mp3.frame(fill=3))
+        self.assertEqual(reader.header.sample_rate, mp3.SAMPLE_RATE)
+
+
+class ConcatTest(unittest.TestCase):
+    def test_join(self):
+        parts = []
+        segments = [mp3.stream(4, info=(1200, 0)), mp3.id3v2() + mp3.stream(3)]
+        frames, seconds = concat_segments(segments, parts.append)
+        self.assertEqual(frames, 5)
+        self.assertAlmostEqual(seconds, 5 * mp3.FRAME_SAMPLES / mp3.SAMPLE_RATE)
+        self.assertEqual(b''.join(parts), b''.join(frame_bytes(data) for data in segments))
+
+    def test_sample_rate_mismatch(self):
+        other = mp3.frame(header=mp3.HEADER_22K, length=156) * 3
+        with self.assertRaises(ValueError):
+            concat_segments([mp3.stream(3), other], lambda part: None)
+
+    def test_nothing_to_join(self):
+        self.assertEqual(concat_segments([b'', mp3.info_frame()], lambda part: None), (0, 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FrameIndex duration, bitrate and seek table
+
+Usage:
+    python -m unittest tests/test_mp3_index.py
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mp3_samples as mp3  # noqa: E402
+from mp3_index import FrameIndex  # noqa: E402
+
+FRAME_SECONDS = mp3.FRAME_SAMPLES / mp3.SAMPLE_RATE  # 24 ms
+
+
+class FrameIndexTest(unittest.TestCase):
+    def test_duration_and_bitrate(self):
+        index = FrameIndex.from_buffer(mp3.stream(50))
+        self.assertEqual(index.frames, 50)
+        self.assertEqual(index.sample_rate, mp3.SAMPLE_RATE)
+        self.assertAlmostEqual(index.duration, 50 * FRAME_SECONDS)
+        self.assertEqual(index.bitrate, 48000)
+
+    def test_info_frame_and_tags_are_not_indexed(self):
+        tag = mp3.id3v2()
+        index = FrameIndex.from_buffer(tag + mp3.stream(10, info=(1105, 0)) + mp3.id3v1())
+        self.assertEqual(index.frames, 10)
+        self.assertEqual(index.offsets[0], len(tag) + mp3.FRAME_BYTES)
+        self.assertEqual(index.audio_bytes, 10 * mp3.FRAME_BYTES)
+
+    def test_seek_table(self):
+        index = FrameIndex.from_buffer(mp3.stream(10))
+        # seconds -> frame playing at that time (clamped to the stream)
+        cases = [
+            (0.0, 0),
+            (FRAME_SECONDS - 0.001, 0),
+            (FRAME_SECONDS, 1),
+            (4.5 * FRAME_SECONDS, 4),
+            (10 * FRAME_SECONDS, 9),
+            (60.0, 9),
+            (-1.0, 0),
+        ]
+        for seconds, frame in cases:
+            with self.subTest(seconds=seconds):
+                self.assertEqual(index.frame_at(seconds), frame)
+                self.assertEqual(index.offset_at(seconds), frame * mp3.FRAME_BYTES)
+                self.assertAlmostEqual(index.time_of(frame), frame * FRAME_SECONDS)
+
+    def test_memory(self):
+        index = FrameIndex.from_buffer(mp3.stream(10))
+        self.assertEqual(index.offsets.typecode, 'I')
+        self.assertEqual(index.memory_bytes(), 10 * (index.offsets.itemsize + 8))
+
+    def test_sample_rate_change(self):
+        other = mp3.frame(header=mp3.HEADER_22K, length=156) * 3
+        with self.assertRaises(ValueError):
+            FrameIndex.from_buffer(mp3.stream(3) + other)
+
+    def test_empty(self):
+        index = FrameIndex.from_buffer(b'')
+        self.assertEqual((index.frames, index.duration, index.bitrate), (0, 0.0, 0))
+        with self.assertRaises(ValueError):
+            index.frame_at(0)
+
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'a.mp3')
+            with open(path, 'wb') as f:
+                f.write(mp3.stream(20))
+            self.assertEqual(FrameIndex.from_file(path).frames, 20)
+            open(path, 'wb').close()
+            self.assertEqual(FrameIndex.from_file(path).frames, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
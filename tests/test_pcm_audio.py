@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PCM resampling (with its anti-aliasing low-pass), silence trimming and
+loudness normalization, chunked and in one piece
+
+Usage:
+    python -m unittest tests/test_pcm_audio.py
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from pcm_audio import (LEAD_MARGIN_MS, MAX_GAIN_DB, MAX_HOLD_MS, TAIL_MARGIN_MS, TARGET_DB,  # noqa: E402
+                       LoudnessNormalizer, SilenceTrimmer, StreamingResampler, block_db, lowpass_taps)
+
+RATE = 24000
+MS = RATE // 1000
+
+
+def tone(ms, hz=440, amplitude=8000, rate=RATE):
+    return (amplitude * np.sin(2 * np.pi * hz * np.arange(ms * rate // 1000) / rate)).astype(np.int16)
+
+
+def silence(ms):
+    return np.zeros(ms * MS, dtype=np.int16)
+
+
+def rms_db(samples):
+    x = samples.astype(np.float64)
+    return 20 * np.log10(max(np.sqrt(np.mean(x * x)), 1e-3) / 32768)
+
+
+def chunked(process, samples, size):
+    """Run samples through process in chunks of size samples"""
+    parts = [process(samples[start:start + size]) for start in range(0, len(samples), size)]
+    return np.concatenate(parts) if parts else samples[:0]
+
+
+class FilterTest(unittest.TestCase):
+    def test_block_db(self):
+        levels = block_db(np.concatenate((tone(10, amplitude=32767), silence(10), tone(15))), 10 * MS)
+        self.assertEqual(len(levels), 3)  # the partial last block is ignored
+        self.assertAlmostEqual(levels[0], -3.0, delta=0.1)
+        self.assertLess(levels[1], -100)
+
+    def test_lowpass_taps(self):
+        taps = lowpass_taps(0.3)
+        self.assertAlmostEqual(float(taps.sum()), 1.0, places=5)
+        np.testing.assert_allclose(taps, taps[::-1], atol=1e-7)
+
+
+class ResamplerTest(unittest.TestCase):
+    def test_chunked_like_one_piece(self):
+        samples = np.concatenate((tone(300, 300), tone(200, 2000)))
+        for src, dst in ((24000, 16000), (24000, 48000), (24000, 22050), (16000, 24000)):
+            whole = StreamingResampler(src, dst).process(samples)
+            for size in (1, 7, 480, 1000):
+                with self.subTest(src=src, dst=dst, size=size):
+                    np.testing.assert_array_equal(chunked(StreamingResampler(src, dst).process, samples, size),
+                                                  whole)
+
+    def test_output_length(self):
+        samples = tone(1000)
+        for dst in (8000, 16000, 22050, 44100, 48000):
+            with self.subTest(dst=dst):
+                self.assertAlmostEqual(len(StreamingResampler(RATE, dst).process(samples)), dst, delta=2)
+
+    def test_same_rate_is_untouched(self):
+        samples = tone(100)
+        self.assertIs(StreamingResampler(RATE, RATE).process(samples), samples)
+
+    def test_downsampling_does_not_alias(self):
+        # 24 -> 16 kHz: 1 kHz passes, 11 kHz (above the new 8 kHz Nyquist) is removed
+        # instead of folding back to 5 kHz
+        passband = StreamingResampler(RATE, 16000).process(tone(500, 1000))
+        stopband = StreamingResampler(RATE, 16000).process(tone(500, 11000))
+        self.assertAlmostEqual(rms_db(passband[100:]), rms_db(tone(500, 1000)), delta=0.5)
+        self.assertLess(rms_db(stopband[100:]) - rms_db(tone(500, 11000)), -40)
+
+
+class SilenceTrimmerTest(unittest.TestCase):
+    def trim(self, samples, size):
+        trimmer = SilenceTrimmer(RATE)
+        out = chunked(trimmer.process, samples, size)
+        return np.concatenate((out, trimmer.flush())), trimmer
+
+    def test_margins(self):
+        speech = tone(500)
+        samples = np.concatenate((silence(400), speech, silence(400)))
+        for size in (1, 100, 240, 1000, len(samples)):
+            with self.subTest(size=size):
+                out, trimmer = self.trim(samples, size)
+                self.assertEqual(len(out), (LEAD_MARGIN_MS + 500 + TAIL_MARGIN_MS) * MS)
+                np.testing.assert_array_equal(out[LEAD_MARGIN_MS * MS:-TAIL_MARGIN_MS * MS], speech)
+                self.assertEqual(trimmer.samples_trimmed, len(samples) - len(out))
+
+    def test_pauses_inside_speech_are_kept(self):
+        samples = np.concatenate((tone(200), silence(MAX_HOLD_MS + 500), tone(200)))
+        out, _ = self.trim(samples, 480)
+        np.testing.assert_array_equal(out, samples)  # no silence before or after the speech
+
+    def test_long_pause_is_released_before_the_speech_after_it(self):
+        trimmer = SilenceTrimmer(RATE)
+        trimmer.process(tone(200))
+        out = trimmer.process(silence(MAX_HOLD_MS + 500))
+        self.assertEqual(len(out), 500 * MS)
+
+    def test_only_silence(self):
+        out, _ = self.trim(silence(1000), 480)
+        self.assertEqual(len(out), 0)
+
+
+class LoudnessNormalizerTest(unittest.TestCase):
+    def normalize(self, samples, size=2400):
+        return chunked(LoudnessNormalizer(RATE).process, samples, size)
+
+    def test_levels(self):
+        # input RMS (dBFS) -> output RMS
+        cases = [
+            (-30, TARGET_DB),             # raised
+            (-14, TARGET_DB),             # lowered
+            (-45, -45 + MAX_GAIN_DB),     # gain is capped
+        ]
+        for level, expected in cases:
+            with self.subTest(level=level):
+                amplitude = 32768 * 10 ** (level / 20) * np.sqrt(2)
+                out = self.normalize(tone(1000, amplitude=amplitude))
+                self.assertAlmostEqual(rms_db(out), expected, delta=0.3)
+
+    def test_no_clipping(self):
+        # A quiet level with one loud peak: the gain is lowered so the peak fits
+        samples = tone(1000, amplitude=1000)
+        samples[1000] = 30000
+        out = self.normalize(samples, size=len(samples))
+        self.assertLessEqual(int(np.max(np.abs(out))), 32767 * 0.98 + 1)
+
+    def test_silence_is_untouched(self):
+        samples = silence(500)
+        np.testing.assert_array_equal(self.normalize(samples), samples)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Phrase packing: grouping, packed text spans, word assignment and MP3 cuts
+
+Usage:
+    python -m unittest tests/test_phrase_packing.py
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mp3_samples as mp3  # noqa: E402
+from phrase_packing import assign_words, group_phrases, pack_phrases, split_packed  # noqa: E402
+from word_timings import WordTiming  # noqa: E402
+
+PHRASES = ['مرحبا', 'اضغط هنا.', 'شكرا لك!']
+
+
+def words(*timings):
+    return [WordTiming(text, offset, duration) for text, offset, duration in timings]
+
+
+# Three phrases spoken at 0-100, 200-300 and 400-450 ms of 20 frames (24 ms each)
+TIMINGS = words(('مرحبا', 0, 100), ('اضغط', 200, 50), ('هنا', 260, 40),
+                ('شكرا', 400, 30), ('لك', 430, 20))
+
+
+class PackTest(unittest.TestCase):
+    def test_group_phrases(self):
+        # (phrase lengths, max chars) -> groups
+        cases = [
+            ([5, 5, 5], 100, [[0, 1, 2]]),
+            ([5, 5, 5], 14, [[0, 1], [2]]),
+            ([5, 5, 5], 7, [[0], [1], [2]]),
+            ([50], 10, [[0]]),  # never split a phrase
+            ([], 10, []),
+        ]
+        for lengths, max_chars, groups in cases:
+            with self.subTest(lengths=lengths, max_chars=max_chars):
+                self.assertEqual(group_phrases(['x' * n for n in lengths], max_chars), groups)
+
+    def test_pack_phrases(self):
+        text, spans = pack_phrases([' مرحبا ', 'اضغط هنا.', 'شكرا لك!'])
+        self.assertEqual(text, 'مرحبا.\nاضغط هنا.\nشكرا لك!')
+        self.assertEqual([text[start:end] for start, end in spans], ['مرحبا.', 'اضغط هنا.', 'شكرا لك!'])
+
+    def test_assign_words(self):
+        text, spans = pack_phrases(PHRASES)
+        groups = assign_words(text, spans, TIMINGS)
+        self.assertEqual([[w.text for w in group] for group in groups],
+                         [['مرحبا'], ['اضغط', 'هنا'], ['شكرا', 'لك']])
+
+    def test_unknown_word_stays_with_its_phrase(self):
+        text, spans = pack_phrases(PHRASES)
+        timings = words(('مرحبا', 0, 100), ('اضغط', 200, 50), ('٣', 250, 10), ('شكرا', 400, 30))
+        groups = assign_words(text, spans, timings)
+        self.assertEqual([len(group) for group in groups], [1, 2, 1])
+
+
+class SplitPackedTest(unittest.TestCase):
+    def split(self, reservoirs=()):
+        audio = mp3.stream(20, reservoirs, info=(0, 0))
+        text, spans = pack_phrases(PHRASES)
+        return split_packed(audio, text, spans, TIMINGS)
+
+    def frames_of(self, clip):
+        return [clip[offset + 5] - 1 for offset in range(0, len(clip), mp3.FRAME_BYTES)]
+
+    def test_cuts_in_the_middle_of_pauses(self):
+        clips = self.split()
+        self.assertEqual([self.frames_of(clip) for clip, _ in clips],
+                         [list(range(0, 6)), list(range(6, 15)), list(range(15, 20))])
+        # Word timings are relative to their clip (frame 6 starts at 144 ms)
+        self.assertEqual(clips[1][1], words(('اضغط', 56, 50), ('هنا', 116, 40)))
+        self.assertEqual(clips[2][1], words(('شكرا', 40, 30), ('لك', 70, 20)))
+
+    def test_cut_avoids_frames_using_the_reservoir(self):
+        # Frames 5 and 6 borrow from their predecessors: frame 7 is the nearest clean cut
+        clips = self.split(reservoirs=[0] * 5 + [30, 30])
+        self.assertEqual(self.frames_of(clips[1][0])[0], 7)
+
+    def test_middle_frame_when_every_pause_frame_borrows(self):
+        clips = self.split(reservoirs=[30] * 20)
+        self.assertEqual(self.frames_of(clips[1][0])[0], 6)
+
+    def test_errors(self):
+        text, spans = pack_phrases(PHRASES)
+        with self.assertRaises(ValueError):
+            split_packed(mp3.stream(20), text, spans, TIMINGS[:3])  # last phrase got no words
+        with self.assertRaises(ValueError):
+            split_packed(b'', text, spans, TIMINGS)
+        with self.assertRaises(ValueError):
+            split_packed(mp3.stream(5), text, spans, TIMINGS)  # audio shorter than the words
+
+
+if __name__ == '__main__':
+    unittest.main()
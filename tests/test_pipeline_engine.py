@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline engine: stage chaining, failed items and the result callback
+
+Usage:
+    python -m unittest tests/test_pipeline_engine.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from pipeline_engine import PipelineEngine, Stage  # noqa: E402
+
+
+async def double(item):
+    return {**item, 'value': item['value'] * 2}
+
+
+def check(item):
+    if item['value'] == 4:
+        raise ValueError('four')
+    return item
+
+
+def run(stages, items, on_result=None, timeout=5):
+    engine = PipelineEngine(stages)
+    try:
+        return engine, asyncio.run(asyncio.wait_for(engine.run(items, on_result), timeout))
+    finally:
+        engine.close()
+
+
+class PipelineEngineTest(unittest.TestCase):
+    def test_items_pass_every_stage(self):
+        stages = [Stage('double', double, workers=2), Stage('check', check, workers=2, blocking=True)]
+        engine, results = run(stages, ({'value': n} for n in range(5)))
+        by_value = {item['value']: item for item in results}
+        self.assertEqual(sorted(by_value), [0, 2, 4, 6, 8])
+        self.assertEqual((by_value[4]['error'], by_value[4]['failed_stage']), ('four', 'check'))
+        self.assertEqual([(s['items'], s['failed']) for s in engine.stats()], [(5, 0), (5, 1)])
+
+    def test_failed_item_skips_the_remaining_stages(self):
+        stages = [Stage('check', check, blocking=True), Stage('double', double)]
+        engine, results = run(stages, [{'value': 4}, {'value': 1}])
+        self.assertEqual(sorted(item['value'] for item in results), [2, 4])
+        self.assertEqual(engine.stats()[1]['items'], 1)
+
+    def test_raising_callback_does_not_hang_the_run(self):
+        seen = []
+
+        def on_result(item):
+            seen.append(item['value'])
+            raise RuntimeError('callback')
+
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            _, results = run([Stage('double', double)], [{'value': n} for n in range(3)], on_result)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sorted(seen), [0, 2, 4])
+        self.assertIn('on_result failed: callback', err.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
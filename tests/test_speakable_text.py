@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown, URL and emoji removal for TTS, on whole and streamed text
+
+Usage:
+    python -m unittest tests/test_speakable_text.py
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from speakable_text import CODE_PLACEHOLDER, URL_PLACEHOLDER, SpeakableText, make_speakable  # noqa: E402
+
+# Markdown -> what is spoken
+CASES = [
+    ('**مرحبا** بك', 'مرحبا بك'),
+    ('~~محذوف~~ و *مائل* و ***كلاهما*** و __عريض__', 'محذوف و مائل و كلاهما و عريض'),
+    ('**خط *مائل* داخل العريض**', 'خط مائل داخل العريض'),
+    ('# عنوان\nنص', 'عنوان\nنص'),
+    ('- عنصر أول\n* عنصر ثان\n- [x] مهمة', 'عنصر أول\nعنصر ثان\nمهمة'),
+    ('1. أولا\n2) ثانيا', '1، أولا\n2، ثانيا'),
+    ('> اقتباس', 'اقتباس'),
+    ('قبل\n---\nبعد', 'قبل\nبعد'),
+    ('انظر [الرابط](http://x.com) هنا', 'انظر الرابط هنا'),
+    ('![صورة](a.png)', 'صورة'),
+    ('زر https://example.com/a?b=1 أو www.example.com الآن', f'زر {URL_PLACEHOLDER} أو {URL_PLACEHOLDER} الآن'),
+    ('شكرا 😀👍🏽 جزيلا', 'شكرا جزيلا'),
+    ('```python\nprint(1)\n```\nبعد الكود', f'{CODE_PLACEHOLDER}\nبعد الكود'),
+    ('| أ | ب |\n|---|---|\n| 1 | 2 |', 'أ ، ب\n1 ، 2'),
+    # Left alone: no pairs, inside words or code
+    ('2 * 3 = 6', '2 * 3 = 6'),
+    ('snake_case و __init__', 'snake_case و __init__'),
+    ('استخدم `x * y` و `**kwargs` هنا', 'استخدم x * y و **kwargs هنا'),
+    ('a | b', 'a | b'),
+    ('**غير مغلق', '**غير مغلق'),
+    ('نص عادي.', 'نص عادي.'),
+    ('', ''),
+]
+
+
+def stream(text, size):
+    """Clean text fed in pieces of size characters"""
+    cleaner = SpeakableText()
+    out = [cleaner.feed(text[start:start + size]) for start in range(0, len(text), size)]
+    return (''.join(out) + cleaner.finish()).strip()
+
+
+class MakeSpeakableTest(unittest.TestCase):
+    def test_cases(self):
+        for text, spoken in CASES:
+            with self.subTest(text=text):
+                self.assertEqual(make_speakable(text), (spoken, len(text) - len(spoken)))
+
+
+class SpeakableTextTest(unittest.TestCase):
+    def test_streamed_like_whole(self):
+        for text, spoken in CASES:
+            for size in (1, 2, 5, 13):
+                with self.subTest(text=text, size=size):
+                    self.assertEqual(stream(text, size), spoken)
+
+    def test_partial_line_is_released(self):
+        cleaner = SpeakableText()
+        self.assertEqual(cleaner.feed('هذه **جملة** طويلة '), 'هذه جملة طويلة')
+        self.assertEqual(cleaner.feed('تصل على *أجزاء'), ' تصل على')  # emphasis still open
+        self.assertEqual(cleaner.feed('* كثيرة'), ' أجزاء')
+        self.assertEqual(cleaner.finish(), ' كثيرة')
+
+    def test_open_link_and_code_are_held(self):
+        cleaner = SpeakableText()
+        self.assertEqual(cleaner.feed('انظر [الرابط هنا'), '')
+        self.assertEqual(cleaner.feed('](http://x.com) الآن'), 'انظر الرابط هنا')
+        self.assertEqual(cleaner.finish(), ' الآن')
+
+    def test_counters(self):
+        cleaner = SpeakableText()
+        cleaner.feed('**مرحبا** ')
+        cleaner.finish()
+        self.assertEqual(cleaner.chars_in, 10)
+        self.assertEqual(cleaner.chars_saved, 4)  # the space is kept
+
+
+if __name__ == '__main__':
+    unittest.main()
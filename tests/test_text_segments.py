@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SentenceStream must cut streamed text exactly like split_sentences()
+
+Usage:
+    python -m unittest tests/test_text_segments.py
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from text_segments import SentenceStream, split_sentences  # noqa: E402
+
+TEXTS = [
+    'مرحبا بك في المساعد الصوتي. كيف يمكنني مساعدتك اليوم؟ شكرا.',
+    'السعر 3.5 جنيه، والموقع example.com جاهز. تمام!',
+    'جملة أولى طويلة بما يكفي للنطق وحدها.\nسطر ثان قصير\nنعم',
+    'قصير. جدا. كلمات، قليلة، هنا',
+    'This is a long enough first sentence. And a second one follows here! Ok?',
+    'نص بدون أي علامة ترقيم في نهايته على الإطلاق',
+    'نعم.',
+    '',
+]
+
+
+def stream(text, size):
+    """Feed text in pieces of size characters and collect the segments"""
+    splitter = SentenceStream()
+    segments = []
+    for start in range(0, len(text), size):
+        segments += splitter.feed(text[start:start + size])
+    return segments + splitter.finish()
+
+
+class SentenceStreamTest(unittest.TestCase):
+    def test_matches_split_sentences(self):
+        for text in TEXTS:
+            for size in (1, 2, 3, 7, len(text) or 1):
+                with self.subTest(text=text, size=size):
+                    self.assertEqual(stream(text, size), split_sentences(text))
+
+    def test_short_ending_is_merged(self):
+        splitter = SentenceStream()
+        self.assertEqual(splitter.feed('هذه جملة أولى طويلة بما يكفي. '), [])
+        self.assertEqual(splitter.feed('وهذه جملة ثانية طويلة أيضا. شكرا'),
+                         ['هذه جملة أولى طويلة بما يكفي.'])
+        self.assertEqual(splitter.finish(), ['وهذه جملة ثانية طويلة أيضا. شكرا'])
+
+    def test_sentence_released_before_the_next_one_ends(self):
+        splitter = SentenceStream()
+        self.assertEqual(splitter.feed('هذه جملة أولى طويلة بما يكفي. '), [])
+        self.assertEqual(splitter.feed('وهذه جملة ثانية لم'), [])  # could still be a short ending
+        self.assertEqual(splitter.feed(' تكتمل بعد'), ['هذه جملة أولى طويلة بما يكفي.'])
+        self.assertEqual(splitter.finish(), ['وهذه جملة ثانية لم تكتمل بعد'])
+
+
+if __name__ == '__main__':
+    unittest.main()
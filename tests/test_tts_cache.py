@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTSCache keys, byte budget and LRU eviction
+
+Usage:
+    python -m unittest tests/test_tts_cache.py
+"""
+
+import os
+import stat
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from tts_cache import ENTRY_MODE, TTSCache, make_key  # noqa: E402
+
+ARGS = ('ar-EG-SalmaNeural', '+0%', '+0Hz', 'audio-24khz-48kbitrate-mono-mp3')
+
+
+class MakeKeyTest(unittest.TestCase):
+    def test_canonical_spellings_share_a_key(self):
+        cases = [
+            ('مرحباً بك', 'مرحبا بك'),              # tanween
+            ('مرحـــبا  بك', 'مرحبا بك'),           # tatweel, double space
+            ('أهلا وإلى اللقاء', 'اهلا والى اللقاء'),  # alef forms
+            ('العدد ٣٥', 'العدد 35'),               # Arabic-Indic digits
+            ('\u200fمرحبا\u061c', 'مرحبا'),     # direction marks
+        ]
+        for text, canonical in cases:
+            with self.subTest(text=text):
+                self.assertEqual(make_key(text, *ARGS), make_key(canonical, *ARGS))
+
+    def test_every_field_is_part_of_the_key(self):
+        key = make_key('مرحبا', *ARGS)
+        self.assertNotEqual(key, make_key('اهلا', *ARGS))
+        for index, other in enumerate(('ar-SA-ZariNeural', '+10%', '+5Hz', 'pcm')):
+            args = list(ARGS)
+            args[index] = other
+            with self.subTest(field=index):
+                self.assertNotEqual(key, make_key('مرحبا', *args))
+
+
+class TTSCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.directory = self._dir.name
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def cache(self, max_bytes=100, rescan_interval=3600):
+        return TTSCache(self.directory, max_bytes, rescan_interval)
+
+    def test_round_trip(self):
+        cache = self.cache()
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', b'audio')
+        self.assertEqual(cache.get('a'), b'audio')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_byte_budget(self):
+        cache = self.cache(max_bytes=100)
+        for key in 'abcde':
+            cache.put(key, b'x' * 30)
+        self.assertLessEqual(cache.total_bytes, 100)
+        self.assertEqual(cache.stats()['entries'], 3)
+        self.assertEqual(cache.evictions, 2)
+        on_disk = sum(entry.stat().st_size for entry in os.scandir(self.directory))
+        self.assertEqual(on_disk, cache.total_bytes)
+
+    def test_oversized_entry_is_not_stored(self):
+        cache = self.cache(max_bytes=10)
+        cache.put('big', b'x' * 11)
+        self.assertIsNone(cache.get('big'))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_least_recently_used_is_evicted_first(self):
+        cache = self.cache(max_bytes=90)
+        for key in 'abc':
+            cache.put(key, b'x' * 30)
+        cache.get('a')            # b is now the least recently used
+        cache.put('d', b'x' * 30)
+        self.assertIsNone(cache.get('b'))
+        for key in 'acd':
+            with self.subTest(key=key):
+                self.assertIsNotNone(cache.get(key))
+
+    def test_recency_survives_a_restart(self):
+        cache = self.cache(max_bytes=90)
+        for age, key in enumerate('abc'):
+            cache.put(key, b'x' * 30)
+            os.utime(cache.path_for(key), (1000 + age, 1000 + age))
+        os.utime(cache.path_for('a'), (2000, 2000))  # a was used last
+        cache = self.cache(max_bytes=90)
+        cache.put('d', b'x' * 30)
+        self.assertEqual(sorted(cache._entries), ['a', 'c', 'd'])
+
+    def test_budget_is_shared_between_instances(self):
+        first = self.cache(max_bytes=90, rescan_interval=0)
+        second = self.cache(max_bytes=90, rescan_interval=0)
+        first.put('a', b'x' * 30)
+        second.put('b', b'x' * 30)
+        self.assertEqual(first.get('b'), b'x' * 30)  # written by the other instance
+        first.put('c', b'x' * 30)
+        second.put('d', b'x' * 30)
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+    def test_entries_are_readable_by_others(self):
+        if sys.platform == 'win32':
+            self.skipTest("POSIX permissions")
+        cache = self.cache()
+        cache.put('a', b'audio')
+        self.assertEqual(stat.S_IMODE(os.stat(cache.path_for('a')).st_mode), ENTRY_MODE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Voice activity detection: speech regions, hangover and upload segments
+
+Usage:
+    python -m unittest tests/test_voice_activity.py
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import voice_activity  # noqa: E402
+from voice_activity import (HANGOVER_MS, PREROLL_MS, SAMPLE_RATE, encode_segment, plan_segments,  # noqa: E402
+                            prepare_upload, runs, speech_regions)
+
+MS = SAMPLE_RATE // 1000  # samples per millisecond
+
+
+def recording(seconds, bursts=(), hiss=()):
+    """
+    Quiet background noise (about -70 dBFS) with voiced bursts (200 Hz tone)
+    and loud white noise, at (start_ms, end_ms) spans
+    """
+    rng = np.random.default_rng(1)
+    samples = rng.normal(0, 10, int(seconds * SAMPLE_RATE))
+    tone = 10000 * np.sin(2 * np.pi * 200 * np.arange(len(samples)) / SAMPLE_RATE)
+    for start, end in bursts:
+        samples[start * MS:end * MS] += tone[start * MS:end * MS]
+    for start, end in hiss:
+        samples[start * MS:end * MS] += rng.normal(0, 8000, (end - start) * MS)
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+class RunsTest(unittest.TestCase):
+    def test_runs(self):
+        cases = [
+            ([], [], []),
+            ([0, 0], [], []),
+            ([1, 1, 0, 1], [0, 3], [2, 4]),
+            ([0, 1, 1, 1, 0], [1], [4]),
+        ]
+        for mask, starts, ends in cases:
+            with self.subTest(mask=mask):
+                found = runs(np.array(mask, dtype=bool))
+                self.assertEqual([found[0].tolist(), found[1].tolist()], [starts, ends])
+
+
+class SpeechRegionsTest(unittest.TestCase):
+    def regions_ms(self, samples):
+        return [(start // MS, end // MS) for start, end in speech_regions(samples)]
+
+    def test_cases(self):
+        # (seconds, bursts, hiss) -> regions in ms, with preroll and hangover
+        cases = [
+            (2, [], [], []),
+            (3, [(1000, 2000)], [], [(1000 - PREROLL_MS, 2000 + HANGOVER_MS)]),
+            (3, [(0, 500)], [], [(0, 500 + HANGOVER_MS)]),
+            # Pauses shorter than hangover + preroll stay inside one region
+            (3, [(500, 1000), (1250, 1500)], [], [(400, 1700)]),
+            (3, [(500, 1000), (2000, 2500)], [], [(400, 1200), (1900, 2700)]),
+            # Clicks shorter than MIN_SPEECH_MS and hiss are not speech
+            (3, [(1000, 1040)], [], []),
+            (3, [], [(500, 2500)], []),
+            (3, [(1000, 1500)], [(2000, 2500)], [(900, 1700)]),
+        ]
+        for seconds, bursts, hiss, regions in cases:
+            with self.subTest(bursts=bursts, hiss=hiss):
+                self.assertEqual(self.regions_ms(recording(seconds, bursts, hiss)), regions)
+
+    def test_partial_last_frame_is_kept(self):
+        samples = recording(1.01, [(500, 1010)])
+        self.assertEqual(speech_regions(samples)[-1][1], len(samples))
+
+    def test_empty(self):
+        self.assertEqual(speech_regions(np.zeros(0, dtype=np.int16)), [])
+        self.assertEqual(speech_regions(np.zeros(100, dtype=np.int16)), [])
+
+
+class UploadTest(unittest.TestCase):
+    def test_plan_segments(self):
+        # (regions, max samples) -> segments
+        cases = [
+            ([], 10, []),
+            ([(0, 4), (6, 9)], 10, [[(0, 4), (6, 9)]]),
+            ([(0, 4), (6, 13)], 10, [[(0, 4)], [(6, 13)]]),
+            ([(0, 25)], 10, [[(0, 10)], [(10, 20)], [(20, 25)]]),
+            ([(0, 3), (5, 30), (31, 33)], 10, [[(0, 3)], [(5, 15)], [(15, 25)], [(25, 30), (31, 33)]]),
+        ]
+        for regions, max_samples, segments in cases:
+            with self.subTest(regions=regions, max_samples=max_samples):
+                self.assertEqual(plan_segments(regions, max_samples), segments)
+
+    def test_prepare_upload(self):
+        samples = recording(4, [(500, 1000), (2500, 3000)])
+        segments, stats = prepare_upload(samples)
+        self.assertEqual(stats['segments'], 1)
+        self.assertEqual(len(segments[0]), 2 * (500 + PREROLL_MS + HANGOVER_MS) * MS)
+        self.assertAlmostEqual(stats['duration'], 4.0)
+        self.assertAlmostEqual(stats['speech_ratio'], 1.6 / 4.0)
+
+    def test_encode_without_ffmpeg(self):
+        samples = recording(0.1)
+        ffmpeg, voice_activity.FFMPEG = voice_activity.FFMPEG, os.path.join(os.sep, 'nonexistent', 'ffmpeg')
+        try:
+            self.assertEqual(encode_segment(samples), (samples.astype('<i2').tobytes(), 'LINEAR16'))
+        finally:
+            voice_activity.FFMPEG = ffmpeg
+
+
+if __name__ == '__main__':
+    unittest.main()